@@ -5,8 +5,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..')))
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from utils.retry_config import get_http_retry_config
+from utils.model_factory import gemini_model
 from utils.file_loader import load_file_content
 from utils.file_saver import save_output_file
 
@@ -19,10 +18,7 @@ instruction_text = load_file_content("agents/competitor_analyst/instructions.txt
 
 competitor_analyst = LlmAgent(
     name="competitor_analyst",
-    model=Gemini(
-        model="gemini-2.5-pro", # Using Pro for better reasoning on large context
-        retry_options=get_http_retry_config()
-    ),
+    model=gemini_model("gemini-2.5-pro"),  # Using Pro for better reasoning on large context
     instruction=instruction_text,
     description="Consolidates data from Rankings, Content, and Sitemaps into a final strategic report.",
     tools=[save_output_file]
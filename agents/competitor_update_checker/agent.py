@@ -1,108 +1,159 @@
+import json
 import os
 import sys
 
 # Add the project root to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..')))
 
-from google.adk.agents import LlmAgent, ParallelAgent
-from google.adk.models.google_llm import Gemini
-from utils.retry_config import get_http_retry_config
-from utils.file_loader import load_file_content, get_item_by_position
-from tools.sitemap_fetcher import fetch_competitor_sitemap
+from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools import ToolContext
+from utils.model_factory import gemini_model
+from utils.file_loader import load_file_content, parse_numbered_list
+from utils.agent_fanout import fan_out
+from tools.sitemap_fetcher import analyze_competitor_sitemap_async, crawl_competitor_sitemaps_async
+from tools.sitemap_parser import assess_content_strategy, build_sitemap_report
 from utils.file_saver import save_output_file
-from agents.competitor_update_checker.output_models import CompetitorUpdateCheckerOutput
+from utils.stage_memo import StageMemo, fingerprint
+from utils.checkpoint import restored_output
+from agents.competitor_update_checker.output_models import CompetitorUpdateCheckerOutput, ContentStrategy
 
 # Load data
 competitor_list = load_file_content(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'data', 'competitor_url.txt')))
+competitor_urls = parse_numbered_list(competitor_list)
 instruction_template = load_file_content("agents/competitor_update_checker/instructions.txt")
 agent_description = load_file_content("agents/competitor_update_checker/description.txt")
 
+# --- Deterministic sitemap analysis ---
+# The sitemap is parsed natively; the LLM only writes the 'strategy_insights'.
+
+async def analyze_competitor_sitemap(base_url: str, tool_context: ToolContext) -> dict:
+    """
+    Fetches and parses the competitor's sitemap.
+
+    Args:
+        base_url (str): The home URL of the competitor.
+
+    Returns:
+        dict: metadata, recent_updates, sitemap_indexes, raw_xml_summary and top_sections.
+    """
+    key = f"{tool_context.agent_name}_sitemap_report"
+    # The stage memo (sitemap_inputs) may already have crawled the sitemap for this run
+    report = tool_context.state.get(key) or await analyze_competitor_sitemap_async(base_url)
+    tool_context.state[key] = report
+    return report
+
+
+def build_sitemap_output(report: dict, insights: dict = None) -> dict:
+    """
+    Full CompetitorUpdateCheckerOutput (as a dict) for a parsed sitemap report; without
+    LLM-written 'insights' the rule-based assessment is used.
+    """
+    return CompetitorUpdateCheckerOutput(
+        metadata=report["metadata"],
+        recent_updates=report["recent_updates"],
+        sitemap_indexes=report["sitemap_indexes"],
+        strategy_insights=insights or assess_content_strategy(report),
+        raw_xml_summary=report["raw_xml_summary"]
+    ).model_dump()
+
+
+def merge_sitemap_output(output_key: str, insights_key: str, competitor_url: str):
+    """
+    Returns an after_agent_callback that combines the parsed sitemap report with the
+    LLM-written insights (stored under 'insights_key') into the full
+    CompetitorUpdateCheckerOutput under 'output_key'.
+    """
+    async def _merge(callback_context: CallbackContext):
+        state = callback_context.state
+        report = state.get(f"{callback_context.agent_name}_sitemap_report") or await analyze_competitor_sitemap_async(competitor_url)
+        state[output_key] = build_sitemap_output(report, state.get(insights_key))
+        return None
+
+    return _merge
+
+
 # Define tools
-tools_list = [fetch_competitor_sitemap, save_output_file]
-
-# Extract competitor URLs
-competitor_url_1 = get_item_by_position(competitor_list, 1) or "competitor_1"
-competitor_url_2 = get_item_by_position(competitor_list, 2) or "competitor_2"
-competitor_url_3 = get_item_by_position(competitor_list, 3) or "competitor_3"
-competitor_url_4 = get_item_by_position(competitor_list, 4) or "competitor_4"
-competitor_url_5 = get_item_by_position(competitor_list, 5) or "competitor_5"
-
-# Define Agents
-sitemap_analyzer_1 = LlmAgent(
-    name="sitemap_analyzer_1",
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=get_http_retry_config()),
-    instruction=instruction_template.format(
-        competitor_url=competitor_url_1,
-        filename="competitor_update_{competitor_url_1.replace('/', '_').replace(':', '').replace('.', '_')}"
-    ),
-    description=agent_description,
-    output_key="competitor_1_sitemap_data",
-    output_schema=CompetitorUpdateCheckerOutput,
-    tools=tools_list
-)
+tools_list = [analyze_competitor_sitemap, save_output_file]
 
-sitemap_analyzer_2 = LlmAgent(
-    name="sitemap_analyzer_2",
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=get_http_retry_config()),
-    instruction=instruction_template.format(
-        competitor_url=competitor_url_2,
-        filename="competitor_update_{competitor_url_2.replace('/', '_').replace(':', '').replace('.', '_')}"
-    ),
-    description=agent_description,
-    output_key="competitor_2_sitemap_data",
-    output_schema=CompetitorUpdateCheckerOutput,
-    tools=tools_list
-)
+def sitemap_filename(competitor_url: str) -> str:
+    """Name of the file the sitemap analyzer saves the parsed report under."""
+    return f"competitor_update_{competitor_url.replace('/', '_').replace(':', '').replace('.', '_')}"
 
-sitemap_analyzer_3 = LlmAgent(
-    name="sitemap_analyzer_3",
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=get_http_retry_config()),
-    instruction=instruction_template.format(
-        competitor_url=competitor_url_3,
-        filename="competitor_update_{competitor_url_3.replace('/', '_').replace(':', '').replace('.', '_')}"
-    ),
-    description=agent_description,
-    output_key="competitor_3_sitemap_data",
-    output_schema=CompetitorUpdateCheckerOutput,
-    tools=tools_list
-)
 
-sitemap_analyzer_4 = LlmAgent(
-    name="sitemap_analyzer_4",
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=get_http_retry_config()),
-    instruction=instruction_template.format(
-        competitor_url=competitor_url_4,
-        filename="competitor_update_{competitor_url_4.replace('/', '_').replace(':', '').replace('.', '_')}"
-    ),
-    description=agent_description,
-    output_key="competitor_4_sitemap_data",
-    output_schema=CompetitorUpdateCheckerOutput,
-    tools=tools_list
-)
+# Parse-summary fields that identify a sitemap's content (no dates relative to today)
+SUMMARY_FIELDS = ("root_tag", "total_entries", "entries_with_lastmod", "truncated", "sitemaps_skipped", "recent", "sitemap_indexes", "sections")
 
-sitemap_analyzer_5 = LlmAgent(
-    name="sitemap_analyzer_5",
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=get_http_retry_config()),
-    instruction=instruction_template.format(
-        competitor_url=competitor_url_5,
-        filename="competitor_update_{competitor_url_5.replace('/', '_').replace(':', '').replace('.', '_')}"
-    ),
-    description=agent_description,
-    output_key="competitor_5_sitemap_data",
-    output_schema=CompetitorUpdateCheckerOutput,
-    tools=tools_list
-)
 
-competitor_spy = ParallelAgent(
+def sitemap_inputs(competitor_url: str):
+    """
+    Stage memo inputs of a sitemap analyzer: the parsed sitemap summary (sitemaps are
+    served from the conditional-GET cache with their stored parse results). The
+    report built from it is left in the state for the agent's tool and merge callback.
+    """
+    async def _inputs(callback_context: CallbackContext):
+        parsed = await crawl_competitor_sitemaps_async(competitor_url)
+        if parsed["root_tag"] is None:
+            return None
+        callback_context.state[f"{callback_context.agent_name}_sitemap_report"] = build_sitemap_report(parsed, competitor_url)
+        return {"url": competitor_url, "sitemap": fingerprint({field: parsed.get(field) for field in SUMMARY_FIELDS})}
+
+    return _inputs
+
+
+def save_sitemap_output(competitor_url: str, output_key: str):
+    """
+    Stage memo 'save' of a sitemap analyzer. Only the LLM insights are memoized: on a hit
+    the full output is rebuilt from this run's report (dates relative to today, fresh
+    assessment) plus the cached insights, and the report is written as the agent would.
+    """
+    def _save(callback_context: CallbackContext, insights: dict):
+        report = callback_context.state.get(f"{callback_context.agent_name}_sitemap_report")
+        if report is None:
+            return
+        callback_context.state[output_key] = build_sitemap_output(report, insights)
+        save_output_file(content=json.dumps(report), filename=sitemap_filename(competitor_url))
+
+    return _save
+
+
+def restore_sitemap_output(output_key: str):
+    """before_agent_callback: skips the agent when a resumed run restored its output."""
+    def _restore(callback_context: CallbackContext):
+        return restored_output(callback_context, output_key)
+
+    return _restore
+
+
+def sitemap_analyzer(index: int, competitor_url: str) -> LlmAgent:
+    """Sitemap analyzer for one competitor; its output lands in competitor_<index>_sitemap_data."""
+    instruction = instruction_template.format(
+        competitor_url=competitor_url,
+        filename=sitemap_filename(competitor_url)
+    )
+    output_key, insights_key = f"competitor_{index}_sitemap_data", f"competitor_{index}_sitemap_insights"
+    memo = StageMemo(insights_key, instruction, sitemap_inputs(competitor_url),
+                     save_sitemap_output(competitor_url, output_key))
+    return LlmAgent(
+        name=f"sitemap_analyzer_{index}",
+        model=gemini_model("gemini-2.5-flash-lite"),
+        instruction=instruction,
+        description=agent_description,
+        output_key=insights_key,
+        output_schema=ContentStrategy,
+        before_agent_callback=[restore_sitemap_output(output_key), memo.before],
+        after_agent_callback=memo.remember(merge_sitemap_output(output_key, insights_key, competitor_url)),
+        tools=tools_list
+    )
+
+
+# Define Agents (one per configured competitor)
+sitemap_analyzers = [sitemap_analyzer(index, url) for index, url in enumerate(competitor_urls, start=1)]
+
+competitor_spy = fan_out(
     name="competitor_spy",
-    description="Orchestrates the parallel analysis of 5 competitor sitemaps.",
-    sub_agents=[
-        sitemap_analyzer_1, 
-        sitemap_analyzer_2, 
-        sitemap_analyzer_3, 
-        sitemap_analyzer_4, 
-        sitemap_analyzer_5
-    ]
+    description=f"Orchestrates the parallel analysis of {len(competitor_urls)} competitor sitemaps.",
+    sub_agents=sitemap_analyzers
 )
 
-root_agent = competitor_spy
\ No newline at end of file
+root_agent = competitor_spy
@@ -1,15 +1,24 @@
+import asyncio
+import json
 import os
 import sys
 
 # Add project root to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..')))
 
-from google.adk.agents import LlmAgent, ParallelAgent
-from google.adk.models.google_llm import Gemini
-from utils.retry_config import get_http_retry_config
-from utils.file_loader import load_file_content
-from tools.nlp_analyzer import analyze_content
+from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools import ToolContext
+from utils.model_factory import gemini_model
+from utils.file_loader import load_file_content, parse_numbered_list
+from utils.agent_fanout import fan_out
+from tools import nlp_analyzer
+from tools.nlp_analyzer import analyze_many_async
+from tools.site_analyzer import analyze_site_async
 from utils.file_saver import save_output_file
+from utils.stage_memo import StageMemo, fingerprint
+from utils.checkpoint import RESUMED_KEY
+from utils.domains import domain_of
 
 # --- Load Configuration ---
 # Helper to safely load files
@@ -20,93 +29,150 @@ def safe_load(path):
         return ""
 
 competitor_list = safe_load(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'data', 'competitor_url.txt')))
+competitor_urls = parse_numbered_list(competitor_list)
 client_website_url = safe_load(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'data', 'client_url.txt')))
+# The corpus of the TF-IDF: every competitor and the client
+content_urls = competitor_urls + [client_website_url.strip()]
+# State key of each analyst's output, in content_urls order
+content_keys = [f"competitor_{index}_result" for index in range(1, len(competitor_urls) + 1)] + ["client_website_result"]
 
 # Load the NEW instructions defined above
 base_instruction = safe_load("agents/content_alchemist/instructions.txt") 
 agent_description = safe_load("agents/content_alchemist/description.txt")
 
-# Combine base instructions with the competitor list once
-full_instruction_set = base_instruction + "\n\n*** COMPETITOR LIST ***\n" + competitor_list
-
 # --- Define Agents ---
 
 # Shared Model Configuration
-gemini_config = Gemini(
-    model="gemini-2.5-flash-lite",
-    retry_options=get_http_retry_config()
-)
+gemini_config = gemini_model("gemini-2.5-flash-lite")
+
+# Per-URL results of the corpus analysis run by the orchestrator (see prefetch_corpus)
+CORPUS_KEY = "temp:content_corpus"
+# "1": profile each whole site (homepage + sitemap pages, see tools/site_analyzer.py)
+# instead of analyzing the homepages as one corpus
+SITE_ANALYSIS = os.getenv("SITE_ANALYSIS", "0") == "1"
+
+
+async def analyze_content_urls(urls: list) -> dict:
+    """
+    The content stage's analysis of 'urls', keyed by URL: one corpus-level batch of
+    the homepages, or with SITE_ANALYSIS one site-level profile per URL.
+    """
+    if SITE_ANALYSIS:
+        results = await asyncio.gather(*(analyze_site_async(url) for url in dict.fromkeys(urls)))
+        return {url: {**result, "url": url} for url, result in zip(dict.fromkeys(urls), results)}
+    batch = await analyze_many_async(urls)
+    return {result["url"]: result for result in batch["results"]}
+
+
+async def analyze_content(base_url: str, tool_context: ToolContext) -> dict:
+    """
+    Analyzes the main content of a web page: TF-IDF top terms (1- to 3-grams, weighted
+    against the client and all competitors) and keyword density (1- to 4-grams).
+
+    Args:
+        base_url (str): The URL to analyze.
+
+    Returns:
+        dict: url, status, tf_idf_top_50_sorted and keyword_density_sorted_by_count.
+    """
+    result = (tool_context.state.get(CORPUS_KEY) or {}).get(base_url)
+    return result if result is not None else await nlp_analyzer.analyze_content_async(base_url)
+
+
+async def prefetch_corpus(callback_context: CallbackContext):
+    """
+    before_agent_callback of the orchestrator: fetches the client and competitor pages
+    concurrently and analyzes them as ONE corpus (analyze_many_async), so TF-IDF uses
+    a real inverse document frequency (with SITE_ANALYSIS, profiles each whole site).
+    Each analyst's tool returns its page's result from CORPUS_KEY instead of
+    analyzing the page alone.
+    """
+    state = callback_context.state
+    if state.get(RESUMED_KEY) and all(state.get(key) is not None for key in content_keys):
+        return None  # Restored from a checkpoint
+
+    state[CORPUS_KEY] = await analyze_content_urls(content_urls)
+    return None
+
 
 # Shared Tools List (All agents need both tools now)
 # NOTE: Ensure content_analyst_1 has the save tool!
+# The async tool lets the parallel analysts overlap their network I/O
 tools_list = [analyze_content, save_output_file]
 
-content_analyst_1 = LlmAgent(
-    name="content_analyst_1",
-    model=gemini_config,
-    instruction="You are a Content Alchemist. Analyze the 1st competitor.\n" + full_instruction_set,
-    description=agent_description,
-    output_key="competitor_1_result",
-    tools=tools_list 
-)
-
-content_analyst_2 = LlmAgent(
-    name="content_analyst_2",
-    model=gemini_config,
-    instruction="You are a Content Alchemist. Analyze the 2nd competitor.\n" + full_instruction_set,
-    description=agent_description,
-    output_key="competitor_2_result",
-    tools=tools_list
-)
-
-content_analyst_3 = LlmAgent(
-    name="content_analyst_3",
-    model=gemini_config,
-    instruction="You are a Content Alchemist. Analyze the 3rd competitor.\n" + full_instruction_set,
-    description=agent_description,
-    output_key="competitor_3_result",
-    tools=tools_list
-)
-
-content_analyst_4 = LlmAgent(
-    name="content_analyst_4",
-    model=gemini_config,
-    instruction="You are a Content Alchemist. Analyze the 4th competitor.\n" + full_instruction_set,
-    description=agent_description,
-    output_key="competitor_4_result",
-    tools=tools_list
-)
-
-content_analyst_5 = LlmAgent(
-    name="content_analyst_5",
-    model=gemini_config,
-    instruction="You are a Content Alchemist. Analyze the 5th competitor.\n" + full_instruction_set,
-    description=agent_description,
-    output_key="competitor_5_result",
-    tools=tools_list
-)
-
-content_analyst_for_our_website = LlmAgent(
-    name="content_analyst_for_our_website",
-    model=gemini_config,
-    instruction=f"You are a Content Alchemist. Analyze the client website: {client_website_url}.\n" + base_instruction,
-    description=agent_description,
-    output_key="client_website_result",
-    tools=tools_list
+def site_name(url: str) -> str:
+    """'https://www.jasper.ai/' -> 'jasper', the filename the content analysts save under."""
+    return domain_of(url).split(".")[0] or "website"
+
+
+def page_inputs(url: str):
+    """
+    Stage memo inputs of a content analyst: its page's analysis, i.e. terms and counts
+    of the extracted text, so markup-only changes (scripts, attributes) do not miss.
+    The analysis comes from the orchestrator's corpus prefetch; when the URL is not in
+    it, the page is analyzed here and left in CORPUS_KEY for the analyst's tool.
+    """
+    async def _inputs(callback_context: CallbackContext):
+        corpus = callback_context.state.get(CORPUS_KEY) or {}
+        result = corpus.get(url)
+        if result is None:
+            result = await nlp_analyzer.analyze_content_async(url)
+            callback_context.state[CORPUS_KEY] = {**corpus, url: result}
+        return {"url": url, "analysis": fingerprint(result)} if result.get("status") == "success" else None
+
+    return _inputs
+
+
+def save_page_analysis(url: str):
+    """Stage memo 'save' of a content analyst: writes its page's analysis, as the analyst would."""
+    def _save(callback_context: CallbackContext, value):
+        result = (callback_context.state.get(CORPUS_KEY) or {}).get(url)
+        if result is not None:
+            save_output_file(content=json.dumps(result), filename=site_name(url))
+
+    return _save
+
+
+def memoized_analyst(name: str, url: str, instruction: str, output_key: str) -> LlmAgent:
+    """Content analyst whose output is reused while the page and instruction are unchanged."""
+    memo = StageMemo(output_key, instruction, page_inputs(url), save_page_analysis(url))
+    return LlmAgent(
+        name=name,
+        model=gemini_config,
+        instruction=instruction,
+        description=agent_description,
+        output_key=output_key,
+        before_agent_callback=memo.before,
+        after_agent_callback=memo.remember(),
+        tools=tools_list
+    )
+
+
+def content_analyst(index: int, competitor_url: str) -> LlmAgent:
+    """Content analyst for one competitor; its output lands in competitor_<index>_result."""
+    return memoized_analyst(
+        f"content_analyst_{index}",
+        competitor_url,
+        f"You are a Content Alchemist. Analyze competitor #{index}: {competitor_url}\n" + base_instruction,
+        f"competitor_{index}_result"
+    )
+
+# One analyst per configured competitor
+content_analysts = [content_analyst(index, url) for index, url in enumerate(competitor_urls, start=1)]
+
+content_analyst_for_our_website = memoized_analyst(
+    "content_analyst_for_our_website",
+    client_website_url.strip(),
+    f"You are a Content Alchemist. Analyze the client website: {client_website_url}.\n" + base_instruction,
+    "client_website_result"
 )
 
 # --- The Orchestrator ---
-content_alchemist = ParallelAgent(
+content_alchemist = fan_out(
     name="content_alchemist",
     description="Orchestrates parallel NLP content analysis and file saving.",
-    sub_agents=[
-        content_analyst_1,
-        content_analyst_2,
-        content_analyst_3,
-        content_analyst_4,
-        content_analyst_5,
-        content_analyst_for_our_website
-    ]
+    sub_agents=content_analysts + [content_analyst_for_our_website],
+    before_agent_callback=prefetch_corpus
 )
 
-root_agent = content_alchemist
\ No newline at end of file
+root_agent = content_alchemist
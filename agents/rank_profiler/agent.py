@@ -1,16 +1,27 @@
+import asyncio
+import json
 import os
 import sys
 
 # Add project root to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..')))
 
-from google.adk.agents import LlmAgent, ParallelAgent
-from google.adk.models.google_llm import Gemini
-from utils.retry_config import get_http_retry_config
-from utils.file_loader import load_file_content, get_item_by_position
-from tools.ranking_monitor import get_indian_organic_results
+from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools import ToolContext
+from google.genai import types
+from utils.model_factory import gemini_model
+from utils.file_loader import load_file_content, parse_numbered_list
+from utils.agent_fanout import fan_out
+from tools.serp_mapper import analyze_keyword_rankings_async
+from tools.ranking_monitor import SERPAPI_DEPTH, get_serp_responses_many_async, get_serp_response_async
+from tools.rank_matrix import visibility_report
+from utils.rank_store import get_rank_store
 from utils.file_saver import save_output_file
-from agents.rank_profiler.output_models import RankProfilerOutput
+from utils.stage_memo import StageMemo, fingerprint
+from utils.checkpoint import RESUMED_KEY
+from utils.domains import domain_of
+from agents.rank_profiler.output_models import RankProfilerOutput, RankingCommentary
 
 # --- Configuration & Data Loading ---
 
@@ -23,87 +34,164 @@ def safe_load(path):
 # Load keywords
 keywords_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'data', 'keywords.txt'))
 keywords_list = safe_load(keywords_path)
+keywords = parse_numbered_list(keywords_list)
+
+# Load the client URL (its position is detected in every SERP)
+client_url_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'data', 'client_url.txt'))
+client_url = safe_load(client_url_path).strip()
+
+# The LLM only adds commentary (insights, saturation, opportunity score) on top of the
+# deterministic ranking data; set RANK_PROFILER_COMMENTARY=0 to skip the model entirely.
+RANK_PROFILER_COMMENTARY = os.getenv("RANK_PROFILER_COMMENTARY", "1") == "1"
 
 # Load Instructions (using simplified version to avoid LLM confusion)
 instruction_template = safe_load("agents/rank_profiler/instructions.txt")
 agent_description = safe_load("agents/rank_profiler/description.txt")
 
 # --- Shared Configuration ---
-gemini_config = Gemini(
-    model="gemini-2.5-flash-lite", 
-    retry_options=get_http_retry_config()
-)
+gemini_config = gemini_model("gemini-2.5-flash-lite")
+
+# --- Deterministic ranking data ---
+# The SERP is mapped to RankProfilerOutput natively; the LLM only writes the commentary.
+
+async def get_keyword_rankings(keyword: str, tool_context: ToolContext) -> dict:
+    """
+    Searches Google India for the keyword and returns its ranking data.
+
+    Args:
+        keyword (str): The keyword to analyze.
+
+    Returns:
+        dict: RankProfilerOutput fields: metadata, organic_results, featured_snippet,
+              related_searches, top_3_competitors, competitor_analysis, total_results
+              and current_client_position / current_client_rank.
+    """
+    report = await analyze_keyword_rankings_async(keyword, client_url)
+    tool_context.state[f"{tool_context.agent_name}_ranking_report"] = report
+    return report
+
+
+async def prefetch_rankings(callback_context: CallbackContext):
+    """
+    before_agent_callback of the orchestrator: searches all keywords in one
+    de-duplicated, concurrent SerpApi batch, so each rank agent reads its SERP
+    from the day's cache, and stores the keyword x domain visibility scores
+    (share of voice, visibility, positions down to SERPAPI_DEPTH) as 'ranking_visibility'.
+    The batch is recorded in the rank history store; the changes since the previous
+    recorded run are stored as 'ranking_changes'.
+    """
+    state = callback_context.state
+    if state.get(RESUMED_KEY) and state.get("ranking_visibility") is not None:
+        return None  # Restored from a checkpoint
+
+    responses = await get_serp_responses_many_async(keywords)
+    if isinstance(responses.get("error"), str):
+        return None
+
+    callback_context.state["ranking_visibility"] = visibility_report(responses, client_url)
+    callback_context.state["ranking_changes"] = await asyncio.to_thread(record_rank_history, responses)
+    return None
+
+
+def record_rank_history(responses: dict) -> dict:
+    """
+    Records today's SERPs and returns what moved since the previous recorded run:
+    the client's position deltas, new top-10 entrants and top-10 drop-offs.
+    """
+    store = get_rank_store()
+    store.record_responses(responses, SERPAPI_DEPTH)
+    since, until = store.resolve_dates()
+    return {
+        "since": since,
+        "until": until,
+        "client_deltas": store.position_deltas(since, until, domain=domain_of(client_url)) if client_url else [],
+        "new_entrants": store.new_entrants(since, until),
+        "drop_offs": store.drop_offs(since, until)
+    }
+
+
+def merge_ranking_output(output_key: str, insights_key: str, keyword: str):
+    """
+    Returns an agent callback that combines the mapped ranking data with the
+    LLM-written commentary (stored under 'insights_key', if any) into the full
+    RankProfilerOutput under 'output_key', saves it to rank_profiler_<keyword>.json
+    and emits it as the agent's final response.
+    """
+    async def _merge(callback_context: CallbackContext):
+        state = callback_context.state
+        report = state.get(f"{callback_context.agent_name}_ranking_report") or \
+            await analyze_keyword_rankings_async(keyword, client_url)
+        commentary = state.get(insights_key) or {}
+
+        output = RankProfilerOutput(**{**report, **commentary}).model_dump()
+        state[output_key] = output
+        save_output_file(content=json.dumps(output), filename=f"rank_profiler_{keyword}")
+        return types.Content(role="model", parts=[types.Part(text=json.dumps(output))])
+
+    return _merge
+
+
+# The ranking data tool is the only tool; the merged output is saved by the callback
+tools_list = [get_keyword_rankings]
+
+
+def serp_inputs(keyword: str):
+    """Stage memo inputs of a rank agent: the keyword's SERP (served from the day's cache, see prefetch_rankings)."""
+    async def _inputs(callback_context: CallbackContext):
+        response = await get_serp_response_async(keyword)
+        if "error" in response:
+            return None
+        return {"keyword": keyword, "client_url": client_url, "commentary": RANK_PROFILER_COMMENTARY,
+                "serp": fingerprint(response)}
+
+    return _inputs
+
+
+def save_ranking_output(keyword: str):
+    """Stage memo 'save' of a rank agent: writes the memoized output to rank_profiler_<keyword>.json."""
+    def _save(callback_context: CallbackContext, output: dict):
+        save_output_file(content=json.dumps(output), filename=f"rank_profiler_{keyword}")
+
+    return _save
+
+
+def rank_agent(index: int, keyword: str) -> LlmAgent:
+    """
+    Rank agent for one keyword. With commentary disabled the merge runs before the
+    agent and its content ends the agent's turn, so the model is never called.
+    The merged output is memoized per SERP (see utils.stage_memo).
+    """
+    instruction = instruction_template.format(keyword=keyword)
+    memo = StageMemo(f"keyword_{index}_ranking_data", instruction, serp_inputs(keyword), save_ranking_output(keyword))
+    merge = memo.remember(
+        merge_ranking_output(f"keyword_{index}_ranking_data", f"keyword_{index}_ranking_insights", keyword)
+    )
+    return LlmAgent(
+        name=f"keyword_{index}_ranking_data",
+        model=gemini_config,
+        instruction=instruction,
+        description=agent_description,
+        output_key=f"keyword_{index}_ranking_insights",
+        output_schema=RankingCommentary,
+        before_agent_callback=[memo.before] if RANK_PROFILER_COMMENTARY else [memo.before, merge],
+        after_agent_callback=merge if RANK_PROFILER_COMMENTARY else None,
+        tools=tools_list
+    )
 
-# Both tools are required for every agent
-tools_list = [get_indian_organic_results, save_output_file]
 
 # --- Define Agents with Output Schema ---
 
-# Extract keywords for reference
-keyword_1 = get_item_by_position(keywords_list, 1) or "keyword_1"
-keyword_2 = get_item_by_position(keywords_list, 2) or "keyword_2"
-keyword_3 = get_item_by_position(keywords_list, 3) or "keyword_3"
-keyword_4 = get_item_by_position(keywords_list, 4) or "keyword_4"
-keyword_5 = get_item_by_position(keywords_list, 5) or "keyword_5"
-
-rank_agent_1 = LlmAgent(
-    name="keyword_1_ranking_data", 
-    model=gemini_config,
-    instruction=instruction_template.format(keyword=keyword_1, keywords_list=keywords_list),
-    description=agent_description,
-    output_schema=RankProfilerOutput,
-    tools=tools_list
-)
-
-rank_agent_2 = LlmAgent(
-    name="keyword_2_ranking_data",
-    model=gemini_config,
-    instruction=instruction_template.format(keyword=keyword_2, keywords_list=keywords_list),
-    description=agent_description,
-    output_schema=RankProfilerOutput,
-    tools=tools_list
-)
-
-rank_agent_3 = LlmAgent(
-    name="keyword_3_ranking_data",
-    model=gemini_config,
-    instruction=instruction_template.format(keyword=keyword_3, keywords_list=keywords_list),
-    description=agent_description,
-    output_schema=RankProfilerOutput,
-    tools=tools_list
-)
-
-rank_agent_4 = LlmAgent(
-    name="keyword_4_ranking_data",
-    model=gemini_config,
-    instruction=instruction_template.format(keyword=keyword_4, keywords_list=keywords_list),
-    description=agent_description,
-    output_schema=RankProfilerOutput,
-    tools=tools_list
-)
-
-rank_agent_5 = LlmAgent(
-    name="keyword_5_ranking_data",
-    model=gemini_config,
-    instruction=instruction_template.format(keyword=keyword_5, keywords_list=keywords_list),
-    description=agent_description,
-    output_schema=RankProfilerOutput,
-    tools=tools_list
-)
+# One rank agent per configured keyword
+rank_agents = [rank_agent(index, keyword) for index, keyword in enumerate(keywords, start=1)]
 
 # --- The Orchestrator ---
 
-rank_profiler = ParallelAgent(
+rank_profiler = fan_out(
     name="rank_profiler",
-    description="Orchestrates parallel SERP analysis for 5 target keywords.",
-    sub_agents=[
-        rank_agent_1,
-        rank_agent_2,
-        rank_agent_3,
-        rank_agent_4,
-        rank_agent_5
-    ]
+    description=f"Orchestrates parallel SERP analysis for {len(keywords)} target keywords.",
+    sub_agents=rank_agents,
+    before_agent_callback=prefetch_rankings
 )
 
 # Export
-root_agent = rank_profiler
\ No newline at end of file
+root_agent = rank_profiler
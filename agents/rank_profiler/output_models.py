@@ -175,6 +175,16 @@ class CompetitorAnalysis(BaseModel):
     domain_authority: Optional[float] = None
 
 
+class RankingCommentary(BaseModel):
+    """
+    Optional LLM commentary on a keyword's SERP. Everything else in
+    RankProfilerOutput is mapped from the SerpApi response by tools/serp_mapper.py.
+    """
+    ranking_insights: List[RankingInsight] = Field(default_factory=list)
+    market_saturation_level: Optional[str] = None  # LOW, MEDIUM, HIGH
+    opportunity_score: Optional[float] = Field(default=None, ge=0, le=100)
+
+
 class RankProfilerOutput(BaseModel):
     """
     Complete output schema for Rank Profiler Agent.
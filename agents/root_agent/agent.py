@@ -5,6 +5,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from google.adk.agents import SequentialAgent, ParallelAgent
+from google.adk.apps.app import App
 
 # --- Import all your Root Agents ---
 # (Assumes your agents are exported as 'root_agent' in their respective files)
@@ -14,19 +15,33 @@ from agents.rank_profiler.agent import root_agent as rank_agent
 from agents.competitor_update_checker.agent import root_agent  as spy_agent
 from agents.web_performance.agent import root_agent as perf_agent
 from agents.competitor_analyst.agent import root_agent as analyst_agent
+from agents.root_agent.direct_pipeline import DirectDataGatheringAgent
+from utils.checkpoint import CheckpointPlugin
+from utils.tracing import TRACING
+from utils.tracing_plugin import TracingPlugin
+
+# "agents": one LLM sub-agent per fetch (default); "direct": the tools are called from
+# plain code and only the analyst uses the model
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "agents")
 
 # --- PHASE 1: THE GATHERING SQUAD (Parallel) ---
 # This agent groups the 4 data fetchers. It will not finish until ALL 4 are done.
-data_gathering_squad = ParallelAgent(
-    name="data_gathering_squad",
-    description="Fetches Content, Rankings, Sitemaps, and Performance data simultaneously.",
-    sub_agents=[
-        content_agent,  # Analyzes Competitor Content (1-5) + Client Content
-        rank_agent,     # Checks Rankings (1-5)
-        spy_agent,      # Checks Sitemaps (1-5)
-        perf_agent      # Checks Web Vitals
-    ]
-)
+if PIPELINE_MODE == "direct":
+    data_gathering_squad = DirectDataGatheringAgent(
+        name="data_gathering_squad",
+        description="Fetches Content, Rankings, Sitemaps, and Performance data simultaneously, without the LLM."
+    )
+else:
+    data_gathering_squad = ParallelAgent(
+        name="data_gathering_squad",
+        description="Fetches Content, Rankings, Sitemaps, and Performance data simultaneously.",
+        sub_agents=[
+            content_agent,  # Analyzes Competitor Content (1-5) + Client Content
+            rank_agent,     # Checks Rankings (1-5)
+            spy_agent,      # Checks Sitemaps (1-5)
+            perf_agent      # Checks Web Vitals
+        ]
+    )
 
 # --- PHASE 2: THE MASTER SEQUENCE (Sequential) ---
 # This runs Phase 1, waits for completion, then runs Phase 2 (Analyst).
@@ -39,4 +54,13 @@ master_orchestrator = SequentialAgent(
     ]
 )
 
-root_agent = master_orchestrator
\ No newline at end of file
+root_agent = master_orchestrator
+
+# Every phase-1 stage output is checkpointed to output/checkpoints/<session id>.json, so a failed
+# run can be finished with `python -m agents.root_agent.resume` (adk web loads 'app' first).
+# With TRACE_DIR set, every run also writes a Chrome trace and an OTLP/JSON file there.
+app = App(
+    name="root_agent",
+    root_agent=root_agent,
+    plugins=[CheckpointPlugin(final_agents=[analyst_agent.name])] + ([TracingPlugin()] if TRACING else [])
+)
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from tools.ranking_monitor import get_serp_responses_many_async, normalize_keyword
+from tools.serp_mapper import map_serp_response
+from tools.rank_matrix import visibility_report
+from tools.sitemap_fetcher import analyze_competitor_sitemap_async
+from tools.web_vitals_fetcher import analyze_web_vitals_many_async
+from tools.performance_mapper import map_web_vitals, performance_benchmark
+from utils.file_saver import save_output_file
+from utils.checkpoint import RESUMED_KEY
+from utils.tracing import span
+from agents.content_alchemist.agent import competitor_urls, content_urls, content_keys, analyze_content_urls, site_name
+from agents.rank_profiler.agent import keywords, client_url, record_rank_history
+from agents.rank_profiler.output_models import RankProfilerOutput
+from agents.competitor_update_checker.agent import build_sitemap_output, sitemap_filename
+from agents.web_performance.output_models import WebPerformanceOutput
+
+logger = logging.getLogger(__name__)
+
+
+def _save(key: str, filename: str, output: Dict[str, Any]) -> Dict[str, Any]:
+    save_output_file(content=json.dumps(output), filename=filename)
+    return {key: output}
+
+
+async def _contents() -> Dict[str, Any]:
+    """All pages analyzed as one corpus, so TF-IDF weighs each site against the others."""
+    with span("analyze_content_urls", "tool", urls=len(content_urls)):
+        results = await analyze_content_urls(content_urls)
+    outputs = {}
+    for key, url in zip(content_keys, content_urls):
+        outputs.update(await asyncio.to_thread(_save, key, site_name(url), results[url]))
+    return outputs
+
+
+async def _rankings() -> Dict[str, Any]:
+    with span("get_serp_responses_many_async", "tool", keywords=len(keywords)):
+        responses = await get_serp_responses_many_async(keywords)
+    failed = isinstance(responses.get("error"), str)
+    outputs = {}
+    for index, keyword in enumerate(keywords, start=1):
+        keyword = normalize_keyword(keyword)
+        report = map_serp_response(keyword, responses if failed else responses.get(keyword, {}), client_url)
+        output = RankProfilerOutput(**report).model_dump()
+        outputs.update(await asyncio.to_thread(_save, f"keyword_{index}_ranking_data", f"rank_profiler_{keyword}", output))
+    if not failed:
+        outputs["ranking_visibility"] = visibility_report(responses, client_url)
+        outputs["ranking_changes"] = await asyncio.to_thread(record_rank_history, responses)
+    return outputs
+
+
+async def _sitemap(key: str, url: str) -> Dict[str, Any]:
+    with span("analyze_competitor_sitemap_async", "tool", url=url):
+        output = build_sitemap_output(await analyze_competitor_sitemap_async(url))
+    return await asyncio.to_thread(_save, key, sitemap_filename(url), output)
+
+
+async def _performance(url: str) -> Dict[str, Any]:
+    """The client's report plus the client-vs-competitors benchmark, from one PSI batch."""
+    with span("analyze_web_vitals_many_async", "tool", urls=len(competitor_urls) + 1):
+        batch = await analyze_web_vitals_many_async([url] + competitor_urls)
+    vitals = batch if "error" in batch else batch["results"][0]
+    await asyncio.to_thread(save_output_file, content=json.dumps(vitals), filename="performace-data")
+    outputs = {"performace_reporter_output": WebPerformanceOutput(**map_web_vitals(vitals)).model_dump()}
+    if "error" not in batch:
+        outputs["performance_benchmark"] = performance_benchmark(batch["results"], url)
+    return outputs
+
+
+def stage_error(keys: List[str], error: BaseException) -> Dict[str, Any]:
+    """Error result stored under every key of a stage that raised, so the other stages still land in state."""
+    logger.error(f"Direct stage {keys[0]} failed: {type(error).__name__}: {error}")
+    return {key: {"status": "error", "error": f"{type(error).__name__}: {error}"} for key in keys}
+
+
+async def _run_stage(keys: List[str], run) -> Dict[str, Any]:
+    try:
+        return await run()
+    except Exception as e:
+        return stage_error(keys, e)
+
+
+async def gather_data(done: Optional[Dict[str, Any]] = None) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Runs every data-gathering tool concurrently, without the LLM, and yields the
+    outputs of each stage as soon as it finishes, under the session-state keys the
+    agent pipeline uses: competitor_<N>_result / client_website_result (content, one
+    corpus-level TF-IDF over all pages),
+    keyword_<N>_ranking_data, ranking_visibility, ranking_changes (rankings),
+    competitor_<N>_sitemap_data (sitemaps), performace_reporter_output and
+    performance_benchmark (web vitals). Files are saved to the output folder under
+    the same names as in agent mode.
+
+    A stage that raises yields {"status": "error", "error": ...} under its keys; the
+    other stages are not affected. Stages whose keys are all in 'done' (outputs
+    restored from a checkpoint) are not run again; their outputs are yielded first.
+    """
+    done = done or {}
+    ranking_keys = [f"keyword_{index}_ranking_data" for index in range(1, len(keywords) + 1)]
+    stages = [(content_keys, _contents)]
+    stages.append((ranking_keys + ["ranking_visibility", "ranking_changes"], _rankings))
+    stages += [([f"competitor_{index}_sitemap_data"], lambda url=url, index=index: _sitemap(f"competitor_{index}_sitemap_data", url))
+               for index, url in enumerate(competitor_urls, start=1)]
+    stages.append((["performace_reporter_output", "performance_benchmark"], lambda: _performance(client_url)))
+
+    pending = []
+    for keys, run in stages:
+        if all(done.get(key) is not None for key in keys):
+            yield {key: done[key] for key in keys}
+        else:
+            pending.append(_run_stage(keys, run))
+    for finished in asyncio.as_completed(pending):
+        yield await finished
+
+
+class DirectDataGatheringAgent(BaseAgent):
+    """
+    Drop-in replacement for the data_gathering_squad ParallelAgent (PIPELINE_MODE=direct):
+    the tools are called from plain code (see gather_data) instead of by ~17 LLM
+    sub-agents. Each stage is emitted as an event with its state delta as soon as it
+    finishes, so the analyst finds it both in session state and in its conversation
+    context, and the checkpoint keeps it if a later stage fails.
+    In a run resumed from a checkpoint only the missing outputs are gathered.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        done = state if state.get(RESUMED_KEY) else None
+        async for outputs in gather_data(done):
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[
+                    types.Part(text=f"{key}:\n{json.dumps(value)}") for key, value in outputs.items()
+                ]),
+                actions=EventActions(state_delta=outputs)
+            )
@@ -0,0 +1,66 @@
+"""
+Resumes a pipeline run from its checkpoint instead of starting over.
+
+CheckpointPlugin (utils/checkpoint.py) writes the phase-1 stage outputs of every run,
+with their status, to output/checkpoints/<session id>.json as they land. Resuming loads that state into a
+new session and runs the pipeline again: every phase-1 stage checkpointed as a
+success is skipped (its stored output is re-emitted for the analyst's
+context), so only the failed or missing sub-agents and the stages after them run.
+
+Usage (from the project root):
+    python -m agents.root_agent.resume [--checkpoint output/checkpoints/<session id>.json]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from agents.root_agent.agent import app, analyst_agent
+from utils.checkpoint import RESUMED_KEY, load_checkpoint, restorable_state
+from utils.http_client import close_async_http_client
+
+RESUME_MESSAGE = "Resume the SEO audit pipeline from the checkpoint."
+
+
+async def resume(checkpoint: dict, user_id: str = "resume") -> str:
+    """Runs the remaining stages of a checkpointed run; returns the analyst's final response."""
+    runner = InMemoryRunner(app=app)
+    session = await runner.session_service.create_session(
+        app_name=app.name,
+        user_id=user_id,
+        session_id=checkpoint["session_id"],  # Keeps checkpointing into the same file
+        state={**restorable_state(checkpoint), RESUMED_KEY: True}
+    )
+
+    final = ""
+    async for event in runner.run_async(user_id=user_id, session_id=session.id,
+                                        new_message=types.Content(role="user", parts=[types.Part(text=RESUME_MESSAGE)])):
+        if event.author == analyst_agent.name and event.is_final_response() and event.content and event.content.parts:
+            final = "".join(part.text or "" for part in event.content.parts)
+    await runner.close()
+    await close_async_http_client()
+    return final
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: the most recent one)")
+    args = parser.parse_args()
+
+    checkpoint = load_checkpoint(args.checkpoint)
+    if checkpoint is None:
+        sys.exit("No checkpoint found.")
+    if analyst_agent.name in checkpoint["completed_agents"]:
+        print(f"Session {checkpoint['session_id']} already completed; nothing to resume.")
+        return
+
+    print(asyncio.run(resume(checkpoint)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 
@@ -5,27 +6,89 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..')))
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from utils.retry_config import get_http_retry_config
-from utils.file_loader import load_file_content
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools import ToolContext
+from utils.model_factory import gemini_model
+from utils.file_loader import load_file_content, parse_numbered_list
 from utils.file_saver import save_output_file
-from tools.web_vitals_fetcher import analyze_web_vitals
+from utils.stage_memo import StageMemo, fingerprint
+from utils.checkpoint import RESUMED_KEY
+from tools.web_vitals_fetcher import analyze_web_vitals_async, analyze_web_vitals_many_async
+from tools.performance_mapper import performance_benchmark
 from agents.web_performance.output_models import WebPerformanceOutput
 
 # Load Instructions
 instruction_text = load_file_content("agents/web_performance/instructions.txt")
 description_text = load_file_content("agents/web_performance/description.txt")
+client_url = load_file_content(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'data', 'client_url.txt'))).strip()
+competitor_urls = parse_numbered_list(load_file_content(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'data', 'competitor_url.txt'))))
+# The client's PSI result of this run, read by the stage memo
+VITALS_KEY = "temp:client_vitals"
+
+
+async def prefetch_vitals(callback_context: CallbackContext):
+    """
+    before_agent_callback: runs PageSpeed Insights for the client and every competitor
+    in one concurrent batch (capped at PSI_MAX_CONCURRENT, under the shared PSI quota),
+    so the agent's own call for the client is served from the PSI cache, and stores
+    the side-by-side scores as 'performance_benchmark'.
+    """
+    state = callback_context.state
+    if state.get(RESUMED_KEY) and state.get("performance_benchmark") is not None:
+        return None  # Restored from a checkpoint
+
+    batch = await analyze_web_vitals_many_async([client_url] + competitor_urls)
+    if "error" not in batch:
+        state[VITALS_KEY] = batch["results"][0]
+        state["performance_benchmark"] = performance_benchmark(batch["results"], client_url)
+    return None
+
+
+async def analyze_web_vitals(url: str, tool_context: ToolContext) -> dict:
+    """
+    Calls Google PageSpeed Insights to fetch Core Web Vitals and the Performance Score
+    for BOTH Mobile and Desktop strategies (concurrently).
+
+    Args:
+        url (str): The URL to analyze.
+
+    Returns:
+        dict: Combined results for mobile and desktop.
+    """
+    vitals = tool_context.state.get(VITALS_KEY)
+    if vitals is not None and vitals.get("url") == url:
+        return vitals
+    return await analyze_web_vitals_async(url)
+
+
+async def vitals_inputs(callback_context: CallbackContext):
+    """Stage memo inputs: the client's PageSpeed results (from prefetch_vitals, else the PSI cache)."""
+    vitals = callback_context.state.get(VITALS_KEY) or await analyze_web_vitals_async(client_url)
+    if "error" in vitals or any("error" in vitals[device] for device in ("mobile", "desktop")):
+        return None
+    callback_context.state[VITALS_KEY] = vitals
+    return {"url": client_url, "vitals": fingerprint(vitals)}
+
+
+def save_vitals(callback_context: CallbackContext, output: dict):
+    """Stage memo 'save': writes the raw PSI data to performace-data.json, as the agent would."""
+    vitals = callback_context.state.get(VITALS_KEY)
+    if vitals is not None:
+        save_output_file(content=json.dumps(vitals), filename="performace-data")
+
+
+memo = StageMemo("performace_reporter_output", instruction_text, vitals_inputs, save_vitals)
 
 performace_reporter_agent = LlmAgent(
     name="performace_reporter_agent",
-    model=Gemini(
-        model="gemini-2.5-flash",
-        retry_options=get_http_retry_config()
-    ),
+    model=gemini_model("gemini-2.5-flash"),
     instruction=instruction_text,
     description=description_text,
     output_key="performace_reporter_output", # The Analyst will look for this key
     output_schema=WebPerformanceOutput,  # Structured output schema for Google ADK LLM
+    # Reuses the last report while the PSI data is unchanged
+    before_agent_callback=[prefetch_vitals, memo.before],
+    after_agent_callback=memo.remember(),
     tools=[analyze_web_vitals, save_output_file]
 )
 
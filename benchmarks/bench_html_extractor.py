@@ -0,0 +1,108 @@
+"""
+Benchmark: streaming HTML extractor vs. the previous BeautifulSoup clean_text.
+
+The previous implementation (full BeautifulSoup tree with html.parser, then two
+whole-string regex passes) is reproduced below as the baseline. Pages are read
+from a directory of saved .html files, or generated when no directory is given.
+"Boilerplate removed" is the share of baseline tokens the new extractor drops.
+
+Usage (from the project root):
+    python -m benchmarks.bench_html_extractor [--pages saved_pages/] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.html_extractor import available_backends
+from tools.nlp_analyzer import clean_text
+
+
+def baseline_clean_text(html_content: str) -> str:
+    """The pre-optimization clean_text."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for script_or_style in soup(['script', 'style', 'header', 'footer', 'nav', 'meta', 'noscript']):
+        script_or_style.decompose()
+    text = soup.get_text(separator=' ')
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def synthetic_page(paragraphs: int, seed: int = 7) -> str:
+    """A heavy homepage: inline JSON/CSS, a mega-menu, cookie banner, product cards, footer."""
+    rng = random.Random(seed)
+    words = [f"word{i}" for i in range(3000)]
+
+    def sentence(n):
+        return " ".join(rng.choices(words, k=n)).capitalize() + "."
+
+    menu = "".join(f'<li class="menu-item"><a href="/c/{i}">Category {sentence(2)}</a></li>' for i in range(300))
+    cards = "".join(
+        f'<div class="card"><h3>{sentence(4)}</h3><p>{sentence(25)}</p><a href="/p/{i}">Read more</a></div>'
+        for i in range(paragraphs)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Example store</title>"
+        f"<style>{'.c{color:red}' * 2000}</style>"
+        f"<script>window.__STATE__ = {{\"items\": [{','.join(str(i) for i in range(20000))}]}};</script>"
+        "</head><body>"
+        f'<header><nav class="mega-menu"><ul>{menu}</ul></nav></header>'
+        '<div id="cookie-consent">We use cookies to improve your experience. Accept all cookies.</div>'
+        f"<main><h1>{sentence(6)}</h1>{cards}</main>"
+        f'<div class="sidebar">{sentence(40)}</div>'
+        f'<footer><ul>{menu}</ul><p>Copyright</p></footer>'
+        "</body></html>"
+    )
+
+
+def load_pages(directory):
+    if directory:
+        return [path.read_text(encoding="utf-8", errors="replace") for path in sorted(Path(directory).glob("*.htm*"))]
+    return [synthetic_page(paragraphs) for paragraphs in (20, 200, 1000)]
+
+
+def time_call(fn, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            fn(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="Directory of saved .html pages (default: synthetic pages)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        sys.exit(f"No .html files found in {args.pages}")
+    megabytes = sum(len(page.encode("utf-8")) for page in pages) / 1e6
+    print(f"{len(pages)} pages, {megabytes:.1f} MB of HTML\n")
+
+    baseline = time_call(baseline_clean_text, pages, args.repeat)
+    baseline_tokens = sum(len(baseline_clean_text(page).split()) for page in pages)
+    print(f"{'extractor':<22} {'time (s)':>9} {'MB/s':>7} {'speedup':>8} {'boilerplate removed':>20}")
+    print(f"{'bs4 (baseline)':<22} {baseline:>9.3f} {megabytes / baseline:>7.1f} {'1.0x':>8} {'-':>20}")
+
+    import tools.html_extractor as html_extractor
+    for backend in available_backends():
+        html_extractor.DEFAULT_BACKEND = backend
+        elapsed = time_call(clean_text, pages, args.repeat)
+        tokens = sum(len(clean_text(page).split()) for page in pages)
+        removed = 1 - tokens / baseline_tokens if baseline_tokens else 0.0
+        print(f"{backend:<22} {elapsed:>9.3f} {megabytes / elapsed:>7.1f} {baseline / elapsed:>7.1f}x {removed:>19.0%}")
+
+
+if __name__ == "__main__":
+    main()
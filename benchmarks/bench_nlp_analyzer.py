@@ -0,0 +1,93 @@
+"""
+Benchmark: single-pass n-gram engine vs. the previous five-vectorizer pipeline.
+
+The previous implementation (one TfidfVectorizer plus one CountVectorizer per
+n-gram size, each densified with .toarray() and fully argsorted) is reproduced
+below as the baseline, so both run on identical synthetic pages.
+
+Usage (from the project root):
+    python -m benchmarks.bench_nlp_analyzer [--words 2000 20000 100000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.nlp_analyzer import tokenize, _vectorize, _get_tfidf_scores, _get_ngram_density
+
+
+def baseline_analysis(corpus):
+    """The pre-optimization pipeline: 5 tokenizations, dense rows, full argsorts."""
+    vectorizer = TfidfVectorizer(ngram_range=(1, 3), stop_words='english', max_df=1.0, min_df=1)
+    matrix = vectorizer.fit_transform(corpus)
+    features = np.array(vectorizer.get_feature_names_out())
+    scores = matrix[0].toarray()[0]
+    tfidf = {features[i]: round(float(scores[i]), 4) for i in scores.argsort()[-50:][::-1] if scores[i] > 0}
+
+    density = {}
+    for n in [1, 2, 3, 4]:
+        vectorizer = CountVectorizer(ngram_range=(n, n), stop_words='english')
+        dtm = vectorizer.fit_transform(corpus)
+        features = np.array(vectorizer.get_feature_names_out())
+        row = dtm[0].toarray()[0]
+        total = row.sum()
+        density[f"{n}gram"] = {
+            features[i]: {"count": int(row[i]), "density": round(row[i] / total, 5)}
+            for i in row.argsort()[-50:][::-1] if row[i] > 0
+        }
+    return tfidf, density
+
+
+def single_pass_analysis(corpus):
+    matrix = _vectorize([tokenize(text) for text in corpus])
+    return _get_tfidf_scores(matrix), _get_ngram_density(matrix)
+
+
+def synthetic_page(words: int, seed: int = 7) -> str:
+    """Zipf-distributed vocabulary, roughly like real marketing copy."""
+    rng = random.Random(seed)
+    # Letters only, so both tokenizers split identically
+    vocabulary = ["term" + "".join(chr(ord("a") + int(d)) for d in str(i)) for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return " ".join(rng.choices(vocabulary, weights=weights, k=words))
+
+
+def time_call(fn, corpus, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(corpus)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[2_000, 20_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'words':>8} {'baseline (s)':>13} {'single-pass (s)':>16} {'speedup':>8}  same top terms")
+    for words in args.words:
+        corpus = [synthetic_page(words)]
+        baseline = time_call(baseline_analysis, corpus, args.repeat)
+        single = time_call(single_pass_analysis, corpus, args.repeat)
+
+        old_tfidf, old_density = baseline_analysis(corpus)
+        new_tfidf, new_density = single_pass_analysis(corpus)
+        # Compare scores, not order: ties may be broken differently
+        same = (sorted(old_tfidf.values()) == sorted(new_tfidf.values()) and
+                all(sorted(v["count"] for v in old_density[k].values()) ==
+                    sorted(v["count"] for v in new_density[k].values()) for k in old_density))
+
+        print(f"{words:>8} {baseline:>13.3f} {single:>16.3f} {baseline / single:>7.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
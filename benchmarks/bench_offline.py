@@ -0,0 +1,222 @@
+"""
+Benchmark: end-to-end latency and throughput of the data-gathering tools, offline.
+
+Every tool runs against benchmarks/standin_server.py instead of the live sites,
+SerpApi and PageSpeed Insights, with the on-disk caches in a scratch directory.
+Each scenario is measured three ways:
+    cold        sequential calls on fresh URLs / keywords (nothing cached)
+    warm        sequential calls on one URL / keyword that is already cached
+                (304 Not Modified for pages and sitemaps, a cache hit for PSI and SerpApi)
+    throughput  cold calls from --concurrency threads at once (calls per second)
+
+Results are appended to benchmarks/results/offline.jsonl (with the commit, the
+settings and the date) and compared with the last earlier record that used the
+same settings, so regressions show up as deltas.
+
+Usage (from the project root):
+    python -m benchmarks.bench_offline [--requests 20] [--concurrency 8] [--latency-ms 0]
+                                       [--only sitemap content psi serp] [--no-record]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.standin_server import StandinServer
+
+RESULTS_FILE = Path(__file__).parent / "results" / "offline.jsonl"
+
+# (name, group, tool, stand-in site: urls, layout, page KB)
+SITE_SCENARIOS = (
+    ("crawl_competitor_sitemaps 100 urls", "sitemap", "crawl_competitor_sitemaps", (100, "plain", 50)),
+    ("crawl_competitor_sitemaps 5k urls", "sitemap", "crawl_competitor_sitemaps", (5_000, "plain", 50)),
+    ("crawl_competitor_sitemaps 50k urls", "sitemap", "crawl_competitor_sitemaps", (50_000, "plain", 50)),
+    ("crawl_competitor_sitemaps 50k gzip", "sitemap", "crawl_competitor_sitemaps", (50_000, "gzip", 50)),
+    ("analyze_competitor_sitemap 50k index", "sitemap", "analyze_competitor_sitemap", (50_000, "index", 50)),
+    ("analyze_content 20 KB", "content", "analyze_content", (100, "plain", 20)),
+    ("analyze_content 200 KB", "content", "analyze_content", (100, "plain", 200)),
+    ("analyze_content 1 MB", "content", "analyze_content", (100, "plain", 1024)),
+)
+
+
+def load_tools(server: StandinServer, cache_dir: str):
+    """
+    Points the tools at the stand-in and the caches at 'cache_dir', then imports them
+    (endpoints and cache locations are read from the environment at import time).
+    """
+    os.environ.update(server.env())
+    os.environ["CACHE_DIR"] = cache_dir
+    # The real quotas would throttle the benchmark, not the code under test
+    os.environ["SERPAPI_RATE_LIMIT_CALLS"] = "1000000"
+    os.environ["PSI_RATE_LIMIT_CALLS"] = "1000000"
+
+    from tools.nlp_analyzer import analyze_content
+    from tools.ranking_monitor import get_indian_organic_results
+    from tools.sitemap_fetcher import analyze_competitor_sitemap, crawl_competitor_sitemaps
+    from tools.web_vitals_fetcher import analyze_web_vitals
+    from tools import ranking_monitor, web_vitals_fetcher
+    if not web_vitals_fetcher.ENDPOINT.startswith(server.base_url) or ranking_monitor.SERPAPI_BASE_URL != server.base_url:
+        sys.exit("The tools were imported before load_tools(); they would call the live APIs.")
+    logging.getLogger().setLevel(logging.WARNING)
+    return {
+        "crawl_competitor_sitemaps": crawl_competitor_sitemaps,
+        "analyze_competitor_sitemap": analyze_competitor_sitemap,
+        "analyze_content": analyze_content,
+        "analyze_web_vitals": analyze_web_vitals,
+        "get_indian_organic_results": get_indian_organic_results,
+    }
+
+
+def check(result):
+    """Fails the benchmark on error results instead of timing error paths."""
+    text = result if isinstance(result, str) else json.dumps(result)
+    if text.startswith("Error") or '"error"' in text[:2000] or '"status": "error"' in text[:2000]:
+        raise RuntimeError(f"tool returned an error: {text[:200]}")
+    return result
+
+
+def latencies(fn, args):
+    timings = []
+    for arg in args:
+        start = time.perf_counter()
+        check(fn(arg))
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def throughput(fn, args, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for result in executor.map(fn, args):
+            check(result)
+    return len(args) / (time.perf_counter() - start)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+
+
+def run_scenario(fn, fresh_args, warm_arg, requests, concurrency):
+    """Cold / warm latencies (ms) and throughput (calls/s); 'fresh_args(n, phase)' yields uncached arguments."""
+    check(fn(warm_arg))  # Also has the stand-in generate (and memoize) this scenario's payloads
+    cold = latencies(fn, fresh_args(requests, "cold"))
+    warm = latencies(fn, [warm_arg] * requests)
+    return {
+        "cold_p50_ms": round(statistics.median(cold) * 1000, 2),
+        "cold_p95_ms": round(percentile(cold, 95) * 1000, 2),
+        "warm_p50_ms": round(statistics.median(warm) * 1000, 2),
+        "throughput_per_s": round(throughput(fn, fresh_args(requests, "load"), concurrency), 2),
+    }
+
+
+def scenarios(server, tools, only):
+    """(name, fn, fresh_args, warm_arg) for every selected scenario."""
+    for name, group, tool, (urls, layout, page_kb) in SITE_SCENARIOS:
+        if group in only:
+            yield (name, tools[tool],
+                   lambda n, phase, site=(urls, layout, page_kb): [server.site_url(*site, tag=f"{phase}{i}") for i in range(n)],
+                   server.site_url(urls, layout, page_kb, tag="warm"))
+    if "psi" in only:
+        yield ("analyze_web_vitals", tools["analyze_web_vitals"],
+               lambda n, phase: [f"https://www.client.example/{phase}/{i}" for i in range(n)],
+               "https://www.client.example/warm")
+    if "serp" in only:
+        yield ("get_indian_organic_results", tools["get_indian_organic_results"],
+               lambda n, phase: [f"ai writing tool {phase} {i}" for i in range(n)],
+               "ai writing tool warm")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_record(path, settings):
+    """The last recorded run with the same settings, or None."""
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    matching = [record for record in records if record.get("settings") == settings]
+    return matching[-1] if matching else None
+
+
+def delta(current, previous, lower_is_better=True):
+    if not previous:
+        return ""
+    change = (current - previous) / previous * 100
+    better = change < 0 if lower_is_better else change > 0
+    return f" ({change:+.0f}%{'' if abs(change) < 10 else ' better' if better else ' WORSE'})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Calls per measurement")
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads for the throughput run")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay the stand-in adds to every response")
+    parser.add_argument("--only", nargs="+", choices=("sitemap", "content", "psi", "serp"),
+                        default=["sitemap", "content", "psi", "serp"])
+    parser.add_argument("--results", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--no-record", action="store_true", help="Do not append this run to the results file")
+    args = parser.parse_args()
+
+    settings = {"requests": args.requests, "concurrency": args.concurrency, "latency_ms": args.latency_ms}
+    cache_dir = tempfile.mkdtemp(prefix="bench_offline_")
+    results = {}
+    try:
+        with StandinServer(latency=args.latency_ms / 1000) as server:
+            tools = load_tools(server, cache_dir)
+            previous = previous_record(args.results, settings)
+            baseline = (previous or {}).get("results", {})
+            if previous:
+                print(f"comparing with {previous['commit']} ({previous['recorded_at']})\n")
+
+            print(f"{'scenario':<38} {'cold p50 ms':>18} {'cold p95 ms':>12} {'warm p50 ms':>18} {'calls/s':>18}")
+            for name, fn, fresh_args, warm_arg in scenarios(server, tools, args.only):
+                result = run_scenario(fn, fresh_args, warm_arg, args.requests, args.concurrency)
+                results[name] = result
+                before = baseline.get(name, {})
+                print(f"{name:<38} "
+                      f"{result['cold_p50_ms']:>9.1f}{delta(result['cold_p50_ms'], before.get('cold_p50_ms')):<9} "
+                      f"{result['cold_p95_ms']:>12.1f} "
+                      f"{result['warm_p50_ms']:>9.1f}{delta(result['warm_p50_ms'], before.get('warm_p50_ms')):<9} "
+                      f"{result['throughput_per_s']:>9.1f}"
+                      f"{delta(result['throughput_per_s'], before.get('throughput_per_s'), lower_is_better=False):<9}")
+            stats = server.stats
+            print(f"\nstand-in served {stats['requests']} requests, {stats['bytes_sent'] / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if not args.no_record:
+        record = {
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "settings": settings,
+            "results": results,
+        }
+        args.results.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"recorded in {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: orchestration of the agent graph (master_orchestrator -> ParallelAgents
+-> LlmAgents) with Gemini replaced by recorded responses.
+
+First record a cassette with one real run:
+    LLM_CASSETTE_MODE=record adk run agents/root_agent        (or adk web)
+Every model call is appended to output/cassettes/llm.jsonl (LLM_CASSETTE). This
+benchmark then replays it (utils/llm_cassette.ReplayLlm) with the recorded or a
+fixed per-call latency, running 1..N pipelines concurrently. It reports wall time,
+model calls (matched exactly or by agent and turn), the peak number of model calls
+in flight, events per run and the size of the final session state.
+
+Tools still run for real: SerpApi and PageSpeed Insights are served by
+benchmarks/standin_server.py. Website fetches go to the configured URLs, so they
+fail fast without a network. Their error results change the conversation, and
+those model calls are then matched by agent and turn.
+
+Usage (from the project root):
+    python -m benchmarks.bench_orchestration [--cassette output/cassettes/llm.jsonl]
+        [--latency recorded|0|0.5] [--pipelines 1 4 16] [--mode agents|direct]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.standin_server import StandinServer
+
+DEFAULT_CASSETTE = Path(__file__).parent.parent / "output" / "cassettes" / "llm.jsonl"
+MESSAGE = "Run the SEO audit pipeline."
+
+
+def load_app(server: StandinServer, args, scratch: str):
+    """
+    Configures replay and imports the pipeline. The model factory reads the cassette
+    settings when the agents are built, at import time.
+    """
+    os.environ.update(server.env())
+    os.environ.update({
+        "LLM_CASSETTE_MODE": "replay",
+        "LLM_CASSETTE": str(args.cassette),
+        "LLM_REPLAY_LATENCY": args.latency,
+        "PIPELINE_MODE": args.mode,
+        "STAGE_MEMO": "0",  # Every run must reach the model
+        "CACHE_DIR": os.path.join(scratch, "cache"),
+        "CHECKPOINT_DIR": os.path.join(scratch, "checkpoints"),
+        "SERPAPI_RATE_LIMIT_CALLS": "1000000",
+        "PSI_RATE_LIMIT_CALLS": "1000000",
+    })
+
+    from agents.root_agent.agent import app
+    from utils.llm_cassette import get_cassette
+    logging.getLogger().setLevel(logging.WARNING)
+    return app, get_cassette(args.cassette, load=True)
+
+
+async def run_pipeline(runner, app, user_id: str):
+    """One full pipeline run; returns (event count, final session state)."""
+    from google.genai import types
+
+    session = await runner.session_service.create_session(app_name=app.name, user_id=user_id)
+    events = 0
+    async for _ in runner.run_async(user_id=user_id, session_id=session.id,
+                                    new_message=types.Content(role="user", parts=[types.Part(text=MESSAGE)])):
+        events += 1
+    session = await runner.session_service.get_session(app_name=app.name, user_id=user_id, session_id=session.id)
+    return events, session.state
+
+
+async def run_batch(app, cassette, pipelines: int):
+    from google.adk.runners import InMemoryRunner
+    from utils.http_client import close_async_http_client
+
+    runner = InMemoryRunner(app=app)
+    before = dict(cassette.stats)
+    cassette.stats["peak_in_flight"] = 0
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_pipeline(runner, app, f"bench-{i}") for i in range(pipelines)))
+    elapsed = time.perf_counter() - start
+    await runner.close()
+    await close_async_http_client()  # Every batch runs in its own event loop
+
+    events, state = results[0]
+    sizes = {key: len(json.dumps(value, default=str)) for key, value in state.items()}
+    return {
+        "wall_s": elapsed,
+        "model_calls": sum(cassette.stats[hit] - before[hit] for hit in ("exact_hits", "turn_hits")),
+        "turn_hits": cassette.stats["turn_hits"] - before["turn_hits"],
+        "peak_in_flight": cassette.stats["peak_in_flight"],
+        "events": events,
+        "state_bytes": sum(sizes.values()),
+        "largest_keys": sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:3],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", type=Path, default=DEFAULT_CASSETTE)
+    parser.add_argument("--latency", default="recorded", help='Seconds per model call, or "recorded"')
+    parser.add_argument("--pipelines", type=int, nargs="+", default=[1, 4, 16], help="Concurrent pipeline runs")
+    parser.add_argument("--mode", choices=("agents", "direct"), default="agents", help="PIPELINE_MODE")
+    args = parser.parse_args()
+
+    if not args.cassette.exists():
+        sys.exit(f"No cassette at {args.cassette}; record one first (LLM_CASSETTE_MODE=record).")
+
+    scratch = tempfile.mkdtemp(prefix="bench_orchestration_")
+    try:
+        with StandinServer() as server:
+            app, cassette = load_app(server, args, scratch)
+            from utils.llm_cassette import CassetteMissError
+            print(f"cassette: {args.cassette}, latency: {args.latency}, mode: {args.mode}\n")
+            print(f"{'pipelines':>9} {'wall (s)':>9} {'runs/min':>9} {'model calls':>12} {'by turn':>8} "
+                  f"{'peak in flight':>15} {'events/run':>11} {'state KB/run':>13}")
+            for pipelines in args.pipelines:
+                try:
+                    result = asyncio.run(run_batch(app, cassette, pipelines))
+                except CassetteMissError as e:
+                    sys.exit(f"{e}; the agent graph or instructions changed since recording, record again.")
+                print(f"{pipelines:>9} {result['wall_s']:>9.2f} {pipelines / result['wall_s'] * 60:>9.1f} "
+                      f"{result['model_calls']:>12} {result['turn_hits']:>8} "
+                      f"{result['peak_in_flight']:>15} {result['events']:>11} {result['state_bytes'] / 1024:>13.1f}")
+            print("\nlargest state keys (bytes): " + ", ".join(f"{key} {size}" for key, size in result["largest_keys"]))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: selective streaming parse of PageSpeed Insights responses vs. response.json().
+
+The baseline parses the whole payload (json.loads, what response.json() does) and
+then reads the handful of fields used by _extract_metrics. The streaming parser
+(tools.psi_parser with ijson) only materializes those fields while the bytes are
+fed in 64 KB chunks. The last row is the payload the API returns when the 'fields'
+mask is sent (the default), parsed the same streaming way. Peak memory is measured
+with tracemalloc and excludes the raw payload itself, which in production is never
+held in memory as a whole.
+
+Usage (from the project root):
+    python -m benchmarks.bench_psi_parse [--response saved_psi.json] [--repeat 5]
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools import psi_parser
+from tools.psi_parser import parse_chunks, select_fields, PSI_AUDITS
+from tools.web_vitals_fetcher import _extract_metrics
+
+CHUNK_SIZE = 64 * 1024
+
+
+def synthetic_response(audits: int = 160, screenshot_kb: int = 1500, seed: int = 7) -> bytes:
+    """A PSI-shaped payload: ~160 audits with detail tables, screenshots and a CrUX block."""
+    rng = random.Random(seed)
+
+    def audit(audit_id):
+        return {
+            "id": audit_id, "title": f"Audit {audit_id}", "description": "x" * 300,
+            "score": rng.random(), "numericValue": rng.random() * 5000, "displayValue": "1.2 s",
+            "details": {"type": "table", "items": [
+                {"url": f"https://example.com/asset/{i}.js", "totalBytes": rng.randint(1, 10 ** 6),
+                 "wastedMs": rng.random() * 100} for i in range(rng.randint(5, 60))
+            ]}
+        }
+
+    names = list(PSI_AUDITS) + [f"extra-audit-{i}" for i in range(audits - len(PSI_AUDITS))]
+    metric = {"percentile": 2100, "distributions": [{"min": 0, "max": 2500, "proportion": 0.8}], "category": "FAST"}
+    data = {
+        "loadingExperience": {"metrics": {"LARGEST_CONTENTFUL_PAINT_MS": metric, "CUMULATIVE_LAYOUT_SHIFT_SCORE": metric,
+                                          "INTERACTION_TO_NEXT_PAINT": metric}, "overall_category": "AVERAGE"},
+        "originLoadingExperience": {"metrics": {"LARGEST_CONTENTFUL_PAINT_MS": metric}},
+        "lighthouseResult": {
+            "categories": {"performance": {"score": 0.73, "auditRefs": [{"id": name, "weight": 1} for name in names]}},
+            "audits": {name: audit(name) for name in names},
+            "fullPageScreenshot": {"screenshot": {"data": "data:image/jpeg;base64," +
+                                                  base64.b64encode(rng.randbytes(screenshot_kb * 1024)).decode()}},
+            "i18n": {"rendererFormattedStrings": {f"k{i}": "v" * 50 for i in range(500)}}
+        }
+    }
+    return json.dumps(data).encode("utf-8")
+
+
+def baseline_parse(payload: bytes):
+    return _extract_metrics(json.loads(payload))
+
+
+def streaming_parse(payload: bytes):
+    chunks = (payload[i:i + CHUNK_SIZE] for i in range(0, len(payload), CHUNK_SIZE))
+    return _extract_metrics(parse_chunks(chunks))
+
+
+def measure(fn, payload, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payload)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--response", help="Saved PSI JSON response (default: synthetic payload)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.response:
+        with open(args.response, "rb") as f:
+            payload = f.read()
+    else:
+        payload = synthetic_response()
+
+    if psi_parser.ijson is None:
+        sys.exit("ijson is not installed (pip install ijson); the streaming parser is unavailable.")
+
+    masked = json.dumps(select_fields(json.loads(payload))).encode("utf-8")
+    print(f"payload: {len(payload) / 1e6:.1f} MB ({len(masked) / 1e3:.1f} KB with the fields mask), "
+          f"ijson backend: {psi_parser.ijson.backend}\n")
+    print(f"{'parser':<28} {'time (ms)':>10} {'peak memory (MB)':>17}")
+    results = {}
+    runs = (("response.json()", baseline_parse, payload), ("streaming (ijson)", streaming_parse, payload),
+            ("fields mask + streaming", streaming_parse, masked))
+    for name, fn, body in runs:
+        elapsed, peak = measure(fn, body, args.repeat)
+        results[name] = fn(body)
+        print(f"{name:<28} {elapsed * 1000:>10.2f} {peak / 1e6:>17.2f}")
+
+    print(f"\nsame metrics: {len({json.dumps(result, sort_keys=True) for result in results.values()}) == 1}")
+
+
+if __name__ == "__main__":
+    main()
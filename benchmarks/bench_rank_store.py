@@ -0,0 +1,113 @@
+"""
+Benchmark: rank history queries on the SQLite store vs. globbing the dated JSON files.
+
+The baseline answers "how did keyword X move for domain Y over N days" the way the
+saved output allows: glob output/dd-mm-yyyy/rank_profiler_<keyword>.json for every
+day and parse each file. The same synthetic history (N days x K keywords x 100
+results) is recorded in utils.rank_store.RankStore and queried through its indexes.
+Everything is written to a temporary directory.
+
+Usage (from the project root):
+    python -m benchmarks.bench_rank_store [--days 90] [--keywords 20] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.domains import domain_of
+from utils.rank_store import RankStore
+
+
+def synthetic_history(days: int, keywords: int, seed: int = 7):
+    """{day: {keyword: SerpApi-like response with 100 organic results}}."""
+    rng = random.Random(seed)
+    domains = [f"site{i}.com" for i in range(300)]
+    start = date.today() - timedelta(days=days)
+    history = {}
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        history[day] = {
+            f"keyword {k}": {"organic_results": [
+                {"position": i + 1, "title": f"Result {i}", "link": f"https://www.{domain}/page-{k}"}
+                for i, domain in enumerate(rng.sample(domains, 100))
+            ]}
+            for k in range(keywords)
+        }
+    return history
+
+
+def write_json_files(history, root: Path):
+    for day, responses in history.items():
+        folder = root / date.fromisoformat(day).strftime("%d-%m-%Y")
+        folder.mkdir(parents=True, exist_ok=True)
+        for keyword, response in responses.items():
+            with open(folder / f"rank_profiler_{keyword}.json", "w", encoding="utf-8") as f:
+                json.dump(response, f)
+
+
+def baseline_history(root: Path, keyword: str, domain: str, days: int):
+    """Glob every dated folder and parse the keyword's file."""
+    points = []
+    for path in root.glob(f"*/rank_profiler_{keyword}.json"):
+        day = date.fromisoformat("-".join(reversed(path.parent.name.split("-")))).isoformat()
+        with open(path, encoding="utf-8") as f:
+            results = json.load(f)["organic_results"]
+        position = next((item["position"] for item in results if domain_of(item["link"]) == domain), None)
+        points.append({"date": day, "position": position})
+    return sorted(points, key=lambda point: point["date"])[-days:]
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--keywords", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.days, args.keywords)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "output"
+        write_json_files(history, root)
+        store = RankStore(Path(tmp) / "rank_history.sqlite3")
+        start = time.perf_counter()
+        for day, responses in history.items():
+            store.record_responses(responses, 100, day)
+        print(f"{args.days} days x {args.keywords} keywords x 100 results, "
+              f"recorded in {time.perf_counter() - start:.1f}s\n")
+
+        keyword, domain = "keyword 3", "site7.com"
+        print(f"{'query':<44} {'time (ms)':>10}")
+        glob_time, glob_result = best_of(lambda: baseline_history(root, keyword, domain, args.days), args.repeat)
+        print(f"{'history: glob + parse JSON files':<44} {glob_time * 1000:>10.2f}")
+        store_time, store_result = best_of(lambda: store.history(keyword, domain, args.days), args.repeat)
+        print(f"{'history: RankStore':<44} {store_time * 1000:>10.2f}")
+        for name, fn in (("position deltas (all pairs, last 2 runs)", store.position_deltas),
+                         ("new top-10 entrants (last 2 runs)", store.new_entrants),
+                         ("top-10 drop-offs (last 2 runs)", store.drop_offs)):
+            elapsed, rows = best_of(fn, args.repeat)
+            print(f"{name:<44} {elapsed * 1000:>10.2f}  ({len(rows)} rows)")
+
+        same = [p["position"] for p in glob_result] == [p["position"] for p in store_result]
+        print(f"\nsame history: {same}, speedup: {glob_time / store_time:.0f}x")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Local stand-in for every external service the tools call, so they can be
+benchmarked (or the whole pipeline run) without a network.
+
+It serves synthetic competitor websites, canned PageSpeed Insights reports and
+paginated SerpApi results. Everything is generated deterministically from the
+request path, so benchmarks are repeatable.
+
+    /sites/<spec>/                 Homepage, <page_kb> KB of HTML
+    /sites/<spec>/robots.txt       Advertises the sitemap
+    /sites/<spec>/sitemap.xml      urlset of <urls> URLs, or a sitemapindex ('index' layout)
+    /sites/<spec>/sitemap-<n>.xml.gz   Gzip child sitemaps of the index
+    /pagespeedonline/v5/runPagespeed   PSI report (reduced to the 'fields' mask when sent)
+    /search.json, /account.json        SerpApi search pages and account
+
+A site spec is 'u<urls>-<layout>-p<page_kb>-<tag>', e.g. 'u50000-index-p200-a1b2'.
+The layout is one of:
+    plain   the sitemap is one uncompressed urlset
+    gzip    the same, sent with Content-Encoding: gzip
+    index   a sitemap index of .xml.gz children with SITEMAP_CHILD_URLS URLs each
+The tag only makes the URL unique (a cold cache). Responses carry an ETag, so
+repeated fetches of the same URL get 304 Not Modified like a real server.
+
+Usage (from the project root):
+    python -m benchmarks.standin_server [--port 8780] [--latency-ms 0]
+then export the variables it prints before running the tools or the pipeline.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DEFAULT_PORT = 8780
+SITEMAP_CHILD_URLS = 10_000
+SITE_SPEC = re.compile(r"^u(?P<urls>\d+)-(?P<layout>plain|gzip|index)-p(?P<page_kb>\d+)-[\w.]+$")
+SECTIONS = ("blog", "products", "docs", "pricing", "customers", "guides", "news", "careers")
+SERP_DOMAINS = [f"competitor{i}.example" for i in range(40)]
+SERP_PAGES = 6  # Pages of results per keyword before SerpApi's "no results" error
+SERP_NO_RESULTS = "Google hasn't returned any results for this query."
+TODAY = date(2025, 1, 15)  # Fixed 'today' for lastmod dates, so reports are repeatable
+
+
+def _vocabulary(size: int = 3000):
+    """Zipf-weighted words, roughly like real marketing copy."""
+    words = ["term" + "".join(chr(ord("a") + int(d)) for d in str(i)) for i in range(size)]
+    return words, [1 / (rank + 1) for rank in range(size)]
+
+
+@lru_cache(maxsize=16)
+def html_page(page_kb: int, seed: int = 7) -> bytes:
+    """A page of about 'page_kb' KB: navigation, header, footer, scripts and a <main> of paragraphs."""
+    rng = random.Random(seed)
+    words, weights = _vocabulary()
+    head = ("<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\"><title>Stand-in page</title>"
+            "<script>window.dataLayer = [];</script><style>body { margin: 0 }</style></head><body>"
+            "<header><nav>" + "".join(f"<a href=\"/{section}/\">{section}</a>" for section in SECTIONS) +
+            "</nav></header><main>")
+    tail = "</main><footer><p>Copyright Stand-in</p><div class=\"cookie-banner\">We use cookies</div></footer></body></html>"
+    parts, size = [head], len(head) + len(tail)
+    while size < page_kb * 1024:
+        paragraph = f"<h2>{' '.join(rng.choices(words, weights, k=4))}</h2><p>{' '.join(rng.choices(words, weights, k=120))}</p>"
+        parts.append(paragraph)
+        size += len(paragraph)
+    parts.append(tail)
+    return "".join(parts).encode("utf-8")
+
+
+def _url_entries(start: int, count: int, urls: int) -> str:
+    entries = []
+    for i in range(start, start + count):
+        lastmod = TODAY - timedelta(days=(i * 7919) % 365)  # Spread over the past year
+        entries.append(f"<url><loc>https://www.site-{urls}.example/{SECTIONS[i % len(SECTIONS)]}/page-{i}</loc>"
+                       f"<lastmod>{lastmod.isoformat()}</lastmod></url>")
+    return "".join(entries)
+
+
+@lru_cache(maxsize=32)
+def urlset(urls: int, start: int = 0, count: Optional[int] = None) -> bytes:
+    count = urls - start if count is None else count
+    return ("<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+            "<urlset xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">"
+            f"{_url_entries(start, count, urls)}</urlset>").encode("utf-8")
+
+
+def _children(urls: int) -> int:
+    return max(1, -(-urls // SITEMAP_CHILD_URLS))
+
+
+def sitemap_index(base: str, urls: int) -> bytes:
+    entries = "".join(f"<sitemap><loc>{base}sitemap-{n}.xml.gz</loc><lastmod>{TODAY.isoformat()}</lastmod></sitemap>"
+                      for n in range(_children(urls)))
+    return ("<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+            f"<sitemapindex xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">{entries}</sitemapindex>").encode("utf-8")
+
+
+@lru_cache(maxsize=32)
+def child_sitemap(urls: int, n: int) -> bytes:
+    start = n * SITEMAP_CHILD_URLS
+    return gzip.compress(urlset(urls, start, min(SITEMAP_CHILD_URLS, urls - start)), mtime=0)
+
+
+@lru_cache(maxsize=4)
+def psi_report(screenshot_kb: int, masked: bool) -> bytes:
+    # Imported here: bench_psi_parse imports tools.web_vitals_fetcher, which must only be
+    # imported once the environment points it at the stand-in (see StandinServer.env)
+    from benchmarks.bench_psi_parse import synthetic_response
+    from tools.psi_parser import select_fields
+
+    payload = synthetic_response(screenshot_kb=screenshot_kb)
+    return json.dumps(select_fields(json.loads(payload))).encode("utf-8") if masked else payload
+
+
+def serp_page(keyword: str, start: int) -> Dict:
+    if start >= SERP_PAGES * 10:
+        return {"error": SERP_NO_RESULTS}
+    seed = sum(map(ord, keyword))
+    results = [
+        {"position": start + i + 1, "title": f"{keyword} result {start + i + 1}",
+         "link": f"https://www.{SERP_DOMAINS[(seed + start + i * 7) % len(SERP_DOMAINS)]}/{keyword.replace(' ', '-')}/{start + i}",
+         "snippet": f"Everything about {keyword}."}
+        for i in range(10)
+    ]
+    return {
+        "search_metadata": {"id": f"standin-{seed}-{start}", "status": "Success"},
+        "search_parameters": {"q": keyword, "engine": "google", "start": start},
+        "search_information": {"total_results": 1000 + seed},
+        "organic_results": results,
+        "serpapi_pagination": {"current": start // 10 + 1, "next": "next" if start < (SERP_PAGES - 1) * 10 else None}
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real services
+    # Headers and body are written separately; with Nagle's algorithm the body of a
+    # small response would wait ~40 ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        parts = urlsplit(self.path)
+        query = {name: values[0] for name, values in parse_qs(parts.query).items()}
+        with self.server.stats_lock:
+            self.server.requests += 1
+
+        if parts.path == "/search.json":
+            body = serp_page(query.get("q", ""), int(query.get("start", 0)))
+            return self._send(json.dumps(body).encode("utf-8"), "application/json")
+        if parts.path == "/account.json":
+            return self._send(json.dumps({"total_searches_left": 1_000_000}).encode("utf-8"), "application/json")
+        if parts.path == "/pagespeedonline/v5/runPagespeed":
+            return self._send(psi_report(self.server.psi_screenshot_kb, "fields" in query), "application/json")
+        if parts.path.startswith("/sites/"):
+            return self._site(parts.path)
+        self._send(b"Not Found", "text/plain", status=404)
+
+    def _site(self, path: str):
+        spec, _, resource = path[len("/sites/"):].partition("/")
+        match = SITE_SPEC.match(spec)
+        if match is None:
+            return self._send(b"Not Found", "text/plain", status=404)
+        urls, layout, page_kb = int(match["urls"]), match["layout"], int(match["page_kb"])
+        base = f"http://{self.headers.get('Host')}/sites/{spec}/"
+
+        if resource == "":
+            return self._send(html_page(page_kb), "text/html; charset=utf-8")
+        if resource == "robots.txt":
+            return self._send(f"User-agent: *\nAllow: /\nSitemap: {base}sitemap.xml\n".encode("utf-8"), "text/plain")
+        if resource == "sitemap.xml":
+            if layout == "index":
+                return self._send(sitemap_index(base, urls), "application/xml")
+            return self._send(urlset(urls), "application/xml", compress=layout == "gzip")
+        child = re.fullmatch(r"sitemap-(\d+)\.xml\.gz", resource)
+        if layout == "index" and child and int(child[1]) < _children(urls):
+            return self._send(child_sitemap(urls, int(child[1])), "application/x-gzip")
+        self._send(b"Not Found", "text/plain", status=404)
+
+    def _send(self, body: bytes, content_type: str, status: int = 200, compress: bool = False):
+        etag = f"\"{hashlib.md5(body).hexdigest()}\""
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = self.server.gzipped(body)
+            self.send_response(status)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 200:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        with self.server.stats_lock:
+            self.server.bytes_sent += len(body)
+        self.wfile.write(body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], latency: float, psi_screenshot_kb: int):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.psi_screenshot_kb = psi_screenshot_kb
+        self.stats_lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self._gzipped: Dict[str, bytes] = {}
+
+    def gzipped(self, body: bytes) -> bytes:
+        key = hashlib.md5(body).hexdigest()
+        if key not in self._gzipped:
+            self._gzipped[key] = gzip.compress(body, compresslevel=6, mtime=0)
+        return self._gzipped[key]
+
+
+class StandinServer:
+    """
+    Runs the stand-in in a background thread. Use as a context manager; 'env()'
+    returns the environment variables that point the tools at it.
+
+    Args:
+        port (int): Port on 127.0.0.1 (0 picks a free one).
+        latency (float): Delay added to every response (seconds), to mimic a remote service.
+        psi_screenshot_kb (int): Size of the screenshot in full (unmasked) PSI reports.
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.0, psi_screenshot_kb: int = 1500):
+        self._server = _Server(("127.0.0.1", port), latency, psi_screenshot_kb)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="standin-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._server.stats_lock:
+            return {"requests": self._server.requests, "bytes_sent": self._server.bytes_sent}
+
+    def site_url(self, urls: int = 1000, layout: str = "plain", page_kb: int = 50, tag: str = "0") -> str:
+        return f"{self.base_url}/sites/u{urls}-{layout}-p{page_kb}-{tag}/"
+
+    def env(self) -> Dict[str, str]:
+        return {
+            "SERPAPI_BASE_URL": self.base_url,
+            "PAGESPEED_ENDPOINT": f"{self.base_url}/pagespeedonline/v5/runPagespeed",
+            "SERPAPI_KEY": "standin",
+            "PAGESPEED_API_KEY": "standin",
+        }
+
+    def start(self) -> "StandinServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+    args = parser.parse_args()
+
+    with StandinServer(args.port, args.latency_ms / 1000) as server:
+        for name, value in server.env().items():
+            print(f"export {name}={value}")
+        print(f"# sample site: {server.site_url(urls=5000, layout='index', page_kb=100)}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from utils.checkpoint import RESUMED_KEY, CheckpointPlugin, load_checkpoint, restorable_state, restored_output
+
+
+def event(author, state_delta=None, text="done", function_response=None):
+    parts = [types.Part(text=text)]
+    if function_response is not None:
+        parts = [types.Part(function_response=types.FunctionResponse(name="tool", response=function_response))]
+    return Event(author=author, invocation_id="run", content=types.Content(role="model", parts=parts),
+                 actions=EventActions(state_delta=state_delta or {}))
+
+
+def run_plugin(plugin, *events):
+    context = SimpleNamespace(session=SimpleNamespace(id="session-1"))
+
+    async def feed():
+        for item in events:
+            await plugin.on_event_callback(invocation_context=context, event=item)
+    asyncio.run(feed())
+
+
+def test_plugin_checkpoints_stage_outputs_with_their_status(tmp_path):
+    plugin = CheckpointPlugin(tmp_path, final_agents=["analyst"])
+    run_plugin(
+        plugin,
+        event("client_agent", {"client_website_result": {"title": "Client"}, "scratch": "not a stage"}),
+        event("competitor_agent", function_response={"error": "timeout"}),
+        event("competitor_agent", {"competitor_1_result": {"title": "Rival"}}),
+        event("rank_agent", {"ranking_visibility": "Error: SerpApi quota exceeded"}),
+        event("analyst", text="Final report"),
+    )
+    checkpoint = load_checkpoint(directory=tmp_path)
+
+    assert checkpoint["session_id"] == "session-1"
+    assert "scratch" not in checkpoint["state"]
+    assert checkpoint["stages"] == {"client_website_result": "success", "competitor_1_result": "error",
+                                    "ranking_visibility": "error"}
+    assert checkpoint["completed_agents"] == ["client_agent", "competitor_agent", "rank_agent", "analyst"]
+
+
+def test_resumed_state_keeps_only_successful_stages(tmp_path):
+    plugin = CheckpointPlugin(tmp_path)
+    run_plugin(plugin,
+               event("client_agent", {"client_website_result": {"title": "Client"}}),
+               event("rank_agent", {"ranking_visibility": {"error": "quota"}}))
+    state = {**restorable_state(load_checkpoint(directory=tmp_path)), RESUMED_KEY: True}
+
+    assert set(state) == {"client_website_result", RESUMED_KEY}
+    restored = restored_output(SimpleNamespace(state=state), "client_website_result")
+    assert json.loads(restored.parts[0].text) == {"title": "Client"}
+    assert restored_output(SimpleNamespace(state=state), "ranking_visibility") is None
+    assert restored_output(SimpleNamespace(state={"client_website_result": "x"}), "client_website_result") is None
+
+
+def test_checkpoints_without_stage_statuses_fall_back_to_the_outputs():
+    checkpoint = {"state": {"competitor_1_result": "Error: blocked", "competitor_2_result": {"title": "Rival"}}}
+
+    assert restorable_state(checkpoint) == {"competitor_2_result": {"title": "Rival"}}
@@ -0,0 +1,27 @@
+import pytest
+
+from tools.html_extractor import available_backends, extract_text
+
+COPY = "Our biodata maker builds wedding profiles in minutes with beautiful templates. " * 10
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("page", [
+    f'<html><body class="home navbar-fixed"><h2>Templates</h2><p>{COPY}</p></body></html>',
+    f'<html><body><div class="site has-sidebar"><h2>Templates</h2><p>{COPY}</p></div></body></html>',
+    f'<html><body><div id="page-content menu-open"><p>{COPY}</p></div></body></html>',
+])
+def test_layout_wrapper_classes_keep_page_text(backend, page):
+    assert "Our biodata maker builds wedding profiles" in extract_text(page, backend)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_boilerplate_classes_inside_wrapper_are_dropped(backend):
+    page = (f'<html><body><div class="site has-sidebar"><div class="menu"><a href="/">Home</a> '
+            f'<a href="/pricing">Pricing</a></div><p>{COPY}</p><div class="sidebar"><p>Related posts</p></div>'
+            f'<div id="cookie-banner">We use cookies</div></div></body></html>')
+    text = extract_text(page, backend)
+    assert "Our biodata maker" in text
+    assert "Related posts" not in text
+    assert "We use cookies" not in text
+    assert "Pricing" not in text
@@ -0,0 +1,11 @@
+from tools.nlp_analyzer import _get_ngram_density, _vectorize
+
+
+def test_very_long_token_does_not_blow_up_the_vocabulary():
+    matrix = _vectorize([["x" * 20_000, "biodata", "maker", "biodata"]])
+    assert _get_ngram_density(matrix)["1gram"]["biodata"]["count"] == 2
+
+
+def test_stop_words_are_removed_before_ngrams():
+    matrix = _vectorize([["the", "biodata", "of", "the", "maker"]])
+    assert set(_get_ngram_density(matrix)["2gram"]) == {"biodata maker"}
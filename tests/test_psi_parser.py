@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+import pytest
+
+from tools.psi_parser import parse_chunks, parse_chunks_async, select_fields
+
+ijson = pytest.importorskip("ijson")
+
+RESPONSE = {
+    "id": "https://example.com/",
+    "loadingExperience": {
+        "metrics": {"LARGEST_CONTENTFUL_PAINT": {"percentile": 2100, "category": "FAST",
+                                                 "distributions": [{"min": 0, "max": 2500, "proportion": 0.81}]},
+                    "CUMULATIVE_LAYOUT_SHIFT": {"percentile": 5}},
+        "overall_category": "AVERAGE",
+        "initial_url": "https://example.com/"
+    },
+    "lighthouseResult": {
+        "categories": {"performance": {"score": 0.87, "auditRefs": [{"id": "speed-index", "weight": 10}]},
+                       "seo": {"score": 1}},
+        "audits": {
+            "largest-contentful-paint": {"numericValue": 2345.6, "displayValue": "2.3 s"},
+            "cumulative-layout-shift": {"numericValue": 0.012, "displayValue": "0.012"},
+            "total-blocking-time": {"numericValue": 0, "displayValue": "0 ms"},
+            "final-screenshot": {"details": {"data": "data:image/jpeg;base64," + "A" * 5000}},
+            "network-requests": {"details": {"items": [{"url": f"https://example.com/{i}.js"} for i in range(50)]}}
+        }
+    }
+}
+
+
+def chunks(size=37):
+    body = json.dumps(RESPONSE).encode()
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+def test_streamed_parse_matches_select_fields():
+    streamed = parse_chunks(chunks())
+
+    assert streamed == select_fields(RESPONSE)
+    assert "final-screenshot" not in streamed["lighthouseResult"]["audits"]
+    assert "seo" not in streamed["lighthouseResult"]["categories"]
+
+
+def test_async_streamed_parse_matches_select_fields():
+    async def body():
+        for chunk in chunks(size=5):
+            yield chunk
+
+    assert asyncio.run(parse_chunks_async(body())) == select_fields(RESPONSE)
+
+
+def test_missing_sections_are_left_out():
+    partial = {"lighthouseResult": {"audits": {"speed-index": {"numericValue": 1200}}}}
+
+    assert parse_chunks([json.dumps(partial).encode()]) == select_fields(partial) == partial
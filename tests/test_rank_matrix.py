@@ -0,0 +1,26 @@
+from tools.rank_matrix import build_position_matrix, position_of, visibility_report
+
+
+def serp(*links):
+    return {"organic_results": [{"link": link, "position": position} for position, link in enumerate(links, 1)]}
+
+
+def test_client_subdomains_are_scored_as_the_client():
+    responses = {
+        "seo audit": serp("https://rival.com/a", "https://blog.client.com/audit", "https://www.client.com/"),
+        "seo tools": serp("https://rival.com/b", "https://rival.com/c", "https://client.com/tools"),
+        "seo tips": serp("https://rival.com/d"),
+    }
+    report = visibility_report(responses, "https://www.client.com")
+
+    assert report["client"]["positions"] == {"seo audit": 2, "seo tools": 3, "seo tips": None}
+    assert report["client"]["keywords_ranked"] == 2
+    assert [entry["domain"] for entry in report["domains"]] == ["rival.com", "client.com"]
+
+
+def test_position_of_unknown_keyword_or_domain_is_none():
+    matrix = build_position_matrix({"seo audit": serp("https://rival.com/a", "https://client.com/")})
+
+    assert position_of(matrix, "seo audit", "client.com") == 2
+    assert position_of(matrix, "seo tips", "client.com") is None
+    assert position_of(matrix, "seo audit", "other.com") is None
@@ -0,0 +1,56 @@
+import pytest
+
+from utils.rank_store import RankStore
+
+
+def serp(*links):
+    return {"organic_results": [{"position": position, "link": link, "title": link}
+                                for position, link in enumerate(links, 1)]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RankStore(tmp_path / "ranks.sqlite3")
+    store.record_responses({
+        "biodata maker": serp("https://rival.com/a", "https://www.client.com/", "https://old.com/"),
+        "biodata format": serp("https://rival.com/f"),
+    }, depth=10, day="2026-03-01")
+    store.record_responses({
+        "biodata maker": serp("https://blog.client.com/maker", "https://new.com/", "https://rival.com/a"),
+        "biodata format": {"error": "SerpApi timeout"},
+    }, depth=10, day="2026-03-02")
+    yield store
+    store.close()
+
+
+def test_position_deltas_between_the_last_two_days(store):
+    deltas = store.position_deltas()
+
+    assert deltas == [{"keyword": "biodata maker", "domain": "rival.com", "previous_position": 1,
+                       "position": 3, "change": -2}]
+
+
+def test_domain_filter_includes_subdomains(store):
+    store.record_responses({"biodata maker": serp("https://blog.client.com/maker")}, depth=10, day="2026-03-03")
+
+    deltas = store.position_deltas(since="2026-03-02", until="2026-03-03", domain="https://client.com")
+    assert [(row["domain"], row["change"]) for row in deltas] == [("blog.client.com", 0)]
+    assert store.position_deltas(domain="lient.com") == []
+
+
+def test_new_entrants_and_drop_offs(store):
+    assert [(row["domain"], row["position"], row["previous_position"]) for row in store.new_entrants()] == [
+        ("blog.client.com", 1, None), ("new.com", 2, None)]
+    assert [(row["domain"], row["previous_position"], row["position"]) for row in store.drop_offs()] == [
+        ("client.com", 2, None), ("old.com", 3, None)]
+    # 'biodata format' was not searched on the second day: no drop-off reported for it
+    assert all(row["keyword"] == "biodata maker" for row in store.drop_offs())
+
+
+def test_history_merges_subdomains_and_marks_days_without_a_ranking(store):
+    store.record_responses({"biodata maker": serp("https://rival.com/a")}, depth=10, day="2026-03-03")
+
+    history = store.history("biodata maker", "client.com")
+    assert [(row["date"], row["position"]) for row in history] == [
+        ("2026-03-01", 2), ("2026-03-02", 1), ("2026-03-03", None)]
+    assert [row["date"] for row in store.history("biodata maker", "client.com", days=2)] == ["2026-03-02", "2026-03-03"]
@@ -0,0 +1,57 @@
+from agents.rank_profiler.output_models import RankProfilerOutput
+from tools.serp_mapper import map_serp_response
+
+
+def organic(position, link, **extra):
+    return {"position": position, "title": f"Result {position}", "link": link, **extra}
+
+
+RESPONSE = {
+    "search_metadata": {"id": "abc", "status": "Success", "total_time_taken": 1.2},
+    "search_parameters": {"engine": "google", "q": "biodata maker", "gl": "in", "hl": "en"},
+    "search_information": {"total_results": 1234000, "query_displayed": "biodata maker"},
+    "answer_box": {"title": "Biodata format", "link": "https://rival.com/format", "list": ["Name", "Age"]},
+    "organic_results": [
+        organic(1, "https://rival.com/a", rich_snippet={"top": {"detected_extensions": {"rating": 4.5},
+                                                                "extensions": ["Rating: 4.5", 12]}}),
+        organic(2, "https://www.other.in/b"),
+        organic(3, "https://rival.com/c"),
+        {"position": 4, "link": "https://untitled.com/"},
+        organic(5, "https://third.org/d"),
+    ] + [organic(position, f"https://site{position}.com/") for position in range(6, 12)] + [
+        organic(12, "https://blog.client.com/biodata"),
+    ],
+    "related_searches": [{"query": "biodata format", "link": "https://google.com/search?q=biodata+format"},
+                         {"query": "no link"}],
+}
+
+
+def test_response_maps_onto_the_output_model():
+    report = map_serp_response("biodata maker", RESPONSE, "https://www.client.com/")
+    RankProfilerOutput(**report)
+
+    assert [result["position"] for result in report["organic_results"]] == [1, 2, 3, 5, 6, 7, 8, 9, 10, 11]
+    assert report["organic_results"][0]["rich_snippet"] == {"rating": 4.5, "reviews": None,
+                                                          "extensions": ["Rating: 4.5", "12"]}
+    assert report["featured_snippet"]["snippet"] == "Name; Age"
+    assert report["total_results"] == 1234000
+    assert len(report["related_searches"]) == 1
+    assert [competitor["domain"] for competitor in report["top_3_competitors"]] == ["rival.com", "other.in", "rival.com"]
+    assert report["competitor_analysis"][0] == {"domain": "rival.com", "keywords_ranking": 1,
+                                                "top_position": 1, "average_position": 2.0}
+
+
+def test_client_subdomain_is_found_beyond_the_top_10():
+    report = map_serp_response("biodata maker", RESPONSE, "client.com")
+
+    assert report["current_client_position"] == 12
+    assert report["current_client_rank"]["domain"] == "blog.client.com"
+    assert all(entry["domain"] != "blog.client.com" for entry in report["competitor_analysis"])
+
+
+def test_error_response_maps_to_an_error_output():
+    report = map_serp_response("biodata maker", {"error": "Invalid API key."})
+    RankProfilerOutput(**report)
+
+    assert report["error"] == "Invalid API key."
+    assert report["metadata"] == {"status": "Error"}
@@ -0,0 +1,56 @@
+import gzip
+
+from tools.sitemap_fetcher import _SitemapDecoder, _merge_crawl
+from tools.sitemap_parser import SitemapStreamParser, build_sitemap_report, merge_parsed_sitemaps
+
+
+def urlset(*urls):
+    body = "".join(f"<url><loc>{url}</loc><lastmod>2026-01-0{day}</lastmod></url>" for day, url in enumerate(urls, 1))
+    return f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{body}</urlset>'.encode()
+
+
+def parse(body):
+    parser = SitemapStreamParser(collect_urls=True)
+    parser.feed(body)
+    return parser.close()
+
+
+def test_oversized_gzip_body_is_truncated_not_rejected():
+    decoder = _SitemapDecoder("https://example.com/sitemap.xml.gz", max_bytes=100)
+    decoded = decoder.decode(gzip.compress(urlset(*(f"https://example.com/{i}" for i in range(50)))))
+    assert len(decoded) == 100
+    assert decoder.truncated
+    assert decoder.decode(b"more") == b""
+
+
+def test_plain_sitemaps_without_index_are_not_reported_as_an_index():
+    children = [parse(urlset("https://example.com/a", "https://example.com/b")), parse(urlset("https://example.com/c"))]
+    merged = _merge_crawl([], children, [{"url": "https://example.com/broken.xml", "error": "404"}], top_n=5)
+    report = build_sitemap_report(merged, "https://example.com/")
+
+    assert report["metadata"]["is_sitemap_index"] is False
+    assert report["metadata"]["total_entries"] == 3
+    assert report["raw_xml_summary"].startswith("2 standard sitemaps covering 3 URLs")
+    assert "1 sitemap(s) could not be read." in report["raw_xml_summary"]
+
+
+def test_sitemaps_left_out_by_the_crawl_limit_are_reported():
+    merged = _merge_crawl([], [parse(urlset("https://example.com/a"))], [], top_n=5,
+                          skipped={"https://example.com/s2.xml", "https://example.com/s3.xml"})
+    report = build_sitemap_report(merged, "https://example.com/")
+
+    assert merged["sitemaps_skipped"] == 2
+    assert "2 more sitemap(s) were not crawled" in report["raw_xml_summary"]
+
+
+def test_merge_counts_every_section_and_keeps_the_newest_lastmod():
+    old = parse(b'<urlset><url><loc>https://example.com/blog/a</loc><lastmod>2025-01-01</lastmod></url></urlset>')
+    new = parse(b'<urlset><url><loc>https://example.com/blog/a</loc><lastmod>2026-03-01</lastmod></url></urlset>')
+    many = parse(urlset(*(f"https://example.com/s{i}/page" for i in range(12)), "https://example.com/blog/b"))
+    merged = merge_parsed_sitemaps({"root_tag": "sitemapindex", "bytes_parsed": 0, "truncated": False,
+                                    "sitemap_indexes": []}, [new, many, old], top_n=3)
+
+    assert merged["sections"]["blog"] == 2
+    assert len(merged["sections"]) == 13
+    assert {"url": "https://example.com/blog/a", "last_modified": "2026-03-01"} in merged["urls"]
+    assert [entry["last_modified"] for entry in merged["recent"] if entry["url"].endswith("/blog/a")] == ["2026-03-01"]
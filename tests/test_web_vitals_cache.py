@@ -0,0 +1,63 @@
+import threading
+import time
+
+from tools import web_vitals_fetcher as vitals
+from tools.web_vitals_fetcher import PSI_FIELD_TTL, PSI_LAB_TTL, PSI_STALE_TTL, _cache_state
+from utils.json_cache import JsonCache
+
+FIELD = {"LCP_ms": {"value": 2100, "rating": "GOOD"}, "overall_rating": "FAST"}
+
+
+def entry(fetched_at, field_fetched_at=None, real_user_data="Not enough traffic data"):
+    return {"fetched_at": fetched_at, "field_fetched_at": field_fetched_at or fetched_at,
+            "data": {"lab_data": {}, "real_user_data": real_user_data}}
+
+
+def test_lab_only_results_follow_the_lab_ttl_then_the_stale_window():
+    assert _cache_state(entry(0), PSI_LAB_TTL) == "fresh"
+    assert _cache_state(entry(0), PSI_LAB_TTL + 1) == "stale"
+    assert _cache_state(entry(0), PSI_LAB_TTL + PSI_STALE_TTL + 1) == "expired"
+
+
+def test_field_data_expires_on_its_own_timer():
+    now = 10 * PSI_FIELD_TTL
+    # Lab data just refetched, but the kept CrUX block is past PSI_FIELD_TTL
+    assert _cache_state(entry(now, now - PSI_FIELD_TTL - 1, FIELD), now) == "stale"
+    assert _cache_state(entry(now, now - PSI_FIELD_TTL + 1, FIELD), now) == "fresh"
+    # Without field data only the lab timer counts
+    assert _cache_state(entry(now, now - PSI_FIELD_TTL - 1), now) == "fresh"
+
+
+def test_store_keeps_the_cached_field_block_when_the_new_response_has_none(tmp_path, monkeypatch):
+    monkeypatch.setattr(vitals, "_psi_cache", JsonCache("pagespeed", tmp_path))
+    vitals._store("https://example.com/", "mobile", {"lab_data": {"v": 1}, "real_user_data": FIELD})
+    stored = vitals._store("https://example.com/", "mobile", {"lab_data": {"v": 2}, "real_user_data": "Not enough traffic data"})
+
+    assert stored == {"lab_data": {"v": 2}, "real_user_data": FIELD}
+    assert vitals._store("https://example.com/", "mobile", {"error": "API Error 500"}) == {"error": "API Error 500"}
+    assert vitals._psi_cache.get(vitals._cache_key("https://example.com/", "mobile"))["data"]["lab_data"] == {"v": 2}
+
+
+def test_stale_result_is_served_while_it_is_refreshed_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(vitals, "_psi_cache", JsonCache("pagespeed", tmp_path))
+    key = vitals._cache_key("https://example.com/", "mobile")
+    vitals._psi_cache.set(key, entry(time.time() - PSI_LAB_TTL - 60))
+    refreshed = threading.Event()
+
+    def fetch(url, strategy, api_key):
+        refreshed.set()
+        return {"lab_data": {"v": "new"}, "real_user_data": "Not enough traffic data"}
+
+    monkeypatch.setattr(vitals, "_fetch_pagespeed_data", fetch)
+    served = vitals._get_pagespeed_data("https://example.com/", "mobile", "key")
+
+    assert served["lab_data"] == {}
+    assert refreshed.wait(5)
+    # The refresh releases its claim once the new result is stored
+    for _ in range(100):
+        if vitals._claim_refresh("https://example.com/", "mobile"):
+            break
+        time.sleep(0.01)
+    vitals._release_refresh("https://example.com/", "mobile")
+    state, data = vitals._cached("https://example.com/", "mobile", False)
+    assert (state, data["lab_data"]) == ("fresh", {"v": "new"})
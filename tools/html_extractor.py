@@ -0,0 +1,283 @@
+import logging
+import os
+import re
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from lxml import etree
+except ImportError:  # Optional C backend: pip install "kaggle-capstone-project[fast]"
+    etree = None
+
+logger = logging.getLogger(__name__)
+
+# Subtrees that never contain page copy
+SKIP_TAGS = frozenset({
+    'script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe', 'object',
+    'meta', 'link', 'header', 'footer', 'nav', 'aside', 'form', 'button', 'select'
+})
+# Elements that start a new text block
+BLOCK_TAGS = frozenset({
+    'title', 'body', 'main', 'article', 'section', 'div', 'p', 'li', 'ul', 'ol', 'dl', 'dt', 'dd',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table', 'tr', 'td', 'th', 'blockquote', 'pre',
+    'figure', 'figcaption', 'address', 'br', 'hr'
+})
+VOID_TAGS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param',
+    'source', 'track', 'wbr'
+})
+MAIN_TAGS = frozenset({'main', 'article'})
+# Page wrappers: their class/id often names a layout ("home navbar-fixed", "has-sidebar")
+STRUCTURAL_TAGS = frozenset({'html', 'head', 'body', 'main', 'article'})
+BOILERPLATE_ROLES = frozenset({'navigation', 'banner', 'contentinfo', 'complementary', 'search', 'dialog'})
+BOILERPLATE_PATTERN = re.compile(
+    r"(?:^|[\s_-])(nav|navbar|menu|breadcrumbs?|footer|sidebar|cookies?|consent|social|share|"
+    r"newsletter|popup|modal|advert|ads)(?:$|[\s_-])", re.IGNORECASE
+)
+
+MIN_MAIN_WORDS = 50        # A <main>/<article> with less text than this is ignored
+WRAPPER_SHARE = 0.5        # A nav/footer/sidebar-classed element holding more of the page text is a wrapper
+MAX_LINK_DENSITY = 0.5     # Blocks whose text is mostly link text ...
+MIN_LINK_BLOCK_WORDS = 8   # ... and shorter than this are treated as navigation
+
+
+class _ContentCollector:
+    """
+    Receives parser events (start / end / data) and groups the visible text into
+    blocks, recording for each block how much of it is link text and whether it
+    sits inside <main>/<article>. No document tree is built.
+
+    Semantic boilerplate (nav, footer, role="navigation", ...) is skipped as it is
+    parsed. An element that only looks like boilerplate by its class or id is decided
+    once the whole page is parsed: its blocks are dropped unless it contains main
+    content (<main>, <article>, <h1>) or more than WRAPPER_SHARE of the page text, so
+    layout wrappers such as <div class="site has-sidebar"> keep the page text.
+    """
+
+    def __init__(self):
+        self._stack: List[tuple] = []  # (tag, skipped, main, link, suspect)
+        self._suspects: List[list] = []  # [first block index, contains main content] per open suspect element
+        self._suspect_ranges: List[tuple] = []  # (first block, end block, contains main content)
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._link_depth = 0
+        self._parts: List[str] = []
+        self._link_chars = 0
+        self._in_main = False
+        self._in_title = False
+        self.title = ""
+        self.blocks: List[tuple] = []  # (text, link density, inside main content)
+
+    def start(self, tag: str, attrs: Dict[str, Any]) -> None:
+        tag = tag.lower()
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in VOID_TAGS:
+            return
+
+        skipped = (self._skip_depth > 0 or tag in SKIP_TAGS or
+                   attrs.get('role') in BOILERPLATE_ROLES or attrs.get('aria-hidden') == 'true')
+        main = tag in MAIN_TAGS or attrs.get('role') == 'main'
+        link = tag == 'a'
+        suspect = None
+        if not skipped and tag not in STRUCTURAL_TAGS and \
+                BOILERPLATE_PATTERN.search(f"{attrs.get('class') or ''} {attrs.get('id') or ''}"):
+            self._flush()
+            suspect = [len(self.blocks), False]
+            self._suspects.append(suspect)
+        if main or tag == 'h1':
+            for entry in self._suspects:
+                entry[1] = True
+
+        self._stack.append((tag, skipped, main, link, suspect))
+        self._skip_depth += skipped
+        self._main_depth += main
+        self._link_depth += link
+        self._in_title = self._in_title or tag == 'title'
+
+    def end(self, tag: str) -> None:
+        tag = tag.lower()
+        if tag in VOID_TAGS or not any(entry[0] == tag for entry in self._stack):
+            return
+
+        # Pops implicitly closed elements too (e.g. an unclosed <p> or <li>)
+        while self._stack:
+            open_tag, skipped, main, link, suspect = self._stack.pop()
+            if open_tag in BLOCK_TAGS or suspect:
+                self._flush()
+            if suspect:
+                self._close_suspect(suspect)
+            self._skip_depth -= skipped
+            self._main_depth -= main
+            self._link_depth -= link
+            if open_tag == 'title':
+                self._in_title = False
+            if open_tag == tag:
+                break
+
+    def data(self, text: str) -> None:
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title += text
+            return
+        self._parts.append(text)
+        if self._link_depth:
+            self._link_chars += len(text.strip())
+        if self._main_depth and text.strip():
+            self._in_main = True
+
+    def _close_suspect(self, suspect: list) -> None:
+        self._suspects.remove(suspect)
+        self._suspect_ranges.append((suspect[0], len(self.blocks), suspect[1]))
+
+    def _boilerplate_blocks(self) -> set:
+        """Indexes of the blocks inside class/id-suspect elements that are not page wrappers."""
+        words = [len(text.split()) for text, _, _ in self.blocks]
+        total = sum(words)
+        dropped = set()
+        for start, end, contains_main in self._suspect_ranges:
+            if not contains_main and sum(words[start:end]) <= WRAPPER_SHARE * total:
+                dropped.update(range(start, end))
+        return dropped
+
+    def close(self) -> None:
+        self._flush()
+        # Unclosed suspect elements (truncated markup) are decided like closed ones
+        for suspect in reversed(list(self._suspects)):
+            self._close_suspect(suspect)
+
+    def _flush(self) -> None:
+        text = " ".join("".join(self._parts).split())
+        if text:
+            self.blocks.append((text, min(self._link_chars / len(text), 1.0), self._in_main))
+        self._parts = []
+        self._link_chars = 0
+        self._in_main = False
+
+    def text(self, main_content: bool = True) -> str:
+        """Joins the collected blocks, optionally keeping only the main content."""
+        dropped = self._boilerplate_blocks()
+        blocks = [block for index, block in enumerate(self.blocks) if index not in dropped]
+        if main_content:
+            main_blocks = [block for block in blocks if block[2]]
+            if sum(len(text.split()) for text, _, _ in main_blocks) >= MIN_MAIN_WORDS:
+                blocks = main_blocks
+            blocks = [
+                block for block in blocks
+                if block[1] <= MAX_LINK_DENSITY or len(block[0].split()) >= MIN_LINK_BLOCK_WORDS
+            ]
+
+        title = " ".join(self.title.split())
+        return " ".join(([title] if title else []) + [text for text, _, _ in blocks])
+
+
+class _StdlibDriver(HTMLParser):
+    """Pure-Python fallback: html.parser events forwarded to the collector."""
+
+    def __init__(self, collector: _ContentCollector):
+        super().__init__(convert_charrefs=True)
+        self._collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self._collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self._collector.start(tag, dict(attrs))
+        self._collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self._collector.end(tag)
+
+    def handle_data(self, data):
+        self._collector.data(data)
+
+
+class _LxmlTarget:
+    """lxml parser-target interface: libxml2 parses in C and calls back per event."""
+
+    def __init__(self, collector: _ContentCollector):
+        self._collector = collector
+
+    def start(self, tag, attrib):
+        self._collector.start(tag, dict(attrib))
+
+    def end(self, tag):
+        self._collector.end(tag)
+
+    def data(self, data):
+        self._collector.data(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return None
+
+
+def _lxml_parser(collector: _ContentCollector):
+    return etree.HTMLParser(target=_LxmlTarget(collector), remove_comments=True, no_network=True)
+
+
+# Backend name -> factory(collector) returning an object with feed(str) and close()
+BACKENDS: Dict[str, Callable[[_ContentCollector], Any]] = {"html.parser": _StdlibDriver}
+if etree is not None:
+    BACKENDS["lxml"] = _lxml_parser
+
+DEFAULT_BACKEND = os.getenv("HTML_EXTRACTOR_BACKEND") or ("lxml" if "lxml" in BACKENDS else "html.parser")
+
+
+def register_backend(name: str, factory: Callable[[_ContentCollector], Any]) -> None:
+    """
+    Registers an extraction backend. 'factory' receives the collector and returns a
+    parser exposing feed(str) and close() that calls collector.start(tag, attrs),
+    collector.end(tag) and collector.data(text).
+    """
+    BACKENDS[name] = factory
+
+
+def available_backends() -> List[str]:
+    return list(BACKENDS)
+
+
+class HtmlTextExtractor:
+    """
+    Incremental HTML-to-text extractor. Feed it HTML chunks as they arrive and call
+    close() to get the visible text, with scripts, navigation, headers/footers,
+    cookie banners and link-heavy menus stripped. When the page marks its main
+    content (<main>, <article>, role="main"), only that content is kept.
+    """
+
+    def __init__(self, backend: Optional[str] = None, main_content: bool = True):
+        backend = backend or DEFAULT_BACKEND
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown HTML extractor backend '{backend}'; available: {available_backends()}")
+        self.backend = backend
+        self.main_content = main_content
+        self._collector = _ContentCollector()
+        self._parser = BACKENDS[backend](self._collector)
+        self._fed = False
+
+    def feed(self, chunk: str) -> None:
+        """Feeds the next chunk of HTML into the parser."""
+        if chunk:
+            self._fed = True
+            self._parser.feed(chunk)
+
+    def close(self) -> str:
+        """Flushes the parser and returns the extracted text."""
+        if self._fed:
+            try:
+                self._parser.close()
+            except Exception as e:
+                # Malformed markup: keep whatever was extracted before the error
+                logger.debug("HTML parser (%s) failed to close cleanly: %s", self.backend, e)
+        self._collector.close()
+        return self._collector.text(self.main_content)
+
+
+def extract_text(html_content: str, backend: Optional[str] = None, main_content: bool = True) -> str:
+    """Returns the visible (main-content) text of an HTML document as one string."""
+    extractor = HtmlTextExtractor(backend, main_content)
+    extractor.feed(html_content)
+    return extractor.close()
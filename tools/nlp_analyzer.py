@@ -1,85 +1,279 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+import unicodedata
+from sklearn.feature_extraction.text import TfidfTransformer
+from scipy import sparse
 import numpy as np
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, FrozenSet, List, Tuple
 
-def clean_text(html_content: str) -> str:
+from tools.html_extractor import extract_text
+from utils.http_cache import get_http_cache
+from utils.process_pool import run_cpu_bound, run_cpu_bound_sync, map_cpu_bound
+
+STOP_WORDS_DIR = Path(__file__).parent.parent / "config" / "stopwords"
+# Stop-word lists applied to every page (files in config/stopwords/<language>.txt)
+STOP_WORD_LANGUAGES = tuple(lang.strip() for lang in os.getenv("NLP_STOP_WORD_LANGUAGES", "en,hi,mr").split(",") if lang.strip())
+
+
+def _build_token_pattern() -> "re.Pattern":
+    """
+    Compiles the tokenizer: runs of letters in any script, at least 2 code points long.
+    Python's \\w does not match combining marks (Unicode Mn/Mc/Me), which Indic scripts
+    use for vowel signs and viramas ("मराठी" would split into fragments), so they
+    are added explicitly, together with the zero-width (non-)joiners.
+    Built once at import time; planes 0-2 cover every script in use.
+    """
+    marks = [c for c in range(0x30000) if unicodedata.category(chr(c)) in ("Mn", "Mc", "Me")]
+    ranges, start = [], marks[0]
+    for prev, cur in zip(marks, marks[1:] + [None]):
+        if cur != prev + 1:
+            ranges.append(re.escape(chr(start)) + (f"-{re.escape(chr(prev))}" if prev != start else ""))
+            start = cur
+    mark_class = "".join(ranges) + "\u200c\u200d"
+    # [^\W\d_] = any letter; digits, punctuation and symbols end a token
+    return re.compile(rf"[^\W\d_](?:[^\W\d_]|[{mark_class}])+")
+
+
+TOKEN_PATTERN = _build_token_pattern()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase word tokens in a single pass of the precompiled
+    TOKEN_PATTERN. Handles any Unicode script (Latin, Devanagari, ...).
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+@lru_cache(maxsize=None)
+def load_stop_words(language: str) -> FrozenSet[str]:
     """
-    Parses HTML, removes tags, scripts, styles, and special characters.
-    Returns clean, lowercase plain text.
+    Loads config/stopwords/<language>.txt once (cached for the process lifetime).
+    Returns an empty set for a language without a list.
     """
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        with open(STOP_WORDS_DIR / f"{language}.txt", "r", encoding="utf-8") as f:
+            return frozenset(line.strip().lower() for line in f if line.strip() and not line.startswith("#"))
+    except FileNotFoundError:
+        return frozenset()
 
-        # 1. Remove script and style elements and structural/meta elements
-        for script_or_style in soup(['script', 'style', 'header', 'footer', 'nav', 'meta', 'noscript']):
-            script_or_style.decompose()
 
-        # 2. Get text with separator to avoid merging words
-        text = soup.get_text(separator=' ')
+@lru_cache(maxsize=None)
+def _stop_words(languages: Tuple[str, ...] = STOP_WORD_LANGUAGES) -> FrozenSet[str]:
+    """Union of the stop words of 'languages', as removed by _vectorize."""
+    return frozenset().union(*(load_stop_words(lang) for lang in languages))
 
-        # 3. Regex cleaning: Keep only letters and spaces (remove numbers/punctuation)
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
 
-        # 4. Collapse multiple spaces and convert to lower case
-        text = re.sub(r'\s+', ' ', text).strip().lower()
+def _build_vocabulary(tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Internal helper: returns (sorted vocabulary as an object array, vocabulary index of
+    every token), like np.unique(..., return_inverse=True). Built with a dict: a
+    fixed-width numpy string array would size every token like the longest one, so
+    a single 20k-character "word" would need gigabytes.
+    """
+    first_seen: Dict[str, int] = {}
+    ids = np.fromiter((first_seen.setdefault(token, len(first_seen)) for token in tokens),
+                      dtype=np.int64, count=len(tokens))
+    words = list(first_seen)
+    order = sorted(range(len(words)), key=words.__getitem__)
+    rank = np.empty(len(words), dtype=np.int64)
+    rank[order] = np.arange(len(words), dtype=np.int64)
+    return np.array([words[i] for i in order], dtype=object), rank[ids]
 
-        return text
+
+def page_tokens(html_content: str) -> List[str]:
+    """
+    Extracts the main-content text from HTML and tokenizes it; the token list is
+    what the TF-IDF and n-gram stages consume. Returns [] on failure.
+    """
+    try:
+        return tokenize(extract_text(html_content))
     except Exception as e:
         # Simplified error handling without logger
-        # print(f"Error cleaning HTML: {e}") 
-        return ""
+        # print(f"Error cleaning HTML: {e}")
+        return []
+
+
+def clean_text(html_content: str) -> str:
+    """
+    Extracts the main-content text from HTML (scripts, navigation, headers/footers and
+    other boilerplate removed) and strips numbers and punctuation.
+    Returns clean, lowercase plain text (space-separated tokens).
+    """
+    return " ".join(page_tokens(html_content))
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
 
 def fetch_content(url: str) -> str or None:
     """
     Fetches the homepage content with a timeout and user-agent.
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
     try:
         # Ensure URL schema
         if not url.startswith('http'):
             url = 'https://' + url
             
         # print(f"Crawling: {url}")
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        return response.text
+        # Conditional GET: unchanged pages are served from the disk cache
+        response = get_http_cache().open(url, headers=HEADERS, timeout=10)
+        return response.text()
     except Exception as e:
         # Simplified error handling without logger
         # print(f"Failed to fetch {url}: {e}")
         return None
 
-def _get_tfidf_scores(corpus: List[str]) -> Dict[str, float]:
+async def fetch_content_async(url: str) -> str or None:
+    """
+    Async variant of fetch_content, built on the shared async HTTP client.
+    """
+    try:
+        if not url.startswith('http'):
+            url = 'https://' + url
+
+        response = await get_http_cache().open_async(url, headers=HEADERS, timeout=10)
+        return await response.atext()
+    except Exception as e:
+        return None
+
+TOP_N = 50
+MAX_NGRAM = 4      # n-gram density is reported for 1- to 4-grams
+MAX_TFIDF_NGRAM = 3  # TF-IDF covers 1- to 3-word phrases
+
+class TermMatrix:
+    """
+    Sparse document x n-gram count matrix produced by a single tokenization pass.
+
+    Columns are grouped by n-gram length (all 1-grams, then 2-grams, ...). Each
+    n-gram is stored as an integer key over the token vocabulary, so term strings
+    are only built for the columns that are actually reported (feature_name()).
+    """
+
+    def __init__(self, counts: sparse.csr_matrix, vocabulary: np.ndarray, ngram_keys: List[np.ndarray]):
+        self.counts = counts
+        self.vocabulary = vocabulary
+        self.ngram_keys = ngram_keys
+        self.offsets = np.cumsum([0] + [len(keys) for keys in ngram_keys])
+        self.ngram_lengths = np.repeat(np.arange(1, len(ngram_keys) + 1), np.diff(self.offsets))
+
+    def feature_name(self, column: int) -> str:
+        """Decodes one column back into its n-gram string."""
+        n = int(np.searchsorted(self.offsets, column, side='right'))
+        key = self.ngram_keys[n - 1][column - self.offsets[n - 1]]
+        if np.ndim(key):
+            token_ids = key.tolist()
+        else:
+            token_ids = []
+            key = int(key)
+            size = len(self.vocabulary)
+            for _ in range(n):
+                key, token_id = divmod(key, size)
+                token_ids.append(token_id)
+            token_ids.reverse()
+        return " ".join(self.vocabulary[token_ids].tolist())
+
+    def feature_names(self) -> np.ndarray:
+        """Decodes every column (expensive for large vocabularies; prefer feature_name())."""
+        return np.array([self.feature_name(column) for column in range(self.offsets[-1])], dtype=object)
+
+
+def _encode_ngrams(token_ids: np.ndarray, doc_ids: np.ndarray, n: int, vocabulary_size: int):
+    """
+    Internal helper: returns (doc id, key) for every n-gram that does not cross a
+    document boundary. Keys are base-vocabulary integers when they fit in int64,
+    otherwise rows of n token ids.
+    """
+    starts = np.flatnonzero(doc_ids[:len(doc_ids) - n + 1] == doc_ids[n - 1:]) if len(doc_ids) >= n else np.array([], dtype=np.int64)
+    windows = [token_ids[starts + offset] for offset in range(n)]
+
+    if vocabulary_size ** n < 2 ** 63:
+        keys = np.zeros(len(starts), dtype=np.int64)
+        for window in windows:
+            keys = keys * vocabulary_size + window
+    else:
+        keys = np.stack(windows, axis=1)
+    return doc_ids[starts], keys
+
+
+def _vectorize(corpus: List[List[str]], max_n: int = MAX_NGRAM) -> TermMatrix:
+    """
+    Internal helper: counts every 1- to max_n-gram of the already tokenized documents
+    (see tokenize()) with vectorized integer operations (no per-n-gram Python strings).
+    Stop words are removed before n-grams are formed, like CountVectorizer.
+    Raises ValueError for an empty vocabulary.
+    """
+    tokens, doc_ids = [], []
+    for doc_id, doc_tokens in enumerate(corpus):
+        tokens.extend(doc_tokens)
+        doc_ids.extend([doc_id] * len(doc_tokens))
+
+    vocabulary, token_ids = _build_vocabulary(tokens)
+    stop_words = _stop_words()
+    keep = ~np.fromiter((word in stop_words for word in vocabulary), dtype=bool, count=len(vocabulary))[token_ids]
+    token_ids, doc_ids = token_ids[keep], np.array(doc_ids, dtype=np.int64)[keep]
+    if len(token_ids) == 0:
+        raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+
+    rows, columns, ngram_keys = [], [], []
+    offset = 0
+    for n in range(1, max_n + 1):
+        ngram_docs, keys = _encode_ngrams(token_ids, doc_ids, n, len(vocabulary))
+        unique_keys, inverse = np.unique(keys, return_inverse=True, axis=0 if keys.ndim > 1 else None)
+        rows.append(ngram_docs)
+        columns.append(offset + inverse.reshape(-1))
+        ngram_keys.append(unique_keys)
+        offset += len(unique_keys)
+
+    rows, columns = np.concatenate(rows), np.concatenate(columns)
+    # Duplicate (doc, column) pairs are summed into counts
+    counts = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, columns)), shape=(len(corpus), offset))
+    counts.sum_duplicates()
+    return TermMatrix(counts, vocabulary, ngram_keys)
+
+def _top_k(indices: np.ndarray, values: np.ndarray, k: int = TOP_N) -> List[Tuple[int, float]]:
+    """
+    Internal helper: returns the k largest (index, value) pairs of a sparse row,
+    sorted descending. Uses partial selection instead of a full sort.
+    """
+    if len(values) > k:
+        part = np.argpartition(values, -k)[-k:]
+        indices, values = indices[part], values[part]
+    order = np.argsort(values, kind='stable')[::-1]
+    return list(zip(indices[order].tolist(), values[order].tolist()))
+
+def _tfidf_matrix(matrix: TermMatrix) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """
+    Internal helper: fits TF-IDF on the 1- to 3-gram columns of the count matrix.
+    With several documents the IDF is fitted across the whole corpus.
+    Returns (document x term TF-IDF matrix, count-matrix column of each TF-IDF column).
+    """
+    columns = np.flatnonzero(matrix.ngram_lengths <= MAX_TFIDF_NGRAM)
+    # Same weighting as TfidfVectorizer's defaults (smooth idf, l2 norm)
+    return TfidfTransformer().fit_transform(matrix.counts[:, columns]).tocsr(), columns
+
+
+def _get_tfidf_scores(matrix: TermMatrix, doc_index: int = 0,
+                      tfidf: Tuple[sparse.csr_matrix, np.ndarray] = None) -> Dict[str, float]:
     """
-    Internal helper to calculate TF-IDF scores for a single document.
+    Internal helper to calculate TF-IDF scores (1- to 3-grams) for one document of the
+    count matrix, reusing the counts instead of re-tokenizing the text.
+    Pass a precomputed _tfidf_matrix() result to score several documents with one fit.
     Returns a dictionary of term -> score (unsorted).
     """
     try:
-        # ngram_range=(1, 3): Captures single words up to 3-word phrases
-        vectorizer = TfidfVectorizer(
-            ngram_range=(1, 3), 
-            stop_words='english', 
-            max_df=1.0, 
-            min_df=1
-        )
-        
-        tfidf_matrix = vectorizer.fit_transform(corpus)
-        feature_names = np.array(vectorizer.get_feature_names_out())
+        tfidf_matrix, columns = tfidf if tfidf is not None else _tfidf_matrix(matrix)
 
-        scores = tfidf_matrix[0].toarray()[0]
-        # Get indices of top 50 scores
-        top_n_indices = scores.argsort()[-50:][::-1]
-        
+        row = tfidf_matrix.getrow(doc_index)
         top_terms: Dict[str, float] = {}
-        for idx in top_n_indices:
-            term = feature_names[idx]
-            score = round(float(scores[idx]), 4)
+        for idx, score in _top_k(row.indices, row.data):
+            score = round(float(score), 4)
             if score > 0:
-                top_terms[term] = score
+                top_terms[matrix.feature_name(columns[idx])] = score
         return top_terms
 
     except Exception as e:
@@ -88,50 +282,35 @@ def _get_tfidf_scores(corpus: List[str]) -> Dict[str, float]:
         return {}
 
 
-def _get_ngram_density(corpus: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+def _get_ngram_density(matrix: TermMatrix, doc_index: int = 0) -> Dict[str, Dict[str, Dict[str, Any]]]:
     """
-    Internal helper to calculate frequency and density for 1, 2, 3, 4-grams.
+    Internal helper to calculate frequency and density for 1, 2, 3, 4-grams from
+    one document of the shared count matrix.
     Returns a dictionary structured as: { '1gram': {term: {'count': N, 'density': D}, ...} } (unsorted).
     """
+    row = matrix.counts.getrow(doc_index)
+    row_lengths = matrix.ngram_lengths[row.indices]
     density_results: Dict[str, Dict[str, Dict[str, Any]]] = {}
-    
-    # Loop through 1-gram to 4-gram
-    for n in [1, 2, 3, 4]:
+
+    for n in range(1, MAX_NGRAM + 1):
         ngram_key = f"{n}gram"
-        
-        try:
-            # CountVectorizer calculates raw frequency counts
-            vectorizer = CountVectorizer(ngram_range=(n, n), stop_words='english')
-            dtm = vectorizer.fit_transform(corpus)
-            features = np.array(vectorizer.get_feature_names_out())
-            
-            row = dtm[0].toarray()[0]
-            total_words_in_doc = row.sum() # Total n-grams in this specific document
-            
-            # Get top 50 indices by count
-            top_indices = row.argsort()[-50:][::-1]
-            
-            site_ngram_data: Dict[str, Dict[str, Any]] = {}
-            
-            for idx in top_indices:
-                count = int(row[idx])
-                if count > 0:
-                    term = features[idx]
-                    # Density = (Count of this phrase / Total phrases in doc)
-                    density = round(count / total_words_in_doc, 5) if total_words_in_doc > 0 else 0
-                    
-                    site_ngram_data[term] = {
-                        "count": count,
-                        "density": density
-                    }
-            
-            density_results[ngram_key] = site_ngram_data
-                
-        except ValueError:
-            # Simplified error handling without logger
-            # print(f"Could not generate {n}-grams (corpus might be too small).")
-            density_results[ngram_key] = {}
-                 
+        mask = row_lengths == n
+        indices, values = row.indices[mask], row.data[mask]
+        total_words_in_doc = int(values.sum()) # Total n-grams in this specific document
+
+        site_ngram_data: Dict[str, Dict[str, Any]] = {}
+        for idx, count in _top_k(indices, values):
+            count = int(count)
+            if count > 0:
+                # Density = (Count of this phrase / Total phrases in doc)
+                density = round(count / total_words_in_doc, 5) if total_words_in_doc > 0 else 0
+                site_ngram_data[matrix.feature_name(idx)] = {
+                    "count": count,
+                    "density": density
+                }
+
+        density_results[ngram_key] = site_ngram_data
+
     return density_results
 
 def sort_analysis_results(data_dict: Dict[str, float or Dict[str, Any]], sort_by_key: str = None) -> List[Tuple]:
@@ -175,20 +354,58 @@ def analyze_content(base_url: str) -> Dict[str, Any]:
     if not raw_html:
         return {"status": "error", "message": f"Could not fetch content for {base_url}"}
 
-    cleaned_text = clean_text(raw_html)
-    if not cleaned_text:
+    # Runs in the process pool when CPU_POOL_WORKERS is set; only the small sorted
+    # result travels back to the caller
+    return run_cpu_bound_sync(_analyze_html, base_url, raw_html)
+
+
+async def analyze_content_async(base_url: str) -> Dict[str, Any]:
+    """
+    Async variant of analyze_content: the page is fetched without blocking the event
+    loop, and the CPU-bound cleaning/vectorizing runs in the process pool (or a
+    worker thread when the pool is disabled).
+    """
+    raw_html = await fetch_content_async(base_url)
+    if not raw_html:
+        return {"status": "error", "message": f"Could not fetch content for {base_url}"}
+
+    return await run_cpu_bound(_analyze_html, base_url, raw_html)
+
+
+def _analyze_html(base_url: str, raw_html: str) -> Dict[str, Any]:
+    """
+    Cleans and analyzes already-fetched HTML; shared by the sync and async entry points.
+    """
+    tokens = page_tokens(raw_html)
+    if not tokens:
         return {"status": "error", "message": f"No extractable text found for {base_url}"}
 
     # The corpus for the single URL analysis
-    corpus = [cleaned_text]
+    corpus = [tokens]
 
     # 2. Run Calculations
     # print(f"Running content analysis for: {base_url}")
-    
-    # These return the top N terms as UNORDERED dictionaries
-    tfidf_data = _get_tfidf_scores(corpus)
-    density_data = _get_ngram_density(corpus)
 
+    # Tokenized once; TF-IDF and n-gram densities share the same count matrix
+    try:
+        matrix = _vectorize(corpus)
+        # These return the top N terms as UNORDERED dictionaries
+        tfidf_data = _get_tfidf_scores(matrix)
+        density_data = _get_ngram_density(matrix)
+    except ValueError:
+        # Simplified error handling without logger
+        # print("Could not generate n-grams (corpus might be too small).")
+        tfidf_data = {}
+        density_data = {f"{n}gram": {} for n in range(1, MAX_NGRAM + 1)}
+
+    return _format_results(base_url, tfidf_data, density_data)
+
+
+def _format_results(base_url: str, tfidf_data: Dict[str, float],
+                    density_data: Dict[str, Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Sorts the raw TF-IDF and n-gram density data into the tool's output format.
+    """
     # 3. Sort Results 🥇
     
     # Sort TF-IDF by the score (descending)
@@ -210,4 +427,91 @@ def analyze_content(base_url: str) -> Dict[str, Any]:
         # Results are now SORTED LISTS, ready for display
         "tf_idf_top_50_sorted": sorted_tfidf, 
         "keyword_density_sorted_by_count": sorted_density_data
-    }
\ No newline at end of file
+    }
+
+MAX_FETCH_WORKERS = 8  # Pages fetched concurrently by analyze_many()
+
+
+def analyze_many(urls: List[str]) -> Dict[str, Any]:
+    """
+    Batch variant of analyze_content for the client and all competitors at once.
+
+    Pages are fetched concurrently and ONE count matrix is built over the whole
+    corpus, so TF-IDF uses a real inverse document frequency: terms every site
+    uses are weighted down, terms that set a site apart are weighted up.
+
+    Returns:
+        {
+            "status": "success" | "error",
+            "results": [analyze_content-style result per URL, in input order],
+            "documents": [URLs in matrix row order (successfully analyzed only)],
+            "term_matrix": TermMatrix (sparse document x n-gram counts) or None,
+            "tfidf_matrix": sparse document x 1-3-gram TF-IDF matrix or None,
+            "tfidf_columns": term_matrix column of each tfidf_matrix column or None
+        }
+        The matrices are meant for reuse by later Python stages and are not JSON-serializable.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return _analyze_corpus([], [])
+
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(urls))) as executor:
+        pages = list(executor.map(fetch_content, urls))
+    return _analyze_corpus(urls, pages)
+
+
+async def analyze_many_async(urls: List[str]) -> Dict[str, Any]:
+    """
+    Async variant of analyze_many: pages are fetched concurrently on the event loop
+    and the corpus is vectorized in a worker thread.
+    """
+    urls = list(dict.fromkeys(urls))
+    pages = await asyncio.gather(*(fetch_content_async(url) for url in urls))
+    return await asyncio.to_thread(_analyze_corpus, urls, list(pages))
+
+
+def _analyze_corpus(urls: List[str], pages: List[str]) -> Dict[str, Any]:
+    """
+    Cleans the fetched pages and analyzes them as one corpus; shared by
+    analyze_many and analyze_many_async.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    documents, corpus = [], []
+    # HTML extraction + tokenizing is the expensive, per-page part: spread it across the process pool
+    fetched = [(url, raw_html) for url, raw_html in zip(urls, pages) if raw_html]
+    tokenized = dict(zip([url for url, _ in fetched], map_cpu_bound(page_tokens, [raw_html for _, raw_html in fetched])))
+
+    for url in urls:
+        if url not in tokenized:
+            results[url] = {"url": url, "status": "error", "message": f"Could not fetch content for {url}"}
+            continue
+        tokens = tokenized[url]
+        if not tokens:
+            results[url] = {"url": url, "status": "error", "message": f"No extractable text found for {url}"}
+            continue
+        documents.append(url)
+        corpus.append(tokens)
+
+    matrix, tfidf = None, (None, None)
+    if corpus:
+        try:
+            matrix = _vectorize(corpus)
+            tfidf = _tfidf_matrix(matrix)
+        except ValueError:
+            matrix, tfidf = None, (None, None)
+
+    for doc_index, url in enumerate(documents):
+        if matrix is None:
+            results[url] = _format_results(url, {}, {f"{n}gram": {} for n in range(1, MAX_NGRAM + 1)})
+            continue
+        results[url] = _format_results(url, _get_tfidf_scores(matrix, doc_index, tfidf),
+                                       _get_ngram_density(matrix, doc_index))
+
+    return {
+        "status": "success" if documents else "error",
+        "results": [results[url] for url in urls],
+        "documents": documents,
+        "term_matrix": matrix,
+        "tfidf_matrix": tfidf[0],
+        "tfidf_columns": tfidf[1]
+    }
@@ -0,0 +1,221 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DEVICES = ("mobile", "desktop")
+
+# (lab_data key, metric name, metric code, unit, good threshold, needs-improvement threshold, core web vital)
+LAB_METRICS = (
+    ("LCP", "Largest Contentful Paint", "LCP", "ms", 2500, 4000, True),
+    ("CLS", "Cumulative Layout Shift", "CLS", "unitless", 0.1, 0.25, True),
+    ("FCP", "First Contentful Paint", "FCP", "ms", 1800, 3000, False),
+    ("Speed_Index", "Speed Index", "SI", "ms", 3400, 5800, False),
+    ("Total_Blocking_Time", "Total Blocking Time", "TBT", "ms", 200, 600, False),
+)
+# Interaction to Next Paint only exists as CrUX field data (real_user_data)
+INP_METRIC = ("INP_ms", "Interaction to Next Paint", "INP", "ms", 200, 500, True)
+
+SUGGESTIONS = {
+    "LCP": ["Preload the LCP image and serve it in a modern format (WebP/AVIF)", "Reduce server response time (TTFB)"],
+    "CLS": ["Set explicit width and height on images and embeds", "Reserve space for ads and late-loading content"],
+    "INP": ["Break up long JavaScript tasks", "Defer non-critical third-party scripts"],
+    "FCP": ["Eliminate render-blocking CSS and JavaScript", "Inline the critical CSS"],
+    "SI": ["Minimize main-thread work during page load"],
+    "TBT": ["Reduce JavaScript execution time", "Code-split large bundles"],
+}
+PRIORITY = {"POOR": "HIGH", "NEEDS_IMPROVEMENT": "MEDIUM"}
+
+
+def _health_status(score: int) -> str:
+    if score >= 90:
+        return "EXCELLENT"
+    if score >= 75:
+        return "GOOD"
+    if score >= 50:
+        return "NEEDS_IMPROVEMENT"
+    return "POOR"
+
+
+def _metric(definition, value: float, display_value: str, rating: Optional[str]) -> Dict[str, Any]:
+    _, name, code, unit, good, needs_improvement, core = definition
+    return {
+        "metric_name": name,
+        "metric_code": code,
+        "value": float(value),
+        "unit": unit,
+        "display_value": display_value,
+        "rating": rating or "UNKNOWN",
+        "threshold_good": good,
+        "threshold_needs_improvement": needs_improvement,
+        "is_core_web_vital": core,
+        "improvement_suggestions": SUGGESTIONS[code] if rating in PRIORITY else []
+    }
+
+
+def _device_metrics(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Metric objects for one device: Lighthouse lab metrics plus CrUX INP when available."""
+    lab = data.get("lab_data") or {}
+    metrics = []
+    for definition in LAB_METRICS:
+        audit = lab.get(definition[0]) or {}
+        if audit.get("numericValue") is not None:
+            metrics.append(_metric(definition, audit["numericValue"],
+                                   audit.get("displayValue") or str(audit["numericValue"]), audit.get("rating")))
+
+    field = data.get("real_user_data")
+    inp = field.get(INP_METRIC[0]) if isinstance(field, dict) else None
+    if inp and inp.get("value") is not None:
+        metrics.append(_metric(INP_METRIC, inp["value"], f"{inp['value']} ms (field)", inp.get("rating")))
+    return metrics
+
+
+def _device(device: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    score = (data.get("lab_data") or {}).get("performance_score") or {}
+    return {
+        "device_type": device,
+        "overall_score": score.get("value") or 0,
+        "score_category": score.get("rating"),
+        "metrics": _device_metrics(data),
+        "device_specific_insights": f"Analysis failed: {data['error']}" if "error" in data else None
+    }
+
+
+def _summary(metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
+    distribution: Dict[str, int] = {}
+    for metric in metrics:
+        distribution[metric["rating"]] = distribution.get(metric["rating"], 0) + 1
+    return {
+        "total_metrics": len(metrics),
+        "good_count": distribution.get("GOOD", 0),
+        "needs_improvement_count": distribution.get("NEEDS_IMPROVEMENT", 0),
+        "poor_count": distribution.get("POOR", 0),
+        "rating_distribution": distribution
+    }
+
+
+def _priority_actions(devices: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One action per failing metric (worst rating over both devices), POOR metrics first."""
+    failing: Dict[str, Dict[str, Any]] = {}
+    for device, analysis in devices.items():
+        for metric in analysis["metrics"]:
+            if metric["rating"] not in PRIORITY:
+                continue
+            entry = failing.setdefault(metric["metric_code"], {"metric": metric, "devices": []})
+            entry["devices"].append(device)
+            if metric["rating"] == "POOR":
+                entry["metric"] = metric
+
+    actions = []
+    for code, entry in failing.items():
+        metric = entry["metric"]
+        actions.append({
+            "priority_level": PRIORITY[metric["rating"]],
+            "action": SUGGESTIONS[code][0],
+            "affected_metrics": [code],
+            "expected_impact": f"{metric['metric_name']} is {metric['display_value']} ({metric['rating']})",
+            "device_specific": entry["devices"][0] if len(entry["devices"]) == 1 else "both"
+        })
+    return sorted(actions, key=lambda action: action["priority_level"] != "HIGH")
+
+
+def map_web_vitals(vitals: Dict[str, Any], agent_name: str = "performance_reporter_agent") -> Dict[str, Any]:
+    """
+    Maps an analyze_web_vitals result onto the WebPerformanceOutput schema, without an LLM.
+
+    Scores, ratings and thresholds come straight from PageSpeed Insights (see
+    web_vitals_fetcher); recommendations are the standard fixes for each failing
+    metric. The prose fields (score interpretation, device insights) are left empty.
+
+    Args:
+        vitals (dict): The analyze_web_vitals / analyze_web_vitals_async result.
+        agent_name (str): Value of metadata.agent_name.
+
+    Returns:
+        dict: Keyword arguments for WebPerformanceOutput.
+    """
+    devices_data = {device: vitals.get(device) or {"error": vitals.get("error", "No data")} for device in DEVICES}
+    devices = {device: _device(device, data) for device, data in devices_data.items()}
+    mobile_metrics = devices["mobile"]["metrics"] or devices["desktop"]["metrics"]
+    summaries = {device: _summary(analysis["metrics"]) for device, analysis in devices.items()}
+    scores = [analysis["overall_score"] for analysis in devices.values()]
+    measured = [score for score, data in zip(scores, devices_data.values()) if "error" not in data] or [0]
+    actions = _priority_actions(devices)
+    has_field_data = any(isinstance(data.get("real_user_data"), dict) for data in devices_data.values())
+    errors = [
+        {"error_code": "PAGESPEED_ERROR", "error_message": f"{device}: {data['error']}",
+         "recovery_suggestion": "Check PAGESPEED_API_KEY and the PSI quota, then rerun."}
+        for device, data in devices_data.items() if "error" in data
+    ]
+
+    return {
+        "metadata": {
+            "analysis_timestamp": vitals.get("analyzed_at") or datetime.now().isoformat(),
+            "target_url": vitals.get("url", ""),
+            "agent_name": agent_name,
+            "report_version": "1.0.0",
+            "analysis_tool": "google_pagespeed_insights"
+        },
+        "performance_summary": {
+            "overall_health_status": _health_status(min(measured)),
+            "mobile_score": scores[0],
+            "desktop_score": scores[1],
+            "critical_issues_count": sum(summary["poor_count"] for summary in summaries.values()),
+            "warning_issues_count": sum(summary["needs_improvement_count"] for summary in summaries.values())
+        },
+        "device_analysis": devices,
+        "metrics_breakdown": {
+            # Mobile first, as Google indexes the mobile version of the page
+            "core_web_vitals": [metric for metric in mobile_metrics if metric["is_core_web_vital"]],
+            "additional_metrics": [metric for metric in mobile_metrics if not metric["is_core_web_vital"]],
+            "metrics_summary_by_device": summaries
+        },
+        "recommendations": {
+            "priority_actions": actions,
+            "quick_wins": [action["action"] for action in actions if action["priority_level"] == "MEDIUM"]
+        },
+        "data_source_info": {
+            "data_type": "lab_and_field" if has_field_data else "lab",
+            "collection_method": "Google PageSpeed Insights API (Lighthouse + CrUX)",
+            "is_real_user_data": has_field_data,
+            "data_freshness": vitals.get("analyzed_at"),
+            "limitations": [] if has_field_data else ["Not enough Chrome UX Report traffic for field data (INP)"]
+        },
+        "errors_and_warnings": {"errors": errors, "warnings": []},
+        "executive_summary": {
+            "one_liner": f"Mobile {scores[0]}/100, desktop {scores[1]}/100 on PageSpeed Insights.",
+            "key_findings": [action["expected_impact"] for action in actions],
+            "next_steps": [action["action"] for action in actions[:3]]
+        }
+    }
+
+
+def performance_benchmark(results: List[Dict[str, Any]], client_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    JSON-friendly comparison of an analyze_web_vitals_many batch: per site its mobile
+    and desktop scores, health status and mobile Core Web Vitals, best mobile score first.
+
+    Args:
+        results (list): The 'results' of analyze_web_vitals_many / analyze_web_vitals_many_async.
+        client_url (str): The client's URL, flagged with 'is_client'.
+
+    Returns:
+        dict: {"client_rank": mobile-score rank of the client (1 = fastest) or None, "sites": [...]}
+    """
+    sites = []
+    for vitals in results:
+        report = map_web_vitals(vitals)
+        summary = report["performance_summary"]
+        sites.append({
+            "url": vitals.get("url", ""),
+            "is_client": bool(client_url) and vitals.get("url") == client_url,
+            "mobile_score": summary["mobile_score"],
+            "desktop_score": summary["desktop_score"],
+            "overall_health_status": summary["overall_health_status"],
+            "core_web_vitals": {
+                metric["metric_code"]: {"value": metric["value"], "rating": metric["rating"]}
+                for metric in report["metrics_breakdown"]["core_web_vitals"]
+            },
+            "errors": [error["error_message"] for error in report["errors_and_warnings"]["errors"]]
+        })
+    sites.sort(key=lambda site: (site["mobile_score"], site["desktop_score"]), reverse=True)
+    client_rank = next((rank for rank, site in enumerate(sites, start=1) if site["is_client"]), None)
+    return {"client_rank": client_rank, "sites": sites}
@@ -0,0 +1,119 @@
+import json
+from typing import Any, AsyncIterator, Dict, Iterable
+
+try:
+    import ijson
+except ImportError:  # Optional streaming parser: pip install "kaggle-capstone-project[fast]"
+    ijson = None
+
+# Lighthouse audits read by web_vitals_fetcher._extract_metrics
+PSI_AUDITS = (
+    "first-contentful-paint", "largest-contentful-paint", "cumulative-layout-shift",
+    "speed-index", "total-blocking-time"
+)
+AUDIT_FIELDS = ("numericValue", "displayValue")
+
+# Subtrees kept from the response (dotted paths, as reported by ijson)
+SELECTED_PATHS = frozenset(
+    ["loadingExperience.metrics", "loadingExperience.overall_category", "lighthouseResult.categories.performance"] +
+    [f"lighthouseResult.audits.{audit}" for audit in PSI_AUDITS]
+)
+
+
+def fields_mask() -> str:
+    """
+    Partial-response mask for the PSI 'fields' query parameter: the API then omits
+    everything else (screenshots, traces, the other ~150 audits) before sending.
+    """
+    paths = ["loadingExperience/metrics", "loadingExperience/overall_category",
+             "lighthouseResult/categories/performance/score"]
+    paths += [f"lighthouseResult/audits/{audit}/{field}" for audit in PSI_AUDITS for field in AUDIT_FIELDS]
+    return ",".join(paths)
+
+
+def _set_path(data: Dict[str, Any], path: str, value: Any) -> None:
+    *parents, leaf = path.split(".")
+    for key in parents:
+        data = data.setdefault(key, {})
+    data[leaf] = value
+
+
+def select_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduces an already parsed PSI response to SELECTED_PATHS."""
+    selected: Dict[str, Any] = {}
+    for path in SELECTED_PATHS:
+        value = data
+        for key in path.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None:
+            _set_path(selected, path, value)
+    return selected
+
+
+class _SelectiveBuilder:
+    """
+    Consumes ijson (prefix, event, value) events and materializes only the subtrees
+    under SELECTED_PATHS; everything else is skipped as it streams past.
+    """
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self._builder = None
+        self._path = None
+
+    def event(self, prefix: str, event: str, value: Any) -> None:
+        if self._builder is not None:
+            self._builder.event(event, value)
+            if prefix == self._path and event in ("end_map", "end_array"):
+                _set_path(self.data, self._path, self._builder.value)
+                self._builder = None
+            return
+
+        if prefix not in SELECTED_PATHS or event in ("map_key", "end_map", "end_array"):
+            return
+        if event in ("start_map", "start_array"):
+            self._builder = ijson.ObjectBuilder()
+            self._builder.event(event, value)
+            self._path = prefix
+        else:
+            _set_path(self.data, prefix, value)
+
+
+def parse_chunks(chunks: Iterable[bytes]) -> Dict[str, Any]:
+    """
+    Parses a PSI response from an iterable of byte chunks (e.g. a streamed HTTP body),
+    keeping only SELECTED_PATHS. Uses ijson when installed; otherwise falls back to
+    a full json.loads() followed by select_fields().
+    """
+    if ijson is None:
+        return select_fields(json.loads(b"".join(chunks)))
+
+    builder = _SelectiveBuilder()
+    coroutine = ijson.parse_coro(_EventSink(builder), use_float=True)
+    for chunk in chunks:
+        coroutine.send(chunk)
+    coroutine.close()
+    return builder.data
+
+
+async def parse_chunks_async(chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+    """Async variant of parse_chunks(), e.g. for httpx's Response.aiter_bytes()."""
+    if ijson is None:
+        return select_fields(json.loads(b"".join([chunk async for chunk in chunks])))
+
+    builder = _SelectiveBuilder()
+    coroutine = ijson.parse_coro(_EventSink(builder), use_float=True)
+    async for chunk in chunks:
+        coroutine.send(chunk)
+    coroutine.close()
+    return builder.data
+
+
+class _EventSink:
+    """Push-mode target for ijson.parse_coro(): forwards each event to the builder."""
+
+    def __init__(self, builder: _SelectiveBuilder):
+        self._builder = builder
+
+    def send(self, item) -> None:
+        self._builder.event(*item)
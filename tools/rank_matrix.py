@@ -0,0 +1,170 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from utils.domains import domain_of, is_domain
+
+# Approximate organic click-through rate by position (1-10); page 2 and beyond get a flat tail
+CTR_TOP_10 = (0.276, 0.158, 0.110, 0.084, 0.063, 0.049, 0.039, 0.033, 0.027, 0.024)
+CTR_PAGE_2 = 0.010
+CTR_TAIL = 0.002
+MAX_POSITION = 100
+
+
+def _ctr_curve(max_position: int = MAX_POSITION) -> np.ndarray:
+    """CTR indexed by position; index 0 (not ranking) is 0."""
+    curve = np.full(max_position + 1, CTR_TAIL)
+    curve[0] = 0.0
+    curve[1:len(CTR_TOP_10) + 1] = CTR_TOP_10
+    curve[len(CTR_TOP_10) + 1:min(21, max_position + 1)] = CTR_PAGE_2
+    return curve
+
+
+CTR_CURVE = _ctr_curve()
+
+
+class PositionMatrix(NamedTuple):
+    """
+    Best organic position of every domain for every keyword: positions[k, d] is the
+    1-based rank of domains[d] for keywords[k], 0 when it does not rank within the
+    tracked depth. keyword_index / domain_index map names to rows / columns.
+    """
+    keywords: List[str]
+    domains: List[str]
+    positions: np.ndarray  # (len(keywords), len(domains)) uint8
+    keyword_index: Dict[str, int]
+    domain_index: Dict[str, int]
+
+
+def _matrix(keywords: List[str], domains: List[str], positions: np.ndarray) -> PositionMatrix:
+    return PositionMatrix(keywords, domains, positions, {keyword: row for row, keyword in enumerate(keywords)},
+                          {domain: column for column, domain in enumerate(domains)})
+
+
+def build_position_matrix(responses: Dict[str, Dict[str, Any]]) -> PositionMatrix:
+    """
+    Builds the keyword x domain matrix from SerpApi responses
+    ({keyword: response}, e.g. ranking_monitor.get_serp_responses_many). Errors
+    contribute an all-zero row.
+    """
+    keywords = list(responses)
+    domain_index: Dict[str, int] = {}
+    rows, columns, ranks = [], [], []
+    for row, keyword in enumerate(keywords):
+        for item in responses[keyword].get("organic_results", []):
+            domain, position = domain_of(item.get("link")), item.get("position")
+            if domain and position and 0 < position <= MAX_POSITION:
+                rows.append(row)
+                columns.append(domain_index.setdefault(domain, len(domain_index)))
+                ranks.append(position)
+
+    # Unranked cells hold a sentinel so np.minimum.at keeps each domain's best position
+    positions = np.full((len(keywords), len(domain_index)), MAX_POSITION + 1, dtype=np.uint8)
+    np.minimum.at(positions, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)),
+                  np.array(ranks, dtype=np.uint8))
+    positions[positions > MAX_POSITION] = 0
+    return _matrix(keywords, list(domain_index), positions)
+
+
+def merge_domain(matrix: PositionMatrix, domain: str) -> PositionMatrix:
+    """
+    Collapses 'domain' and its subdomains (www., blog., ...) into a single 'domain'
+    column holding their best position per keyword, so a site is scored as a whole.
+    """
+    columns = [column for column, name in enumerate(matrix.domains) if is_domain(name, domain)]
+    if not columns or [matrix.domains[column] for column in columns] == [domain]:
+        return matrix
+    merged = matrix.positions[:, columns].astype(np.intp)
+    merged[merged == 0] = MAX_POSITION + 1
+    best = merged.min(axis=1)
+    best[best > MAX_POSITION] = 0
+
+    merged_columns = set(columns)
+    others = [column for column in range(len(matrix.domains)) if column not in merged_columns]
+    positions = np.column_stack([matrix.positions[:, others], best.astype(np.uint8)])
+    return _matrix(matrix.keywords, [matrix.domains[column] for column in others] + [domain], positions)
+
+
+def rank_scores(matrix: PositionMatrix, weights: Optional[List[float]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-domain visibility over all keywords, computed on the whole matrix at once.
+
+    - visibility: estimated clicks (CTR by position, weighted per keyword) as a
+      percentage of what ranking #1 for every keyword would get.
+    - share_of_voice: the domain's share (%) of the estimated clicks of all tracked domains.
+    - keywords_ranked / top_3 / top_10 / average_position over the ranked keywords.
+
+    Args:
+        matrix (PositionMatrix): See build_position_matrix.
+        weights (list): Optional per-keyword weights (e.g. search volumes); uniform by default.
+
+    Returns:
+        dict: {domain: scores}, sorted by visibility (highest first).
+    """
+    positions = matrix.positions.astype(np.intp)
+    if positions.size == 0:
+        return {}
+    weights = np.ones(len(matrix.keywords)) if weights is None else np.asarray(weights, dtype=float)
+
+    clicks = CTR_CURVE[positions] * weights[:, None]                # (keywords, domains)
+    domain_clicks = clicks.sum(axis=0)
+    visibility = 100 * domain_clicks / (CTR_CURVE[1] * weights.sum())
+    share_of_voice = 100 * domain_clicks / domain_clicks.sum() if domain_clicks.sum() else np.zeros_like(domain_clicks)
+
+    ranked = positions > 0
+    keywords_ranked = ranked.sum(axis=0)
+    average_position = np.divide(positions.sum(axis=0), keywords_ranked,
+                                 out=np.zeros(len(matrix.domains)), where=keywords_ranked > 0)
+    top_3 = (ranked & (positions <= 3)).sum(axis=0)
+    top_10 = (ranked & (positions <= 10)).sum(axis=0)
+
+    return {
+        matrix.domains[d]: {
+            "visibility": round(float(visibility[d]), 2),
+            "share_of_voice": round(float(share_of_voice[d]), 2),
+            "keywords_ranked": int(keywords_ranked[d]),
+            "top_3": int(top_3[d]),
+            "top_10": int(top_10[d]),
+            "average_position": round(float(average_position[d]), 2) if keywords_ranked[d] else None
+        }
+        for d in np.argsort(-visibility, kind="stable")
+    }
+
+
+def position_of(matrix: PositionMatrix, keyword: str, domain: str) -> Optional[int]:
+    """Best position of 'domain' for 'keyword', or None when it does not rank."""
+    row, column = matrix.keyword_index.get(keyword), matrix.domain_index.get(domain)
+    if row is None or column is None:
+        return None
+    return int(matrix.positions[row, column]) or None
+
+
+def visibility_report(responses: Dict[str, Dict[str, Any]], client_url: Optional[str] = None,
+                      top_domains: int = 20) -> Dict[str, Any]:
+    """
+    JSON-friendly summary of a keyword batch: the client's positions and scores plus
+    the top domains by visibility, each with its position per keyword (None = not ranking).
+    The client's subdomains count as the client (best position per keyword).
+    """
+    client_domain = domain_of((client_url or "").strip())
+    matrix = build_position_matrix(responses)
+    if client_domain:
+        matrix = merge_domain(matrix, client_domain)
+    scores = rank_scores(matrix)
+    leaders = list(scores)[:top_domains]
+    if client_domain in scores and client_domain not in leaders:
+        leaders.append(client_domain)
+
+    def positions(domain):
+        return {keyword: position_of(matrix, keyword, domain) for keyword in matrix.keywords}
+
+    return {
+        "keywords": matrix.keywords,
+        "domains_tracked": len(matrix.domains),
+        "client": {
+            "domain": client_domain,
+            "positions": positions(client_domain),
+            **scores.get(client_domain, {"visibility": 0.0, "share_of_voice": 0.0, "keywords_ranked": 0})
+        } if client_domain else None,
+        "domains": [{"domain": domain, **scores[domain], "positions": positions(domain)} for domain in leaders]
+    }
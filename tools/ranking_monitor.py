@@ -1,15 +1,433 @@
+import asyncio
 import os
 import json
-from serpapi import Client
+import logging
+import threading
+import time
+import unicodedata
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from dotenv import load_dotenv
 
+from utils.http_client import get_http_session, get_async_http_client, async_timeout
+from utils.json_cache import JsonCache
+from utils.rate_limiter import get_rate_limiter
+
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# SERPAPI_BASE_URL points the tools at another server (e.g. benchmarks/standin_server.py)
+SERPAPI_BASE_URL = os.getenv("SERPAPI_BASE_URL", "https://serpapi.com").rstrip("/")
+SERPAPI_ENDPOINT = f"{SERPAPI_BASE_URL}/search.json"
+SERPAPI_ACCOUNT_ENDPOINT = f"{SERPAPI_BASE_URL}/account.json"
+MISSING_KEY_ERROR = "Missing API Key. Please set SERPAPI_KEY in your .env file or environment variables."
+
+# Google India (gl=in) in English (hl=en)
+GL = "in"
+HL = "en"
+GOOGLE_DOMAIN = "google.co.in"
+
+# SerpApi throughput (searches per period), concurrency and credits spent per batch (0 = no cap)
+SERPAPI_MAX_CALLS = int(os.getenv("SERPAPI_RATE_LIMIT_CALLS", "100"))
+SERPAPI_PERIOD = float(os.getenv("SERPAPI_RATE_LIMIT_PERIOD", "3600"))
+SERPAPI_MAX_CONCURRENT = int(os.getenv("SERPAPI_MAX_CONCURRENT", "5"))
+SERPAPI_CREDIT_BUDGET = int(os.getenv("SERPAPI_CREDIT_BUDGET", "0"))
+
+# Positions tracked per keyword; SerpApi returns 10 results per page (one credit per page),
+# so anything deeper than page one multiplies the credits spent and is opt-in
+SERPAPI_DEPTH = int(os.getenv("SERPAPI_DEPTH", "10"))
+PAGE_SIZE = 10
+NO_RESULTS_ERROR = "hasn't returned any results"  # SerpApi's error for a page past the last result
+
+# Search results are cached per (keyword, gl, hl, google_domain, date): same-day reruns cost no credits
+# (entries from earlier days are never read again and are pruned after two days)
+_serp_cache = JsonCache("serpapi", max_age=2 * 24 * 3600)
+
+
+def _serpapi_limiter():
+    return get_rate_limiter("serpapi", SERPAPI_MAX_CALLS, SERPAPI_PERIOD)
+
+
+# SERPAPI_MAX_CONCURRENT caps the requests in flight, pages of one keyword included
+_request_slots = threading.BoundedSemaphore(SERPAPI_MAX_CONCURRENT)
+_async_request_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _async_slots() -> asyncio.Semaphore:
+    """The request cap of the running event loop (asyncio primitives are bound to a loop)."""
+    loop = asyncio.get_running_loop()
+    slots = _async_request_slots.get(loop)
+    if slots is None:
+        slots = _async_request_slots[loop] = asyncio.Semaphore(SERPAPI_MAX_CONCURRENT)
+    return slots
+
+
+def normalize_keyword(keyword):
+    """
+    Canonical form of a keyword: Unicode NFKC, lowercased, whitespace collapsed.
+    'Marriage  Biodata ' and 'marriage biodata' are the same search.
+    """
+    return " ".join(unicodedata.normalize("NFKC", keyword).casefold().split())
+
+
+def _cache_key(keyword, start):
+    return [keyword, GL, HL, GOOGLE_DOMAIN, date.today().isoformat(), start]
+
+
+def _page_starts(depth):
+    """Result offsets of the pages covering the top 'depth' positions."""
+    return list(range(0, max(depth, PAGE_SIZE), PAGE_SIZE))
+
+
+def _search_params(keyword, api_key, start=0):
+    """
+    SerpApi parameters for Google India (gl=in) in English (hl=en).
+    """
+    params = {
+        "engine": "google",
+        "q": keyword,
+        "api_key": api_key,
+        "num": PAGE_SIZE, # Results per page
+        "gl": GL,        # Geo-location: India
+        "hl": HL,        # Language: English
+        "google_domain": GOOGLE_DOMAIN # Force Google India domain
+    }
+    if start:
+        params["start"] = start  # Result offset of the page
+    return params
+
+def _clean_results(results):
+    """
+    Keeps position, title and URL of the top 10 organic results.
+    """
+    # specific extraction based on your provided structure
+    organic_results = results.get("organic_results", [])
+    
+    cleaned_data = []
+    
+    # We slice [:10] to ensure we only process the top 10
+    for item in organic_results[:10]:
+        entry = {
+            "position": item.get("position"),
+            "title": item.get("title"),
+            "url": item.get("link"), # Mapped from 'link' in your raw structure
+        }
+        cleaned_data.append(entry)
+
+    return cleaned_data
+
+def _store(keyword, start, results):
+    # Errors (including "no results") are never cached
+    if "error" not in results:
+        _serp_cache.set(_cache_key(keyword, start), {"fetched_at": time.time(), "data": results})
+
+
+def _cached(keyword, start=0):
+    entry = _serp_cache.get(_cache_key(keyword, start))
+    return entry["data"] if entry is not None else None
+
+
+def _fetch_search(keyword, api_key, start=0):
+    """
+    One SerpApi search page (one credit) through the shared keep-alive session.
+    Returns the raw SerpApi response, or {"error": ...}.
+    """
+    try:
+        with _request_slots:
+            _serpapi_limiter().acquire()
+            response = get_http_session().get(SERPAPI_ENDPOINT, params=_search_params(keyword, api_key, start), timeout=60)
+        results = response.json()
+        if results.get("error"):
+            return {"error": results["error"]}
+        response.raise_for_status()
+        return results
+    except Exception as e:
+        logger.error(f"SerpApi search failed for '{keyword}' (start={start}): {e}")
+        return {"error": str(e)}
+
+async def _fetch_search_async(keyword, api_key, start=0):
+    """
+    Async variant of _fetch_search, built on the shared async HTTP client.
+    """
+    try:
+        async with _async_slots():
+            await _serpapi_limiter().acquire_async()
+            response = await get_async_http_client().get(
+                SERPAPI_ENDPOINT, params=_search_params(keyword, api_key, start), timeout=async_timeout(60)
+            )
+        results = response.json()
+        if results.get("error"):
+            return {"error": results["error"]}
+        response.raise_for_status()
+        return results
+    except Exception as e:
+        logger.error(f"SerpApi search failed for '{keyword}' (start={start}): {e}")
+        return {"error": str(e)}
+
+def _search_page(keyword, api_key, start, force_refresh):
+    """
+    Cache-aware _fetch_search. Returns (response, credits spent).
+    """
+    if not force_refresh:
+        results = _cached(keyword, start)
+        if results is not None:
+            return results, 0
+    results = _fetch_search(keyword, api_key, start)
+    if start and NO_RESULTS_ERROR in results.get("error", ""):
+        results = {"organic_results": []}  # Past the last page: cached as an empty page
+    _store(keyword, start, results)
+    return results, 1
+
+async def _search_page_async(keyword, api_key, start, force_refresh):
+    """
+    Async variant of _search_page.
+    """
+    if not force_refresh:
+        results = _cached(keyword, start)
+        if results is not None:
+            return results, 0
+    results = await _fetch_search_async(keyword, api_key, start)
+    if start and NO_RESULTS_ERROR in results.get("error", ""):
+        results = {"organic_results": []}  # Past the last page: cached as an empty page
+    _store(keyword, start, results)
+    return results, 1
+
+def _has_next_page(results):
+    return bool((results.get("serpapi_pagination") or results.get("pagination") or {}).get("next"))
+
+def _merge_pages(pages):
+    """
+    Combines the pages of one search into a single response (the first page, with
+    the organic results of all pages). Results repeated on a later page are dropped
+    and positions are renumbered 1..n in page order.
+    """
+    first = pages[0]
+    if len(pages) == 1 or "error" in first:
+        return first
+
+    organic_results, seen = [], set()
+    for page in pages:
+        if "error" in page:
+            break  # Later positions are unknown; keep the contiguous prefix
+        for item in page.get("organic_results", []):
+            if item.get("link") in seen:
+                continue
+            seen.add(item.get("link"))
+            organic_results.append({**item, "position": len(organic_results) + 1})
+    return {**first, "organic_results": organic_results}
+
+def _search(keyword, api_key, force_refresh=False, depth=SERPAPI_DEPTH):
+    """
+    Searches an already normalized keyword down to 'depth' positions: the first page,
+    then (if Google has more) the remaining pages concurrently, within the shared
+    SERPAPI_MAX_CONCURRENT request cap. Every page is cached.
+    Returns (merged response, credits spent).
+    """
+    first, spent = _search_page(keyword, api_key, 0, force_refresh)
+    starts = _page_starts(depth)[1:]
+    if "error" in first or not starts or not _has_next_page(first):
+        return first, spent
+
+    with ThreadPoolExecutor(max_workers=max(1, min(SERPAPI_MAX_CONCURRENT, len(starts)))) as executor:
+        pages = list(executor.map(lambda start: _search_page(keyword, api_key, start, force_refresh), starts))
+    return _merge_pages([first] + [page for page, _ in pages]), spent + sum(credits for _, credits in pages)
+
+async def _search_async(keyword, api_key, force_refresh=False, depth=SERPAPI_DEPTH):
+    """
+    Async variant of _search.
+    """
+    first, spent = await _search_page_async(keyword, api_key, 0, force_refresh)
+    starts = _page_starts(depth)[1:]
+    if "error" in first or not starts or not _has_next_page(first):
+        return first, spent
+
+    pages = await asyncio.gather(*(_search_page_async(keyword, api_key, start, force_refresh) for start in starts))
+    return _merge_pages([first] + [page for page, _ in pages]), spent + sum(credits for _, credits in pages)
+
+def _credits_left(api_key):
+    """
+    Searches left on the SerpApi account (the Account API is free), or None if unknown.
+    """
+    try:
+        response = get_http_session().get(SERPAPI_ACCOUNT_ENDPOINT, params={"api_key": api_key}, timeout=30)
+        response.raise_for_status()
+        return int(response.json()["total_searches_left"])
+    except Exception as e:
+        logger.warning(f"Could not read SerpApi account credits: {e}")
+        return None
+
+async def _credits_left_async(api_key):
+    try:
+        response = await get_async_http_client().get(
+            SERPAPI_ACCOUNT_ENDPOINT, params={"api_key": api_key}, timeout=async_timeout(30)
+        )
+        response.raise_for_status()
+        return int(response.json()["total_searches_left"])
+    except Exception as e:
+        logger.warning(f"Could not read SerpApi account credits: {e}")
+        return None
+
+def _plan_batch(keywords, force_refresh):
+    """
+    Normalizes and de-duplicates 'keywords' (input order kept) and lists the keywords
+    whose first page is not cached yet, i.e. that will spend credits.
+    """
+    unique = list(dict.fromkeys(filter(None, (normalize_keyword(keyword) for keyword in keywords))))
+    misses = unique if force_refresh else [keyword for keyword in unique if _cached(keyword) is None]
+    return unique, misses
+
+def _affordable(unique, misses, credits_left):
+    """
+    Drops the uncached keywords that do not fit within SERPAPI_CREDIT_BUDGET and the
+    account's remaining credits (each costs up to one credit per page of SERPAPI_DEPTH).
+    """
+    cost = len(_page_starts(SERPAPI_DEPTH))
+    limits = [limit for limit in (SERPAPI_CREDIT_BUDGET or None, credits_left) if limit is not None]
+    allowed = min(limits) // cost if limits else len(misses)
+    if allowed < len(misses):
+        logger.warning(f"SerpApi credits allow {allowed} of {len(misses)} uncached searches; skipping the rest")
+    skipped = set(misses[max(allowed, 0):])
+    return [keyword for keyword in unique if keyword not in skipped]
+
+def _batch_result(unique, searched):
+    searched_at = datetime.now().isoformat()
+    results = []
+    for keyword in unique:
+        data, credits = searched.get(keyword, ({"error": "SerpApi credit budget exhausted"}, 0))
+        if "error" in data:
+            results.append({"keyword": keyword, "error": data["error"]})
+        else:
+            results.append({"keyword": keyword, "source": "api" if credits else "cache",
+                            "organic_results": _clean_results(data)})
+    return {
+        "searched_at": searched_at,
+        "credits_used": sum(credits for _, credits in searched.values()),
+        "cache_hits": sum(1 for _, credits in searched.values() if not credits),
+        "results": results
+    }
+
+def _run_batch(keywords, api_key, force_refresh):
+    """
+    Runs a keyword batch: returns (unique keywords, {keyword: (response, credits spent)}).
+    """
+    unique, misses = _plan_batch(keywords, force_refresh)
+    runnable = _affordable(unique, misses, _credits_left(api_key)) if misses else unique
+    with ThreadPoolExecutor(max_workers=max(1, min(SERPAPI_MAX_CONCURRENT, len(runnable)))) as executor:
+        futures = {keyword: executor.submit(_search, keyword, api_key, force_refresh) for keyword in runnable}
+        searched = {keyword: future.result() for keyword, future in futures.items()}
+
+    logger.info(f"SERP batch: {len(unique)} keywords, {len(misses)} uncached, "
+                f"{sum(credits for _, credits in searched.values())} credits")
+    return unique, searched
+
+async def _run_batch_async(keywords, api_key, force_refresh):
+    """
+    Async variant of _run_batch.
+    """
+    unique, misses = _plan_batch(keywords, force_refresh)
+    runnable = _affordable(unique, misses, await _credits_left_async(api_key)) if misses else unique
+    # Requests (not keywords) are capped at SERPAPI_MAX_CONCURRENT, see _fetch_search_async
+    searched = dict(zip(runnable, await asyncio.gather(
+        *(_search_async(keyword, api_key, force_refresh) for keyword in runnable)
+    )))
+
+    logger.info(f"SERP batch: {len(unique)} keywords, {len(misses)} uncached, "
+                f"{sum(credits for _, credits in searched.values())} credits")
+    return unique, searched
+
+def _responses(unique, searched):
+    budget_error = ({"error": "SerpApi credit budget exhausted"}, 0)
+    return {keyword: searched.get(keyword, budget_error)[0] for keyword in unique}
+
+def get_organic_results_many(keywords: list, force_refresh: bool = False) -> dict:
+    """
+    Batch variant of get_indian_organic_results for the whole keyword list.
+
+    Keywords are normalized and de-duplicated; cached results from today are reused
+    (zero credits), and the remaining searches run concurrently (SERPAPI_MAX_CONCURRENT),
+    throttled by the shared SerpApi limiter and capped by the credit budget and the
+    credits left on the account. Each search covers SERPAPI_DEPTH positions (pages
+    fetched concurrently); 'organic_results' keeps the top 10.
+
+    Args:
+        keywords (list): The keywords to search.
+        force_refresh (bool): Bypass the cache and search again.
+
+    Returns:
+        dict: {"searched_at", "credits_used", "cache_hits", "results": [
+              {"keyword", "source", "organic_results"} or {"keyword", "error"} per unique keyword]}
+    """
+    api_key = os.getenv("SERPAPI_KEY")
+
+    if not api_key:
+        return {"error": MISSING_KEY_ERROR}
+
+    return _batch_result(*_run_batch(keywords, api_key, force_refresh))
+
+async def get_organic_results_many_async(keywords: list, force_refresh: bool = False) -> dict:
+    """
+    Async variant of get_organic_results_many.
+
+    Args:
+        keywords (list): The keywords to search.
+        force_refresh (bool): Bypass the cache and search again.
+
+    Returns:
+        dict: Same shape as get_organic_results_many.
+    """
+    api_key = os.getenv("SERPAPI_KEY")
+
+    if not api_key:
+        return {"error": MISSING_KEY_ERROR}
+
+    return _batch_result(*await _run_batch_async(keywords, api_key, force_refresh))
+
+def get_serp_responses_many(keywords: list, force_refresh: bool = False) -> dict:
+    """
+    Like get_organic_results_many, but returns the full SerpApi response per keyword,
+    with the organic results of all pages down to SERPAPI_DEPTH (for tools/serp_mapper.py).
+
+    Returns:
+        dict: {normalized keyword: SerpApi response or {"error": ...}}, in input order.
+    """
+    api_key = os.getenv("SERPAPI_KEY")
+
+    if not api_key:
+        return {"error": MISSING_KEY_ERROR}
+
+    return _responses(*_run_batch(keywords, api_key, force_refresh))
+
+async def get_serp_responses_many_async(keywords: list, force_refresh: bool = False) -> dict:
+    """
+    Async variant of get_serp_responses_many.
+    """
+    api_key = os.getenv("SERPAPI_KEY")
+
+    if not api_key:
+        return {"error": MISSING_KEY_ERROR}
+
+    return _responses(*await _run_batch_async(keywords, api_key, force_refresh))
+
+async def get_serp_response_async(keyword: str, force_refresh: bool = False) -> dict:
+    """
+    Full (cached) SerpApi response for one keyword down to SERPAPI_DEPTH, or {"error": ...}.
+    """
+    api_key = os.getenv("SERPAPI_KEY")
+
+    if not api_key:
+        return {"error": MISSING_KEY_ERROR}
+
+    results, _ = await _search_async(normalize_keyword(keyword), api_key, force_refresh)
+    return results
+
 def get_indian_organic_results(keyword):
     """
     Fetches Top 10 Google Search results for India (English).
     Reads API key from environment variable 'SERPAPI_KEY'.
+    Results are cached for the day, so repeated searches spend no credits.
     Returns a JSON string.
     """
     
@@ -17,40 +435,29 @@ def get_indian_organic_results(keyword):
     api_key = os.getenv("SERPAPI_KEY")
     
     if not api_key:
-        return json.dumps({
-            "error": "Missing API Key. Please set SERPAPI_KEY in your .env file or environment variables."
-        })
+        return json.dumps({"error": MISSING_KEY_ERROR})
 
-    # 2. Configure for India (gl=in) and English (hl=en)
-    params = {
-        "engine": "google",
-        "q": keyword,
-        "api_key": api_key,
-        "num": 10,       # Request top 10
-        "gl": "in",      # Geo-location: India
-        "hl": "en",      # Language: English
-        "google_domain": "google.co.in" # Force Google India domain
-    }
+    # 2. Search (Google India, English) through the shared session and cache
+    results, _ = _search(normalize_keyword(keyword), api_key, depth=PAGE_SIZE)
+    if "error" in results:
+        return json.dumps({"error": results["error"]})
 
-    try:
-        client = Client(api_key=api_key)
-        results = client.search(params)
-        
-        # 3. specific extraction based on your provided structure
-        organic_results = results.get("organic_results", [])
-        
-        cleaned_data = []
-        
-        # We slice [:10] to ensure we only process the top 10
-        for item in organic_results[:10]:
-            entry = {
-                "position": item.get("position"),
-                "title": item.get("title"),
-                "url": item.get("link"), # Mapped from 'link' in your raw structure
-            }
-            cleaned_data.append(entry)
-
-        return json.dumps(cleaned_data, indent=2)
+    # 3. Extract the organic results
+    return json.dumps(_clean_results(results), indent=2)
 
-    except Exception as e:
-        return json.dumps({"error": str(e)})
\ No newline at end of file
+async def get_indian_organic_results_async(keyword: str) -> str:
+    """
+    Async variant of get_indian_organic_results: calls the SerpApi JSON endpoint
+    through the shared async HTTP client instead of the blocking serpapi.Client.
+    Fetches Top 10 Google Search results for India (English) and returns a JSON string.
+    """
+    api_key = os.getenv("SERPAPI_KEY")
+
+    if not api_key:
+        return json.dumps({"error": MISSING_KEY_ERROR})
+
+    results, _ = await _search_async(normalize_keyword(keyword), api_key, depth=PAGE_SIZE)
+    if "error" in results:
+        return json.dumps({"error": results["error"]})
+
+    return json.dumps(_clean_results(results), indent=2)
@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Optional
+
+from tools.ranking_monitor import get_serp_response_async, get_serp_responses_many_async, normalize_keyword
+from utils.domains import domain_of, is_domain
+
+# Fields copied as-is from the SerpApi response into the RankProfilerOutput sub-models
+METADATA_FIELDS = ("id", "status", "json_endpoint", "created_at", "processed_at", "google_url",
+                   "raw_html_file", "total_time_taken")
+PARAMETER_FIELDS = ("engine", "q", "google_domain", "hl", "gl", "num", "device")
+INFORMATION_FIELDS = ("organic_results_state", "query_displayed", "total_results", "time_taken_displayed")
+RESULT_FIELDS = ("position", "title", "link", "displayed_link", "snippet", "date", "redirect_link",
+                 "thumbnail", "cached_page_link", "related_pages_link")
+PAGINATION_FIELDS = ("current", "next", "previous", "other_pages")
+
+TOP_RESULTS = 10
+TOP_COMPETITORS = 3
+
+
+def _pick(data: Optional[Dict[str, Any]], fields) -> Dict[str, Any]:
+    data = data or {}
+    return {field: data[field] for field in fields if data.get(field) is not None}
+
+
+def _rich_snippet(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """SerpApi splits rich snippets into 'top'/'bottom' blocks; the first one present is kept."""
+    rich_snippet = item.get("rich_snippet") or {}
+    block = rich_snippet.get("top") or rich_snippet.get("bottom")
+    if not block:
+        return None
+    detected = block.get("detected_extensions") or {}
+    return {
+        "rating": detected.get("rating"),
+        "reviews": detected.get("reviews"),
+        "extensions": [str(extension) for extension in block.get("extensions") or []]
+    }
+
+
+def _organic_result(item: Dict[str, Any]) -> Dict[str, Any]:
+    result = _pick(item, RESULT_FIELDS)
+    result["rich_snippet"] = _rich_snippet(item)
+    about = item.get("about_this_result")
+    if about:
+        result["about_this_result"] = _pick(about, ("source", "keywords", "languages", "regions"))
+    inline = (item.get("sitelinks") or {}).get("inline")
+    if inline:
+        result["sitelinks"] = {"inline": [_pick(link, ("title", "link")) for link in inline]}
+    return result
+
+
+def _featured_snippet(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The answer box when it links to a page ("position zero"), else None."""
+    answer_box = response.get("answer_box") or {}
+    if not answer_box.get("link"):
+        return None
+    snippet = answer_box.get("snippet") or answer_box.get("answer")
+    if snippet is None and answer_box.get("list"):
+        snippet = "; ".join(str(entry) for entry in answer_box["list"])
+    return {
+        "position": 0,
+        "title": answer_box.get("title") or answer_box["link"],
+        "link": answer_box["link"],
+        "displayed_link": answer_box.get("displayed_link"),
+        "snippet": snippet,
+        "date": answer_box.get("date"),
+        "thumbnail": answer_box.get("thumbnail")
+    }
+
+
+def _pagination(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    google, serpapi = response.get("pagination") or {}, response.get("serpapi_pagination") or {}
+    if not google and not serpapi:
+        return None
+    pagination = _pick(google or serpapi, PAGINATION_FIELDS)
+    pagination["next_link"] = serpapi.get("next_link")
+    pagination["previous_link"] = serpapi.get("previous_link")
+    return pagination
+
+
+def _position(result: Dict[str, Any]) -> Dict[str, Any]:
+    """CompetitorPosition of an organic result."""
+    return {
+        "rank": result["position"],
+        "domain": domain_of(result["link"]),
+        "title": result["title"],
+        "url": result["link"],
+        "snippet": result.get("snippet")
+    }
+
+
+def _competitor_analysis(results: List[Dict[str, Any]], client_domain: str) -> List[Dict[str, Any]]:
+    """Positions held per competing domain in the top results, best domains first."""
+    positions: Dict[str, List[int]] = {}
+    for result in results:
+        domain = domain_of(result["link"])
+        if domain and not is_domain(domain, client_domain):
+            positions.setdefault(domain, []).append(result["position"])
+    return [
+        {
+            "domain": domain,
+            "keywords_ranking": 1,
+            "top_position": min(held),
+            "average_position": round(sum(held) / len(held), 2)
+        }
+        for domain, held in positions.items()
+    ]
+
+
+def _error_output(keyword: str, error: str) -> Dict[str, Any]:
+    return {
+        "metadata": {"status": "Error"},
+        "search_parameters": {"q": keyword},
+        "search_information": {},
+        "keyword": keyword,
+        "error": error,
+        "error_code": "SERPAPI_ERROR",
+        "recovery_suggestion": "Check SERPAPI_KEY and the remaining SerpApi credits, then rerun the rank profiler."
+    }
+
+
+def map_serp_response(keyword: str, response: Dict[str, Any], client_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Maps a raw SerpApi Google response onto the RankProfilerOutput schema, without an LLM.
+
+    Everything that can be read from the response is filled in: metadata, search
+    parameters/information, the top 10 organic results, featured snippet, pagination,
+    related searches, knowledge graph, the top 3 competitors and per-domain positions.
+    When 'client_url' is given, the client's own result (matched by domain, subdomains
+    included, anywhere in the fetched depth) sets current_client_position /
+    current_client_rank and is excluded from the competitors. The judgement fields (ranking_insights, market_saturation_level,
+    opportunity_score) are left empty for the optional LLM commentary.
+
+    Args:
+        keyword (str): The keyword that was searched.
+        response (dict): The SerpApi response (or {"error": ...}).
+        client_url (str): The client's website, e.g. the content of config/data/client_url.txt.
+
+    Returns:
+        dict: Keyword arguments for RankProfilerOutput.
+    """
+    if "error" in response:
+        return _error_output(keyword, response["error"])
+
+    client_domain = domain_of((client_url or "").strip())
+    results = [
+        item for item in response.get("organic_results", [])
+        if item.get("position") is not None and item.get("link") and item.get("title")
+    ]
+    organic = [_organic_result(item) for item in results[:TOP_RESULTS]]
+    competitors = [result for result in organic if not is_domain(domain_of(result["link"]), client_domain)]
+    # The client is looked up over all fetched pages (see SERPAPI_DEPTH), not only the top 10
+    client_result = next((result for result in results if is_domain(domain_of(result["link"]), client_domain)), None)
+    information = _pick(response.get("search_information"), INFORMATION_FIELDS)
+
+    return {
+        "metadata": _pick(response.get("search_metadata"), METADATA_FIELDS),
+        "search_parameters": _pick(response.get("search_parameters"), PARAMETER_FIELDS),
+        "search_information": information,
+        "keyword": keyword,
+        "organic_results": organic,
+        "pagination": _pagination(response),
+        "related_searches": [
+            _pick(search, ("query", "link")) for search in response.get("related_searches", [])
+            if search.get("query") and search.get("link")
+        ],
+        "featured_snippet": _featured_snippet(response),
+        "knowledge_graph": response.get("knowledge_graph"),
+        "top_3_competitors": [_position(result) for result in competitors[:TOP_COMPETITORS]],
+        "competitor_analysis": _competitor_analysis(organic, client_domain),
+        "ranking_insights": [],
+        "total_results": information.get("total_results"),
+        "current_client_position": client_result["position"] if client_result else None,
+        "current_client_rank": _position(client_result) if client_result else None
+    }
+
+
+async def analyze_keyword_rankings_async(keyword: str, client_url: Optional[str] = None,
+                                         force_refresh: bool = False) -> Dict[str, Any]:
+    """
+    Searches one keyword (cached, see ranking_monitor) and maps it with map_serp_response.
+    """
+    keyword = normalize_keyword(keyword)
+    return map_serp_response(keyword, await get_serp_response_async(keyword, force_refresh), client_url)
+
+
+async def analyze_keyword_rankings_many_async(keywords: List[str], client_url: Optional[str] = None,
+                                              force_refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Batch variant: one concurrent, de-duplicated SerpApi batch for all keywords.
+
+    Returns:
+        dict: {normalized keyword: RankProfilerOutput keyword arguments}, in input order.
+    """
+    responses = await get_serp_responses_many_async(keywords, force_refresh)
+    if isinstance(responses.get("error"), str):
+        responses = {normalize_keyword(keyword): responses for keyword in keywords}
+    return {keyword: map_serp_response(keyword, response, client_url) for keyword, response in responses.items()}
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+import numpy as np
+from sklearn.feature_extraction import FeatureHasher
+
+from tools.nlp_analyzer import (
+    MAX_NGRAM, MAX_TFIDF_NGRAM, TOP_N, fetch_content, fetch_content_async, page_tokens,
+    load_stop_words, STOP_WORD_LANGUAGES, _format_results
+)
+from tools.sitemap_fetcher import crawl_competitor_sitemaps, crawl_competitor_sitemaps_async
+from utils.process_pool import run_cpu_bound, run_cpu_bound_sync
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration (overridable through environment variables) ---
+SITE_MAX_PAGES = int(os.getenv("SITE_MAX_PAGES", "10"))        # Pages per site (homepage + sitemap URLs)
+SITE_CONCURRENCY = int(os.getenv("SITE_CONCURRENCY", "4"))     # Concurrent page fetches per site
+HASH_FEATURES = 2 ** 18                                        # Buckets per n-gram size
+CANDIDATES_PER_PAGE = 200                                      # Top terms of each page kept as candidates
+MAX_CANDIDATES = 5000                                          # Candidate terms kept per n-gram size
+
+
+class HashedNgramAccumulator:
+    """
+    Streaming, fixed-size n-gram counter for many pages.
+
+    Each page's n-grams are hashed into a fixed number of buckets (counts and
+    document frequencies), so memory does not grow with the number of pages
+    crawled. Term strings are only kept for a bounded set of candidates (the
+    most frequent n-grams of each page) so the top terms can be reported by name.
+    Counts are exact unless two n-grams share a bucket (rare at 2**18 buckets).
+    """
+
+    def __init__(self, n_features: int = HASH_FEATURES, max_n: int = MAX_NGRAM,
+                 candidates_per_page: int = CANDIDATES_PER_PAGE, max_candidates: int = MAX_CANDIDATES):
+        self.max_n = max_n
+        self.candidates_per_page = candidates_per_page
+        self.max_candidates = max_candidates
+        self._hasher = FeatureHasher(n_features=n_features, input_type="string", alternate_sign=False)
+        self._stop_words = frozenset().union(*(load_stop_words(lang) for lang in STOP_WORD_LANGUAGES))
+
+        self.counts = np.zeros((max_n, n_features), dtype=np.int64)
+        self.doc_freq = np.zeros((max_n, n_features), dtype=np.int32)
+        self.totals = np.zeros(max_n, dtype=np.int64)
+        self.pages = 0
+        self._candidates: List[Dict[str, None]] = [{} for _ in range(max_n)]
+
+    def add(self, tokens: List[str]) -> None:
+        """Adds one page (its token list, see nlp_analyzer.page_tokens)."""
+        tokens = [token for token in tokens if token not in self._stop_words]
+        if not tokens:
+            return
+        self.pages += 1
+
+        for n in range(1, self.max_n + 1):
+            grams = tokens if n == 1 else [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+            if not grams:
+                continue
+            row = self._hasher.transform([grams])
+            self.counts[n - 1, row.indices] += row.data.astype(np.int64)
+            self.doc_freq[n - 1, row.indices] += 1
+            self.totals[n - 1] += len(grams)
+
+            candidates = self._candidates[n - 1]
+            candidates.update((term, None) for term, _ in Counter(grams).most_common(self.candidates_per_page))
+            if len(candidates) > 2 * self.max_candidates:
+                self._prune(n)
+
+    def _buckets(self, terms: List[str]) -> np.ndarray:
+        return self._hasher.transform([[term] for term in terms]).indices
+
+    def _prune(self, n: int) -> None:
+        """Keeps the max_candidates candidates with the highest counts so far."""
+        terms = list(self._candidates[n - 1])
+        counts = self.counts[n - 1, self._buckets(terms)]
+        keep = np.argsort(counts, kind="stable")[::-1][:self.max_candidates]
+        self._candidates[n - 1] = {terms[i]: None for i in sorted(keep)}
+
+    def ngram_density(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Site-level counts and densities, same structure as nlp_analyzer._get_ngram_density."""
+        density_results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for n in range(1, self.max_n + 1):
+            terms = list(self._candidates[n - 1])
+            total = int(self.totals[n - 1])
+            site_ngram_data: Dict[str, Dict[str, Any]] = {}
+            if terms:
+                counts = self.counts[n - 1, self._buckets(terms)]
+                for idx in np.argsort(counts, kind="stable")[::-1][:TOP_N]:
+                    count = int(counts[idx])
+                    if count > 0:
+                        site_ngram_data[terms[idx]] = {
+                            "count": count,
+                            "density": round(count / total, 5) if total > 0 else 0
+                        }
+            density_results[f"{n}gram"] = site_ngram_data
+        return density_results
+
+    def tfidf_scores(self) -> Dict[str, float]:
+        """
+        Site-level TF-IDF (1- to 3-grams): site-wide term counts weighted by a smooth
+        IDF over the crawled pages, l2-normalized like TfidfTransformer. Terms that
+        appear on every page (leftover boilerplate) are weighted down.
+        """
+        if not self.pages:
+            return {}
+        max_n = min(MAX_TFIDF_NGRAM, self.max_n)
+        idf = np.log((1 + self.pages) / (1 + self.doc_freq[:max_n])) + 1
+        weights = self.counts[:max_n] * idf
+        norm = np.sqrt(np.square(weights).sum())
+        if norm == 0:
+            return {}
+
+        terms, scores = [], []
+        for n in range(1, max_n + 1):
+            ngram_terms = list(self._candidates[n - 1])
+            if ngram_terms:
+                terms.extend(ngram_terms)
+                scores.append(weights[n - 1, self._buckets(ngram_terms)] / norm)
+        if not terms:
+            return {}
+        scores = np.concatenate(scores)
+
+        top_terms: Dict[str, float] = {}
+        for idx in np.argsort(scores, kind="stable")[::-1][:TOP_N]:
+            score = round(float(scores[idx]), 4)
+            if score > 0:
+                top_terms[terms[idx]] = score
+        return top_terms
+
+
+def _site_page_urls(base_url: str, sitemap: Dict[str, Any], max_pages: int) -> List[str]:
+    """
+    Homepage first, then the most recently modified sitemap URLs, then (for sitemaps
+    with few or no <lastmod> dates) an evenly spaced sample of the other collected
+    URLs, so the pages come from every part of the site. Deduplicated.
+    """
+    urls = list(dict.fromkeys([base_url] + [entry["url"] for entry in sitemap.get("recent", [])]))
+    others = [entry["url"] for entry in sitemap.get("urls", []) if entry["url"] not in urls]
+    missing = max_pages - len(urls)
+    if missing > 0 and others:
+        step = max(1, len(others) // missing)
+        urls.extend(others[::step][:missing])
+    return urls[:max_pages]
+
+
+def _site_result(base_url: str, accumulator: HashedNgramAccumulator, urls: List[str]) -> Dict[str, Any]:
+    if not accumulator.pages:
+        return {"status": "error", "message": f"Could not fetch content for any page of {base_url}"}
+
+    result = _format_results(base_url, accumulator.tfidf_scores(), accumulator.ngram_density())
+    result["pages_analyzed"] = accumulator.pages
+    result["pages"] = urls
+    return result
+
+
+def _fetch_page_tokens(url: str) -> List[str]:
+    raw_html = fetch_content(url)
+    return run_cpu_bound_sync(page_tokens, raw_html) if raw_html else []
+
+
+def analyze_site(base_url: str, max_pages: int = SITE_MAX_PAGES) -> Dict[str, Any]:
+    """
+    Multi-page variant of analyze_content: analyzes the homepage plus the most
+    recently updated URLs from the site's sitemap (or a sample of its URLs when
+    they carry no <lastmod>), as one site-level profile.
+
+    Pages are fetched with bounded concurrency and streamed one by one into a
+    fixed-size hashed accumulator, so memory stays flat however many pages are
+    crawled.
+
+    Args:
+        base_url (str): The home URL of the site.
+        max_pages (int): Maximum number of pages to analyze (homepage included).
+
+    Returns:
+        dict: Same shape as analyze_content (url, status, tf_idf_top_50_sorted,
+              keyword_density_sorted_by_count), plus 'pages_analyzed' and 'pages'.
+    """
+    sitemap = crawl_competitor_sitemaps(base_url, top_n=max_pages)
+    urls = _site_page_urls(base_url, sitemap, max_pages)
+
+    accumulator = HashedNgramAccumulator()
+    with ThreadPoolExecutor(max_workers=SITE_CONCURRENCY) as executor:
+        futures = {executor.submit(_fetch_page_tokens, url): url for url in urls}
+        for future in as_completed(futures):
+            try:
+                accumulator.add(future.result())
+            except Exception as e:
+                logger.warning("Skipping %s: %s", futures[future], e)
+
+    return _site_result(base_url, accumulator, urls)
+
+
+async def analyze_site_async(base_url: str, max_pages: int = SITE_MAX_PAGES) -> Dict[str, Any]:
+    """
+    Async variant of analyze_site, for agents running inside a ParallelAgent.
+    """
+    sitemap = await crawl_competitor_sitemaps_async(base_url, top_n=max_pages)
+    urls = _site_page_urls(base_url, sitemap, max_pages)
+    semaphore = asyncio.Semaphore(SITE_CONCURRENCY)
+
+    async def page_tokens_for(url: str) -> List[str]:
+        async with semaphore:
+            raw_html = await fetch_content_async(url)
+        return await run_cpu_bound(page_tokens, raw_html) if raw_html else []
+
+    accumulator = HashedNgramAccumulator()
+    for next_page in asyncio.as_completed([page_tokens_for(url) for url in urls]):
+        try:
+            accumulator.add(await next_page)
+        except Exception as e:
+            logger.warning("Skipping a page of %s: %s", base_url, e)
+
+    return _site_result(base_url, accumulator, urls)
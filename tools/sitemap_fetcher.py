@@ -1,43 +1,384 @@
+import asyncio
+import httpx
 import requests
 import logging
-from urllib.parse import urljoin
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlsplit
+from xml.etree.ElementTree import ParseError
+
+from utils.http_cache import get_http_cache
+from utils.http_client import get_http_session, get_async_http_client
+from tools.sitemap_parser import SitemapStreamParser, merge_parsed_sitemaps, build_sitemap_report, build_error_report
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def fetch_competitor_sitemap(base_url: str) -> str:
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+CHUNK_SIZE = 64 * 1024
+
+# Sitemap protocol limits (https://www.sitemaps.org/protocol.html)
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+MAX_SITEMAP_URLS = 50_000
+
+
+# Errors that make a single sitemap unreadable without aborting the crawl: network and HTTP
+# errors, bad <loc> URLs (httpx.InvalidURL, ValueError), broken XML or gzip, and OSError
+# (e.g. a cached body evicted between the revalidation and the read)
+SITEMAP_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError, httpx.InvalidURL, ParseError,
+                  zlib.error, OSError, ValueError)
+
+
+class _SitemapDecoder:
+    """
+    Turns raw body chunks into XML bytes: gzip files (.xml.gz) are detected by their
+    magic bytes and inflated in streaming fashion, and the uncompressed size is capped:
+    bytes beyond 'max_bytes' are dropped and 'truncated' is set.
+    """
+
+    def __init__(self, sitemap_url: str, max_bytes: int = MAX_SITEMAP_BYTES):
+        self.sitemap_url = sitemap_url
+        self.max_bytes = max_bytes
+        self.decoded_bytes = 0
+        self.truncated = False
+        self._decompressor = None
+        self._first_chunk = True
+
+    def decode(self, chunk: bytes) -> bytes:
+        if self._first_chunk:
+            self._first_chunk = False
+            if chunk[:2] == b"\x1f\x8b":
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        if self._decompressor is not None:
+            # Cap the output so a gzip bomb cannot exceed the byte limit
+            chunk = self._decompressor.decompress(chunk, self.max_bytes - self.decoded_bytes + 1)
+
+        remaining = self.max_bytes - self.decoded_bytes
+        if len(chunk) > remaining:
+            logger.warning(f"{self.sitemap_url} exceeds {self.max_bytes} bytes uncompressed; truncated")
+            self.truncated = True
+            chunk = chunk[:remaining]
+        self.decoded_bytes += len(chunk)
+        return chunk
+
+
+def _summary_key(parser: SitemapStreamParser) -> str:
+    """Name under which a parse summary is stored alongside the cached sitemap body."""
+    return f"sitemap_summary:{parser.top_n}:{parser.max_entries}:{parser.collect_urls}"
+
+
+def stream_sitemap(sitemap_url: str, parser: SitemapStreamParser, max_bytes: int = MAX_SITEMAP_BYTES) -> dict:
+    """
+    Downloads a sitemap and feeds it into 'parser' chunk by chunk.
+    Gzip files (.xml.gz) are detected by their magic bytes and decompressed in
+    streaming fashion. Stops early once the parser has reached its entry limit.
+    Downloads go through the conditional-GET HTTP cache, and the parse summary of
+    an unchanged sitemap is reused without re-parsing. A body larger than
+    'max_bytes' uncompressed is parsed up to the limit and flagged 'truncated'.
+
+    Raises:
+        requests.exceptions.RequestException: On network / HTTP errors.
+        zlib.error: If a gzip body is corrupt.
+        xml.etree.ElementTree.ParseError: If the body is not valid XML.
+    """
+    response = get_http_cache().open(sitemap_url, headers=HEADERS, timeout=15)
+
+    # Unchanged sitemaps (304 Not Modified) reuse the stored parse result
+    cached_summary = response.load_derived(_summary_key(parser))
+    if cached_summary is not None:
+        return cached_summary
+
+    decoder = _SitemapDecoder(sitemap_url, max_bytes)
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        parser.feed(decoder.decode(chunk))
+        parser.truncated = parser.truncated or decoder.truncated
+        if parser.truncated:
+            # Truncated bodies are not committed to the cache
+            return parser.result()
+
+    summary = parser.close()
+    response.store_derived(_summary_key(parser), summary)
+    return summary
+
+
+async def stream_sitemap_async(sitemap_url: str, parser: SitemapStreamParser, max_bytes: int = MAX_SITEMAP_BYTES) -> dict:
+    """
+    Async variant of stream_sitemap. Parsing runs in a worker thread so large
+    sitemaps do not stall the event loop.
+
+    Raises:
+        httpx.HTTPError: On network / HTTP errors.
+        zlib.error: If a gzip body is corrupt.
+        xml.etree.ElementTree.ParseError: If the body is not valid XML.
+    """
+    response = await get_http_cache().open_async(sitemap_url, headers=HEADERS, timeout=15)
+
+    cached_summary = response.load_derived(_summary_key(parser))
+    if cached_summary is not None:
+        return cached_summary
+
+    decoder = _SitemapDecoder(sitemap_url, max_bytes)
+    chunks = response.aiter_content(chunk_size=CHUNK_SIZE)
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(parser.feed, decoder.decode(chunk))
+            parser.truncated = parser.truncated or decoder.truncated
+            if parser.truncated:
+                return parser.result()
+    finally:
+        await chunks.aclose()
+
+    summary = await asyncio.to_thread(parser.close)
+    response.store_derived(_summary_key(parser), summary)
+    return summary
+
+
+def _parse_robots_sitemaps(robots_txt: str) -> list:
+    """Extracts the 'Sitemap:' URLs from a robots.txt body, in order and without duplicates."""
+    sitemaps = []
+    for line in robots_txt.splitlines():
+        key, _, value = line.partition(':')
+        if key.strip().lower() == 'sitemap' and value.strip():
+            sitemap_url = value.strip()
+            if sitemap_url not in sitemaps:
+                sitemaps.append(sitemap_url)
+    return sitemaps
+
+
+def discover_sitemaps(base_url: str) -> list:
+    """
+    Returns the sitemap URLs advertised in the site's robots.txt ('Sitemap:' lines),
+    falling back to '<base_url>/sitemap.xml' when none are listed.
+    """
+    if not base_url.endswith('/'):
+        base_url += '/'
+
+    sitemaps = []
+    try:
+        response = get_http_session().get(urljoin(base_url, 'robots.txt'), headers=HEADERS, timeout=10)
+        if response.status_code == 200:
+            sitemaps = _parse_robots_sitemaps(response.text)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Could not read robots.txt for {base_url}: {e}")
+
+    return sitemaps or [urljoin(base_url, 'sitemap.xml')]
+
+
+async def discover_sitemaps_async(base_url: str) -> list:
+    """Async variant of discover_sitemaps."""
+    if not base_url.endswith('/'):
+        base_url += '/'
+
+    sitemaps = []
+    try:
+        response = await get_async_http_client().get(urljoin(base_url, 'robots.txt'), headers=HEADERS, timeout=10)
+        if response.status_code == 200:
+            sitemaps = _parse_robots_sitemaps(response.text)
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not read robots.txt for {base_url}: {e}")
+
+    return sitemaps or [urljoin(base_url, 'sitemap.xml')]
+
+
+def _merge_crawl(indexes: list, children: list, errors: list, top_n: int, skipped: set = frozenset()) -> dict:
+    """
+    Combines the sitemap indexes and child sitemaps read during a crawl into one
+    summary. Several plain sitemaps (e.g. listed in robots.txt) without an index are
+    merged too, but not reported as a sitemap index. 'skipped' are the sitemaps left
+    out once max_sitemaps was reached; they are counted in 'sitemaps_skipped'.
+    """
+    if not indexes and len(children) <= 1:
+        merged = children[0] if children else SitemapStreamParser(collect_urls=True).result()
+    else:
+        index = {
+            "root_tag": "sitemapindex" if indexes else "urlset",
+            "bytes_parsed": sum(parsed["bytes_parsed"] for parsed in indexes),
+            "truncated": any(parsed["truncated"] for parsed in indexes),
+            "sitemap_indexes": [entry for parsed in indexes for entry in parsed["sitemap_indexes"]],
+        }
+        merged = merge_parsed_sitemaps(index, children, top_n=top_n)
+        merged["is_sitemap_index"] = bool(indexes)
+
+    merged["index_files"] = len(indexes)
+    merged["sitemaps_skipped"] = len(skipped)
+    merged["errors"] = errors
+    return merged
+
+
+def crawl_competitor_sitemaps(base_url: str, top_n: int = 5, max_sitemaps: int = 200,
+                              per_host_concurrency: int = 4, max_workers: int = 16) -> dict:
     """
-    Fetches the sitemap XML content for a given competitor URL.
-    
+    Discovers the competitor's sitemaps and recursively follows sitemap indexes.
+
+    Child sitemaps are fetched concurrently, with at most 'per_host_concurrency'
+    simultaneous requests per host. Each file is capped at the protocol limits
+    (50 MB uncompressed, 50,000 URLs); oversized files are truncated, not dropped.
+
     Args:
         base_url (str): The home URL of the competitor.
+        top_n (int): Number of most recently modified URLs to keep.
+        max_sitemaps (int): Upper bound on the number of sitemap files fetched; the
+            sitemaps left out are counted in 'sitemaps_skipped'.
+        per_host_concurrency (int): Concurrent requests allowed per host.
+        max_workers (int): Size of the shared download thread pool.
 
     Returns:
-        str: The raw XML content of the sitemap, or an error message.
+        dict: A merged parse summary (see sitemap_parser.merge_parsed_sitemaps) with
+              the de-duplicated 'urls' list, plus 'errors' for sitemaps that failed.
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    host_limits = {}
+    host_limits_lock = threading.Lock()
 
-    # Ensure base_url ends with /
-    if not base_url.endswith('/'):
-        base_url += '/'
-        
-    sitemap_url = urljoin(base_url, 'sitemap.xml')
-    logger.info(f"Fetching raw sitemap from: {sitemap_url}")
+    def fetch(sitemap_url: str) -> dict:
+        host = urlsplit(sitemap_url).netloc
+        with host_limits_lock:
+            limit = host_limits.setdefault(host, threading.Semaphore(per_host_concurrency))
+        with limit:
+            logger.info(f"Streaming sitemap from: {sitemap_url}")
+            parser = SitemapStreamParser(top_n=top_n, collect_urls=True, max_entries=MAX_SITEMAP_URLS)
+            return stream_sitemap(sitemap_url, parser)
+
+    seen = set()
+    skipped = set()
+    indexes = []
+    children = []
+    errors = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def submit(sitemap_url: str):
+            if sitemap_url in seen:
+                return
+            if len(seen) >= max_sitemaps:
+                skipped.add(sitemap_url)
+                return
+            seen.add(sitemap_url)
+            pending[executor.submit(fetch, sitemap_url)] = sitemap_url
+
+        try:
+            for sitemap_url in discover_sitemaps(base_url):
+                submit(sitemap_url)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    sitemap_url = pending.pop(future)
+                    try:
+                        parsed = future.result()
+                    except SITEMAP_ERRORS as e:
+                        logger.error(f"Failed to read sitemap {sitemap_url}: {e}")
+                        errors.append({"url": sitemap_url, "error": str(e)})
+                        continue
+
+                    if parsed["is_sitemap_index"]:
+                        indexes.append(parsed)
+                        for entry in parsed["sitemap_indexes"]:
+                            submit(entry["url"])
+                    else:
+                        children.append(parsed)
+        finally:
+            # An unexpected error aborts the crawl: do not start the queued downloads
+            for future in pending:
+                future.cancel()
+
+    return _merge_crawl(indexes, children, errors, top_n, skipped)
+
+
+async def crawl_competitor_sitemaps_async(base_url: str, top_n: int = 5, max_sitemaps: int = 200,
+                                          per_host_concurrency: int = 4) -> dict:
+    """
+    Async variant of crawl_competitor_sitemaps, built on the shared async HTTP client.
+    Per-host concurrency is bounded with one asyncio.Semaphore per host.
+    """
+    host_limits = {}
+
+    async def fetch(sitemap_url: str) -> dict:
+        limit = host_limits.setdefault(urlsplit(sitemap_url).netloc, asyncio.Semaphore(per_host_concurrency))
+        async with limit:
+            logger.info(f"Streaming sitemap from: {sitemap_url}")
+            parser = SitemapStreamParser(top_n=top_n, collect_urls=True, max_entries=MAX_SITEMAP_URLS)
+            return await stream_sitemap_async(sitemap_url, parser)
+
+    seen = set()
+    skipped = set()
+    indexes = []
+    children = []
+    errors = []
+    pending = {}
+
+    def submit(sitemap_url: str):
+        if sitemap_url in seen:
+            return
+        if len(seen) >= max_sitemaps:
+            skipped.add(sitemap_url)
+            return
+        seen.add(sitemap_url)
+        pending[asyncio.create_task(fetch(sitemap_url))] = sitemap_url
 
     try:
-        response = requests.get(sitemap_url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        # Check if the content is actually XML (basic check)
-        if "<" not in response.text:
-             return f"Error: The content at {sitemap_url} does not look like XML."
+        for sitemap_url in await discover_sitemaps_async(base_url):
+            submit(sitemap_url)
 
-        # Return the raw XML string for the LLM to parse
-        return response.text
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                sitemap_url = pending.pop(task)
+                try:
+                    parsed = task.result()
+                except SITEMAP_ERRORS as e:
+                    logger.error(f"Failed to read sitemap {sitemap_url}: {e}")
+                    errors.append({"url": sitemap_url, "error": str(e)})
+                    continue
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to fetch sitemap for {base_url}: {e}")
-        return f"Error: Could not fetch sitemap. {str(e)}"
\ No newline at end of file
+                if parsed["is_sitemap_index"]:
+                    indexes.append(parsed)
+                    for entry in parsed["sitemap_indexes"]:
+                        submit(entry["url"])
+                else:
+                    children.append(parsed)
+    finally:
+        # An unexpected error (or cancellation) aborts the crawl: stop the other downloads
+        for task in pending:
+            task.cancel()
+
+    return _merge_crawl(indexes, children, errors, top_n, skipped)
+
+
+def _build_report(base_url: str, parsed: dict) -> dict:
+    if parsed["root_tag"] is None:
+        errors = "; ".join(f"{error['url']}: {error['error']}" for error in parsed["errors"])
+        return build_error_report(base_url, f"Error: Could not fetch sitemap. {errors}")
+
+    return build_sitemap_report(parsed, base_url)
+
+
+def analyze_competitor_sitemap(base_url: str, top_n: int = 5) -> dict:
+    """
+    Crawls and parses the competitor's sitemaps natively (no LLM involved).
+
+    Sitemaps are discovered via robots.txt, sitemap indexes are followed and
+    gzip children decompressed; XML is parsed chunk by chunk while it downloads.
+
+    Args:
+        base_url (str): The home URL of the competitor.
+        top_n (int): Number of most recently modified URLs to return.
+
+    Returns:
+        dict: The deterministic fields of CompetitorUpdateCheckerOutput
+              (metadata, recent_updates, sitemap_indexes, raw_xml_summary),
+              plus 'top_sections' with the largest URL path sections.
+    """
+    return _build_report(base_url, crawl_competitor_sitemaps(base_url, top_n=top_n))
+
+
+async def analyze_competitor_sitemap_async(base_url: str, top_n: int = 5) -> dict:
+    """
+    Async variant of analyze_competitor_sitemap, for agents running inside a ParallelAgent.
+    """
+    return _build_report(base_url, await crawl_competitor_sitemaps_async(base_url, top_n=top_n))
@@ -0,0 +1,370 @@
+import heapq
+import xml.etree.ElementTree as ET
+from collections import Counter
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+MAX_SECTIONS = 1000  # Distinct URL path sections counted per summary
+
+
+@lru_cache(maxsize=8192)
+def _parse_lastmod(value: str) -> Optional[float]:
+    """
+    Parses a W3C datetime <lastmod> value into a UTC epoch timestamp.
+    Accepts "YYYY", "YYYY-MM", "YYYY-MM-DD" and full ISO 8601 datetimes.
+    Returns None for values that cannot be parsed.
+
+    Sitemaps repeat the same handful of dates thousands of times, so results
+    are memoized: each distinct string is only parsed once per process.
+    """
+    value = value.strip()
+    if not value:
+        return None
+
+    # Pad reduced-precision W3C dates ("2025" / "2025-03") to a full date
+    if len(value) == 4:
+        value += "-01-01"
+    elif len(value) == 7:
+        value += "-01"
+
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class _Descending:
+    """Wraps a string so that heap ordering treats it in reverse (alphabetical tiebreaker)."""
+    __slots__ = ("value",)
+
+    def __init__(self, value: str):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return self.value > other.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+def _local_name(tag: str) -> str:
+    """Strips the XML namespace from a tag: '{ns}url' -> 'url'."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _section(url: str) -> str:
+    """First path segment of a URL: 'https://a.com/blog/post' -> 'blog' ('(root)' for the homepage)."""
+    path = urlsplit(url).path.strip('/')
+    return path.split('/', 1)[0] if path else "(root)"
+
+
+class SitemapStreamParser:
+    """
+    Incremental sitemap parser. Feed it raw bytes as they arrive from the network
+    and call close() to get the summary. Each <url>/<sitemap> element is discarded
+    as soon as it has been processed, so memory stays bounded regardless of the
+    sitemap size; only the top-N most recent URLs are retained (min-heap).
+
+    Set 'collect_urls' to also keep every (url, lastmod) pair, e.g. when merging
+    several sitemaps. Entries beyond 'max_entries' are ignored and flag 'truncated'.
+    """
+
+    def __init__(self, top_n: int = 5, max_sections: int = MAX_SECTIONS, collect_urls: bool = False, max_entries: Optional[int] = None):
+        self.top_n = top_n
+        self.max_sections = max_sections
+        self.collect_urls = collect_urls
+        self.max_entries = max_entries
+
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._loc: Optional[str] = None
+        self._lastmod: Optional[str] = None
+
+        self.root_tag: Optional[str] = None
+        self.total_entries = 0
+        self.entries_with_lastmod = 0
+        self.bytes_parsed = 0
+        self.truncated = False
+        self.urls: List[Dict[str, Optional[str]]] = []
+        self.sections: Counter = Counter()
+        self.sitemap_indexes: List[Dict[str, Optional[str]]] = []
+        self._recent_heap: List[Tuple[float, _Descending, str, str]] = []
+
+    def feed(self, chunk: bytes) -> None:
+        """Feeds the next chunk of XML bytes into the parser."""
+        self.bytes_parsed += len(chunk)
+        self._parser.feed(chunk)
+        self._drain()
+
+    def close(self) -> Dict[str, Any]:
+        """Flushes the parser and returns the collected summary."""
+        self._parser.close()
+        self._drain()
+        return self.result()
+
+    def _drain(self) -> None:
+        for event, elem in self._parser.read_events():
+            tag = _local_name(elem.tag)
+
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                    self.root_tag = tag
+                elif tag in ("url", "sitemap"):
+                    self._loc = None
+                    self._lastmod = None
+                continue
+
+            # event == "end"
+            if tag == "loc":
+                self._loc = (elem.text or "").strip()
+            elif tag == "lastmod":
+                self._lastmod = (elem.text or "").strip() or None
+            elif tag in ("url", "sitemap") and elem is not self._root:
+                self._handle_entry(tag)
+                # Drop the processed element (and its children) from the tree
+                self._root.clear()
+
+    def _handle_entry(self, tag: str) -> None:
+        if not self._loc:
+            return
+        if self.max_entries is not None and self.total_entries >= self.max_entries:
+            self.truncated = True
+            return
+
+        self.total_entries += 1
+        if self._lastmod:
+            self.entries_with_lastmod += 1
+
+        if tag == "sitemap":
+            self.sitemap_indexes.append({"url": self._loc, "last_modified": self._lastmod})
+            return
+        if self.collect_urls:
+            self.urls.append({"url": self._loc, "last_modified": self._lastmod})
+
+        section = _section(self._loc)
+        if section in self.sections or len(self.sections) < self.max_sections:
+            self.sections[section] += 1
+
+        timestamp = _parse_lastmod(self._lastmod) if self._lastmod else None
+        if timestamp is None:
+            return
+
+        # Newest first, alphabetical tiebreaker: keep the N "largest" keys in a min-heap
+        item = (timestamp, _Descending(self._loc), self._loc, self._lastmod)
+        if len(self._recent_heap) < self.top_n:
+            heapq.heappush(self._recent_heap, item)
+        elif item[:2] > self._recent_heap[0][:2]:
+            heapq.heapreplace(self._recent_heap, item)
+
+    def result(self) -> Dict[str, Any]:
+        """Returns the summary collected so far."""
+        recent = sorted(self._recent_heap, key=lambda item: item[:2], reverse=True)
+        result = {
+            "root_tag": self.root_tag,
+            "is_sitemap_index": self.root_tag == "sitemapindex",
+            "total_entries": self.total_entries,
+            "entries_with_lastmod": self.entries_with_lastmod,
+            "bytes_parsed": self.bytes_parsed,
+            "truncated": self.truncated,
+            "recent": [
+                {"url": url, "last_modified": lastmod, "timestamp": timestamp}
+                for timestamp, _, url, lastmod in recent
+            ],
+            "sitemap_indexes": self.sitemap_indexes,
+            "top_sections": self.sections.most_common(10),
+            "sections": dict(self.sections),
+        }
+        if self.collect_urls:
+            result["urls"] = self.urls
+        return result
+
+
+def merge_parsed_sitemaps(index: Dict[str, Any], children: List[Dict[str, Any]], top_n: int = 5) -> Dict[str, Any]:
+    """
+    Combines the summaries of the child sitemaps of a sitemap index into a single
+    summary with the same shape as SitemapStreamParser.result(), plus the merged
+    'urls' list. Each distinct URL is counted once, with its newest lastmod (also
+    in 'recent'); sections are counted over all merged URLs, not just each child's
+    top 10. The index's own <sitemap> entries are kept as-is.
+    """
+    recent: Dict[str, Dict[str, Any]] = {}
+    merged: Dict[str, Optional[str]] = {}
+
+    for child in children:
+        for entry in child["recent"]:
+            if entry["url"] not in recent or entry["timestamp"] > recent[entry["url"]]["timestamp"]:
+                recent[entry["url"]] = entry
+        for entry in child.get("urls", []):
+            url, lastmod = entry["url"], entry["last_modified"]
+            # Keep the newest lastmod when a URL is listed in several sitemaps
+            if url not in merged or (lastmod and (_parse_lastmod(lastmod) or 0) > (_parse_lastmod(merged[url] or "") or 0)):
+                merged[url] = lastmod
+
+    if all("urls" in child for child in children):
+        sections = Counter(_section(url) for url in merged)
+    else:
+        # Summaries without their URL lists: add up the full per-child counters
+        sections = Counter()
+        for child in children:
+            sections.update(child.get("sections") or dict(child["top_sections"]))
+
+    recent = heapq.nlargest(top_n, recent.values(), key=lambda entry: (entry["timestamp"], _Descending(entry["url"])))
+
+    return {
+        "root_tag": index["root_tag"],
+        "is_sitemap_index": True,
+        "total_entries": len(merged),
+        "entries_with_lastmod": sum(1 for lastmod in merged.values() if lastmod),
+        "bytes_parsed": index["bytes_parsed"] + sum(child["bytes_parsed"] for child in children),
+        "truncated": index["truncated"] or any(child["truncated"] for child in children),
+        "recent": recent,
+        "sitemap_indexes": index["sitemap_indexes"],
+        "sitemaps_crawled": len(children),
+        "top_sections": sections.most_common(10),
+        "sections": dict(sections.most_common(MAX_SECTIONS)),
+        "urls": [{"url": url, "last_modified": lastmod} for url, lastmod in merged.items()],
+    }
+
+
+def _summarize(parsed: Dict[str, Any]) -> str:
+    """Builds the deterministic 'raw_xml_summary' sentence for a parsed sitemap."""
+    total = parsed["total_entries"]
+    with_dates = parsed["entries_with_lastmod"]
+    errors = parsed.get("errors") or []
+    failed = f" {len(errors)} sitemap(s) could not be read." if errors else ""
+    if parsed.get("sitemaps_skipped"):
+        failed += f" {parsed['sitemaps_skipped']} more sitemap(s) were not crawled (crawl limit reached)."
+
+    if parsed.get("sitemaps_crawled") and parsed.get("index_files"):
+        summary = (f"{parsed['index_files']} sitemap index(es) with {len(parsed['sitemap_indexes'])} sub-sitemaps; "
+                   f"{parsed['sitemaps_crawled']} crawled, covering {total} URLs")
+    elif parsed.get("sitemaps_crawled"):
+        summary = f"{parsed['sitemaps_crawled']} standard sitemaps covering {total} URLs"
+    elif parsed["is_sitemap_index"]:
+        summary = f"Sitemap index with {total} sub-sitemaps"
+    else:
+        summary = f"Standard sitemap with {total} URLs"
+
+    if total == 0:
+        return summary + "." + failed
+    if with_dates == total:
+        summary += ", all containing lastmod timestamps."
+    elif with_dates:
+        summary += f", {with_dates} of which contain lastmod timestamps."
+    else:
+        summary += " without lastmod timestamps."
+
+    if parsed.get("truncated"):
+        summary += " Some sitemaps exceeded the 50,000 URL / 50 MB protocol limits and were truncated."
+
+    if parsed["top_sections"]:
+        sections = ", ".join(f"/{name} ({count})" for name, count in parsed["top_sections"][:5])
+        summary += f" Largest sections: {sections}."
+    return summary + failed
+
+
+def build_sitemap_report(parsed: Dict[str, Any], target_url: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Maps a SitemapStreamParser summary to the deterministic part of
+    CompetitorUpdateCheckerOutput (everything except 'strategy_insights').
+    """
+    now = now or datetime.now(timezone.utc)
+    today = now.date()
+
+    recent_updates = []
+    for rank, entry in enumerate(parsed["recent"], start=1):
+        modified = datetime.fromtimestamp(entry["timestamp"], tz=timezone.utc).date()
+        recent_updates.append({
+            "rank": rank,
+            "url": entry["url"],
+            "last_modified": modified.isoformat(),
+            "days_ago": max((today - modified).days, 0)
+        })
+
+    return {
+        "metadata": {
+            "target_url": target_url,
+            "is_sitemap_index": parsed["is_sitemap_index"],
+            "total_entries": parsed["total_entries"],
+            "analysis_date": now.isoformat(),
+            "timestamps_available": parsed["entries_with_lastmod"] > 0
+        },
+        "recent_updates": recent_updates,
+        "sitemap_indexes": parsed["sitemap_indexes"],
+        "raw_xml_summary": _summarize(parsed),
+        "top_sections": [{"section": name, "url_count": count} for name, count in parsed["top_sections"]]
+    }
+
+
+def build_error_report(target_url: str, message: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Deterministic report for a sitemap that could not be fetched or parsed."""
+    now = now or datetime.now(timezone.utc)
+    return {
+        "metadata": {
+            "target_url": target_url,
+            "is_sitemap_index": False,
+            "total_entries": 0,
+            "analysis_date": now.isoformat(),
+            "timestamps_available": False
+        },
+        "recent_updates": [],
+        "sitemap_indexes": [],
+        "raw_xml_summary": message,
+        "top_sections": []
+    }
+
+
+def assess_content_strategy(report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rule-based 'strategy_insights' (ContentStrategy) for a sitemap report, following
+    the thresholds of the competitor update checker instructions. Used when no LLM
+    writes the insights (direct pipeline mode, or the agent returned nothing).
+    """
+    if report["raw_xml_summary"].startswith("Error"):
+        return {
+            "update_frequency_assessment": "stale",
+            "primary_content_focus": None,
+            "is_actively_updated": False,
+            "recommendations": [f"Sitemap could not be analyzed: {report['raw_xml_summary']}"]
+        }
+
+    sections = report.get("top_sections") or []
+    focus = ", ".join(f"/{entry['section']} ({entry['url_count']} URLs)" for entry in sections[:3]) or None
+    recommendations = [f"Monitor /{sections[0]['section']} for new pages"] if sections else []
+
+    days = sorted(update["days_ago"] for update in report["recent_updates"])
+    if not report["metadata"]["timestamps_available"] or not days:
+        return {
+            "update_frequency_assessment": "sporadic",
+            "primary_content_focus": focus,
+            "is_actively_updated": False,
+            "recommendations": recommendations + ["Sitemap has no lastmod dates; track new URLs between runs instead"]
+        }
+
+    if days[0] > 90:
+        frequency = "stale"
+    elif len(days) >= 3 and days[2] <= 2:
+        frequency = "daily"
+    elif len(days) >= 3 and days[2] <= 7:
+        frequency = "weekly"
+    elif days[0] <= 30:
+        frequency = "monthly"
+    else:
+        frequency = "sporadic"
+
+    week = sum(1 for day in days if day <= 7)
+    return {
+        "update_frequency_assessment": frequency,
+        "primary_content_focus": focus,
+        "is_actively_updated": days[0] <= 30,
+        "recommendations": recommendations + [
+            f"{week} of the {len(days)} most recent updates are from the last 7 days (newest: {days[0]} days ago)"
+        ]
+    }
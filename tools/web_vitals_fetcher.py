@@ -1,8 +1,17 @@
-import requests
+import asyncio
 import os
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from utils.http_client import get_http_session, get_async_http_client, async_timeout
+from tools.psi_parser import fields_mask, parse_chunks, parse_chunks_async
+from utils.json_cache import JsonCache
+from utils.rate_limiter import get_rate_limiter, retry_after_seconds
+from utils.tracing import retry_attempt
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -94,102 +103,335 @@ def _get_metric_rating(metric_name, value):
 
     return None
 
-def _fetch_pagespeed_data(url, strategy, api_key):
+ENDPOINT = os.getenv("PAGESPEED_ENDPOINT", "https://www.googleapis.com/pagespeedonline/v5/runPagespeed")
+STRATEGIES = ("mobile", "desktop")
+PSI_CATEGORY = "performance"
+# Ask the API for only the fields _extract_metrics reads (partial response)
+PSI_FIELDS_MASK = os.getenv("PSI_FIELDS_MASK", "1") == "1"
+CHUNK_SIZE = 64 * 1024
+
+# PSI quota (default: 400 queries per 100 seconds per project) and request concurrency
+PSI_MAX_CALLS = int(os.getenv("PSI_RATE_LIMIT_CALLS", "400"))
+PSI_PERIOD = float(os.getenv("PSI_RATE_LIMIT_PERIOD", "100"))
+PSI_MAX_CONCURRENT = int(os.getenv("PSI_MAX_CONCURRENT", "8"))
+PSI_MAX_RETRIES = 2        # Retries after a 429 (quota exceeded)
+PSI_RETRY_AFTER = 30.0     # Pause (seconds) after a 429 without a Retry-After header
+
+
+# PSI result cache: CrUX field data only refreshes daily and lab scores barely move within hours
+PSI_LAB_TTL = float(os.getenv("PSI_LAB_TTL", str(6 * 3600)))
+PSI_FIELD_TTL = float(os.getenv("PSI_FIELD_TTL", str(24 * 3600)))
+PSI_STALE_TTL = float(os.getenv("PSI_STALE_TTL", str(24 * 3600)))  # Extra time a stale result is served while it is refreshed
+
+# Entries past their TTL and the stale window are refetched, never read, so the cache prunes them
+_psi_cache = JsonCache("pagespeed", max_age=max(PSI_LAB_TTL, PSI_FIELD_TTL) + PSI_STALE_TTL)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+_background_tasks = set()
+
+
+def _psi_limiter():
+    return get_rate_limiter("pagespeed", PSI_MAX_CALLS, PSI_PERIOD)
+
+
+def _cache_key(url, strategy):
+    return [url, strategy, PSI_CATEGORY]
+
+
+def _cache_state(entry, now):
     """
-    Internal helper to fetch data for a single strategy (mobile/desktop).
+    Returns "fresh", "stale" (past its TTL but still servable while it is refreshed)
+    or "expired". The lab and field parts expire on their own timers: lab data after
+    PSI_LAB_TTL, CrUX field data (when present) PSI_FIELD_TTL after it was fetched.
+    """
+    overdue = now - entry["fetched_at"] - PSI_LAB_TTL
+    if isinstance(entry["data"].get("real_user_data"), dict):
+        field_fetched_at = entry.get("field_fetched_at", entry["fetched_at"])
+        overdue = max(overdue, now - field_fetched_at - PSI_FIELD_TTL)
+    if overdue <= 0:
+        return "fresh"
+    if overdue <= PSI_STALE_TTL:
+        return "stale"
+    return "expired"
+
+
+def _store(url, strategy, data):
+    """
+    Caches a fetched result and returns it. When the new response carries no field
+    data (CrUX gaps are common for low-traffic pages) but the cached field block is
+    still within PSI_FIELD_TTL, that block is kept with its own timestamp, so only
+    the lab part is replaced.
+    """
+    # Errors are never cached
+    if "error" in data:
+        return data
+    now = time.time()
+    field_fetched_at = now
+    if not isinstance(data.get("real_user_data"), dict):
+        previous = _psi_cache.get(_cache_key(url, strategy))
+        if previous is not None and isinstance(previous["data"].get("real_user_data"), dict):
+            previous_fetched_at = previous.get("field_fetched_at", previous["fetched_at"])
+            if now - previous_fetched_at <= PSI_FIELD_TTL:
+                data = {**data, "real_user_data": previous["data"]["real_user_data"]}
+                field_fetched_at = previous_fetched_at
+    _psi_cache.set(_cache_key(url, strategy), {"fetched_at": now, "field_fetched_at": field_fetched_at, "data": data})
+    return data
+
+
+def _cached(url, strategy, force_refresh):
+    """Returns (cache state, cached data) for a request; ("miss", None) when nothing usable is cached."""
+    if force_refresh:
+        return "miss", None
+    entry = _psi_cache.get(_cache_key(url, strategy))
+    if entry is None:
+        return "miss", None
+    state = _cache_state(entry, time.time())
+    return (state, entry["data"]) if state != "expired" else ("miss", None)
+
+
+def _claim_refresh(url, strategy):
+    """True if no background refresh for (url, strategy) is running yet."""
+    with _refreshing_lock:
+        if (url, strategy) in _refreshing:
+            return False
+        _refreshing.add((url, strategy))
+        return True
+
+
+def _release_refresh(url, strategy):
+    with _refreshing_lock:
+        _refreshing.discard((url, strategy))
+
+def _pagespeed_params(url, strategy, api_key):
+    """
+    Query parameters for a single PageSpeed Insights request.
     """
-    endpoint = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
-    
     params = {
         "url": url,
         "strategy": strategy,
         "key": api_key,
-        "category": "performance"
+        "category": PSI_CATEGORY
     }
+    if PSI_FIELDS_MASK:
+        params["fields"] = fields_mask()
+    return params
 
-    logger.info(f"Analyzing {strategy} performance for: {url}")
-
-    try:
-        response = requests.get(endpoint, params=params, timeout=60)
-        
-        if response.status_code != 200:
-            logger.error(f"API Error {response.status_code} for {strategy}: {response.text}")
-            return {"error": f"API Error {response.status_code}"}
+def _rejects_fields_mask(body):
+    """
+    True if a 400 response blames the 'fields' partial-response mask; any other 400
+    (e.g. an invalid URL) would fail the same way without the mask.
+    """
+    return "fields" in body.lower()
 
-        data = response.json()
-        
-        # 1. Loading Experience (Real User Data / CrUX)
-        # This data comes from actual Chrome users. It may be missing for low-traffic sites.
-        crux_metrics = {}
-        loading_experience = data.get("loadingExperience", {})
-        if loading_experience.get("metrics"):
-            metrics = loading_experience["metrics"]
-            
-            # Helper to extract percentile and category
-            def get_crux_val(key, name):
-                metric_data = metrics.get(key, {})
-                val = metric_data.get("percentile")
-                return {
-                    "value": val,
-                    "rating": _get_metric_rating(name, val)
-                }
-
-            crux_metrics = {
-                "INP_ms": get_crux_val("INTERACTION_TO_NEXT_PAINT", "INP"),
-                "LCP_ms": get_crux_val("LARGEST_CONTENTFUL_PAINT", "LCP"),
-                "CLS_score": get_crux_val("CUMULATIVE_LAYOUT_SHIFT", "CLS"),
-                "overall_rating": loading_experience.get("overall_category")
-            }
+def _extract_metrics(data):
+    """
+    Extracts CrUX field data and Lighthouse lab metrics from a PSI response
+    (full, or reduced to the selected fields by tools.psi_parser).
+    """
+    # 1. Loading Experience (Real User Data / CrUX)
+    # This data comes from actual Chrome users. It may be missing for low-traffic sites.
+    crux_metrics = {}
+    loading_experience = data.get("loadingExperience", {})
+    if loading_experience.get("metrics"):
+        metrics = loading_experience["metrics"]
 
-        # 2. Lighthouse Result (Lab Data - Simulated)
-        lighthouse = data.get("lighthouseResult", {})
-        audits = lighthouse.get("audits", {})
-        categories = lighthouse.get("categories", {})
-        
-        # Performance Score (0-100)
-        raw_score = categories.get("performance", {}).get("score")
-        perf_score = int(raw_score * 100) if raw_score is not None else None
-
-        # Helper to extract Lab Data
-        def get_audit_val(key, name):
-            audit = audits.get(key, {})
-            # numericValue is the raw number (ms or score)
-            raw_val = audit.get("numericValue")
-            display_val = audit.get("displayValue")
+        # Helper to extract percentile and category
+        def get_crux_val(key, name):
+            metric_data = metrics.get(key, {})
+            val = metric_data.get("percentile")
             return {
-                "displayValue": display_val,
-                "numericValue": raw_val,
-                "rating": _get_metric_rating(name, raw_val)
+                "value": val,
+                "rating": _get_metric_rating(name, val)
             }
 
-        lab_metrics = {
-            "performance_score": {
-                "value": perf_score,
-                "rating": _get_metric_rating("performance_score", perf_score)
-            },
-            "FCP": get_audit_val("first-contentful-paint", "FCP"),
-            "LCP": get_audit_val("largest-contentful-paint", "LCP"),
-            "CLS": get_audit_val("cumulative-layout-shift", "CLS"),
-            "Speed_Index": get_audit_val("speed-index", "Speed_Index"),
-            "Total_Blocking_Time": get_audit_val("total-blocking-time", "Total_Blocking_Time")
+        crux_metrics = {
+            "INP_ms": get_crux_val("INTERACTION_TO_NEXT_PAINT", "INP"),
+            "LCP_ms": get_crux_val("LARGEST_CONTENTFUL_PAINT", "LCP"),
+            "CLS_score": get_crux_val("CUMULATIVE_LAYOUT_SHIFT", "CLS"),
+            "overall_rating": loading_experience.get("overall_category")
         }
 
+    # 2. Lighthouse Result (Lab Data - Simulated)
+    lighthouse = data.get("lighthouseResult", {})
+    audits = lighthouse.get("audits", {})
+    categories = lighthouse.get("categories", {})
+
+    # Performance Score (0-100)
+    raw_score = categories.get("performance", {}).get("score")
+    perf_score = int(raw_score * 100) if raw_score is not None else None
+
+    # Helper to extract Lab Data
+    def get_audit_val(key, name):
+        audit = audits.get(key, {})
+        # numericValue is the raw number (ms or score)
+        raw_val = audit.get("numericValue")
+        display_val = audit.get("displayValue")
         return {
-            "lab_data": lab_metrics,
-            "real_user_data": crux_metrics if crux_metrics else "Not enough traffic data"
+            "displayValue": display_val,
+            "numericValue": raw_val,
+            "rating": _get_metric_rating(name, raw_val)
         }
 
+    lab_metrics = {
+        "performance_score": {
+            "value": perf_score,
+            "rating": _get_metric_rating("performance_score", perf_score)
+        },
+        "FCP": get_audit_val("first-contentful-paint", "FCP"),
+        "LCP": get_audit_val("largest-contentful-paint", "LCP"),
+        "CLS": get_audit_val("cumulative-layout-shift", "CLS"),
+        "Speed_Index": get_audit_val("speed-index", "Speed_Index"),
+        "Total_Blocking_Time": get_audit_val("total-blocking-time", "Total_Blocking_Time")
+    }
+
+    return {
+        "lab_data": lab_metrics,
+        "real_user_data": crux_metrics if crux_metrics else "Not enough traffic data"
+    }
+
+def _fetch_pagespeed_data(url, strategy, api_key):
+    """
+    Internal helper to fetch data for a single strategy (mobile/desktop).
+    """
+    params = _pagespeed_params(url, strategy, api_key)
+
+    logger.info(f"Analyzing {strategy} performance for: {url}")
+
+    try:
+        limiter = _psi_limiter()
+
+        def send(attempt):
+            limiter.acquire()
+            # Shared keep-alive session: repeated calls to googleapis.com reuse the TLS connection
+            with retry_attempt(attempt):
+                return get_http_session().get(ENDPOINT, params=params, timeout=60, stream=True)
+
+        for attempt in range(PSI_MAX_RETRIES + 1):
+            response = send(attempt)
+            if response.status_code == 400 and "fields" in params and _rejects_fields_mask(response.text):
+                # Partial response rejected: fall back to the full response once per call,
+                # without using up a quota retry
+                response.close()
+                logger.warning(f"PSI rejected the fields mask ({strategy}, {url}); requesting the full response")
+                params.pop("fields")
+                response = send(attempt)
+            if response.status_code != 429 or attempt == PSI_MAX_RETRIES:
+                break
+            # Quota exceeded: hold back every PSI caller, then retry
+            response.close()
+            logger.warning(f"PSI quota exceeded ({strategy}, {url}); retrying")
+            limiter.pause(retry_after_seconds(response.headers.get("Retry-After"), PSI_RETRY_AFTER))
+
+        with response:
+            if response.status_code != 200:
+                logger.error(f"API Error {response.status_code} for {strategy}: {response.text}")
+                return {"error": f"API Error {response.status_code}"}
+
+            # Streamed parse: only the fields read by _extract_metrics are materialized
+            return _extract_metrics(parse_chunks(response.iter_content(chunk_size=CHUNK_SIZE)))
+
     except Exception as e:
         logger.error(f"Failed to analyze PageSpeed ({strategy}): {e}")
         return {"error": str(e)}
 
-def analyze_web_vitals(url: str) -> dict:
+async def _fetch_pagespeed_data_async(url, strategy, api_key):
+    """
+    Async variant of _fetch_pagespeed_data, built on the shared async HTTP client.
+    """
+    params = _pagespeed_params(url, strategy, api_key)
+
+    logger.info(f"Analyzing {strategy} performance for: {url}")
+
+    try:
+        limiter = _psi_limiter()
+
+        async def send(attempt):
+            await limiter.acquire_async()
+            client = get_async_http_client()
+            request = client.build_request("GET", ENDPOINT, params=params, timeout=async_timeout(60))
+            with retry_attempt(attempt):
+                return await client.send(request, stream=True)
+
+        for attempt in range(PSI_MAX_RETRIES + 1):
+            response = await send(attempt)
+            if response.status_code == 400 and "fields" in params and _rejects_fields_mask(
+                    (await response.aread()).decode("utf-8", "replace")):
+                await response.aclose()
+                logger.warning(f"PSI rejected the fields mask ({strategy}, {url}); requesting the full response")
+                params.pop("fields")
+                response = await send(attempt)
+            if response.status_code != 429 or attempt == PSI_MAX_RETRIES:
+                break
+            await response.aclose()
+            logger.warning(f"PSI quota exceeded ({strategy}, {url}); retrying")
+            limiter.pause(retry_after_seconds(response.headers.get("Retry-After"), PSI_RETRY_AFTER))
+
+        try:
+            if response.status_code != 200:
+                await response.aread()
+                logger.error(f"API Error {response.status_code} for {strategy}: {response.text}")
+                return {"error": f"API Error {response.status_code}"}
+
+            return _extract_metrics(await parse_chunks_async(response.aiter_bytes(CHUNK_SIZE)))
+        finally:
+            await response.aclose()
+
+    except Exception as e:
+        logger.error(f"Failed to analyze PageSpeed ({strategy}): {e}")
+        return {"error": str(e)}
+
+def _get_pagespeed_data(url, strategy, api_key, force_refresh=False):
+    """
+    Cache-aware _fetch_pagespeed_data: fresh results are served from the PSI cache;
+    stale ones are served immediately and refreshed in a background thread.
+    """
+    state, data = _cached(url, strategy, force_refresh)
+    if state == "fresh":
+        return data
+    if state == "stale":
+        if _claim_refresh(url, strategy):
+            def refresh():
+                try:
+                    _store(url, strategy, _fetch_pagespeed_data(url, strategy, api_key))
+                finally:
+                    _release_refresh(url, strategy)
+            threading.Thread(target=refresh, name=f"psi-refresh-{strategy}", daemon=True).start()
+        return data
+
+    return _store(url, strategy, _fetch_pagespeed_data(url, strategy, api_key))
+
+async def _get_pagespeed_data_async(url, strategy, api_key, force_refresh=False):
+    """
+    Async variant of _get_pagespeed_data; stale results are refreshed in a background task.
+    """
+    state, data = _cached(url, strategy, force_refresh)
+    if state == "fresh":
+        return data
+    if state == "stale":
+        if _claim_refresh(url, strategy):
+            async def refresh():
+                try:
+                    _store(url, strategy, await _fetch_pagespeed_data_async(url, strategy, api_key))
+                finally:
+                    _release_refresh(url, strategy)
+            task = asyncio.get_running_loop().create_task(refresh())
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return data
+
+    return _store(url, strategy, await _fetch_pagespeed_data_async(url, strategy, api_key))
+
+def analyze_web_vitals(url: str, force_refresh: bool = False) -> dict:
     """
     Calls Google PageSpeed Insights API to fetch Core Web Vitals and Performance Score
     for BOTH Mobile and Desktop strategies.
     
+    Results are cached (see PSI_LAB_TTL / PSI_FIELD_TTL); stale results are returned
+    immediately and refreshed in the background.
+
     Args:
         url (str): The URL to analyze.
+        force_refresh (bool): Bypass the cache and call the API.
         
     Returns:
         dict: Combined results for mobile and desktop.
@@ -200,9 +442,11 @@ def analyze_web_vitals(url: str) -> dict:
         logger.error("PAGESPEED_API_KEY not found in environment variables.")
         return {"error": "Missing API Key"}
 
-    # Fetch both strategies
-    mobile_data = _fetch_pagespeed_data(url, "mobile", api_key)
-    desktop_data = _fetch_pagespeed_data(url, "desktop", api_key)
+    # Fetch both strategies concurrently (each PSI call takes 20-40 s)
+    with ThreadPoolExecutor(max_workers=len(STRATEGIES)) as executor:
+        mobile_future = executor.submit(_get_pagespeed_data, url, "mobile", api_key, force_refresh)
+        desktop_future = executor.submit(_get_pagespeed_data, url, "desktop", api_key, force_refresh)
+        mobile_data, desktop_data = mobile_future.result(), desktop_future.result()
 
     result = {
         "url": url,
@@ -212,3 +456,112 @@ def analyze_web_vitals(url: str) -> dict:
     }
     
     return result
+
+
+async def analyze_web_vitals_async(url: str, force_refresh: bool = False) -> dict:
+    """
+    Async variant of analyze_web_vitals: the mobile and desktop PageSpeed Insights
+    requests run concurrently without blocking the event loop.
+
+    Args:
+        url (str): The URL to analyze.
+        force_refresh (bool): Bypass the cache and call the API.
+
+    Returns:
+        dict: Combined results for mobile and desktop.
+    """
+    api_key = os.getenv("PAGESPEED_API_KEY")
+
+    if not api_key:
+        logger.error("PAGESPEED_API_KEY not found in environment variables.")
+        return {"error": "Missing API Key"}
+
+    mobile_data, desktop_data = await asyncio.gather(
+        _get_pagespeed_data_async(url, "mobile", api_key, force_refresh),
+        _get_pagespeed_data_async(url, "desktop", api_key, force_refresh)
+    )
+
+    return {
+        "url": url,
+        "analyzed_at": datetime.now().isoformat(),
+        "mobile": mobile_data,
+        "desktop": desktop_data
+    }
+
+
+def analyze_web_vitals_many(urls: list, force_refresh: bool = False) -> dict:
+    """
+    Batch variant of analyze_web_vitals for the client and all competitors.
+
+    Every (url, strategy) request runs concurrently, capped at PSI_MAX_CONCURRENT
+    in flight and throttled by the shared PSI quota limiter; a 429 pauses all
+    requests before retrying.
+
+    Args:
+        urls (list): The URLs to analyze.
+        force_refresh (bool): Bypass the cache and call the API.
+
+    Returns:
+        dict: {"analyzed_at": ..., "results": [analyze_web_vitals result per URL, in input order]}
+    """
+    api_key = os.getenv("PAGESPEED_API_KEY")
+
+    if not api_key:
+        logger.error("PAGESPEED_API_KEY not found in environment variables.")
+        return {"error": "Missing API Key"}
+
+    urls = list(dict.fromkeys(urls))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(PSI_MAX_CONCURRENT, 2 * len(urls)))) as executor:
+        futures = {
+            (url, strategy): executor.submit(_get_pagespeed_data, url, strategy, api_key, force_refresh)
+            for url in urls for strategy in STRATEGIES
+        }
+        data = {key: future.result() for key, future in futures.items()}
+
+    logger.info(f"Analyzed {len(urls)} URLs in {time.perf_counter() - start:.1f}s")
+    analyzed_at = datetime.now().isoformat()
+    return {
+        "analyzed_at": analyzed_at,
+        "results": [
+            {"url": url, "analyzed_at": analyzed_at, "mobile": data[(url, "mobile")], "desktop": data[(url, "desktop")]}
+            for url in urls
+        ]
+    }
+
+
+async def analyze_web_vitals_many_async(urls: list, force_refresh: bool = False) -> dict:
+    """
+    Async variant of analyze_web_vitals_many.
+
+    Args:
+        urls (list): The URLs to analyze.
+        force_refresh (bool): Bypass the cache and call the API.
+
+    Returns:
+        dict: {"analyzed_at": ..., "results": [analyze_web_vitals result per URL, in input order]}
+    """
+    api_key = os.getenv("PAGESPEED_API_KEY")
+
+    if not api_key:
+        logger.error("PAGESPEED_API_KEY not found in environment variables.")
+        return {"error": "Missing API Key"}
+
+    urls = list(dict.fromkeys(urls))
+    semaphore = asyncio.Semaphore(PSI_MAX_CONCURRENT)
+
+    async def fetch(url, strategy):
+        async with semaphore:
+            return await _get_pagespeed_data_async(url, strategy, api_key, force_refresh)
+
+    pairs = [(url, strategy) for url in urls for strategy in STRATEGIES]
+    data = dict(zip(pairs, await asyncio.gather(*(fetch(url, strategy) for url, strategy in pairs))))
+
+    analyzed_at = datetime.now().isoformat()
+    return {
+        "analyzed_at": analyzed_at,
+        "results": [
+            {"url": url, "analyzed_at": analyzed_at, "mobile": data[(url, "mobile")], "desktop": data[(url, "desktop")]}
+            for url in urls
+        ]
+    }
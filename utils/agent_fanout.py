@@ -0,0 +1,32 @@
+import os
+from typing import Any, List
+
+from google.adk.agents import BaseAgent, ParallelAgent, SequentialAgent
+
+# Max sub-agents (LLM calls) running at the same time inside one fan-out
+AGENT_MAX_PARALLEL = int(os.getenv("AGENT_MAX_PARALLEL", "8"))
+
+
+def fan_out(name: str, description: str, sub_agents: List[BaseAgent],
+            max_parallel: int = AGENT_MAX_PARALLEL, **kwargs: Any) -> BaseAgent:
+    """
+    Runs 'sub_agents' in parallel, at most 'max_parallel' at a time.
+
+    Up to 'max_parallel' sub-agents this is a plain ParallelAgent. Beyond that the
+    sub-agents are split into waves of 'max_parallel' ParallelAgents run one after
+    the other by a SequentialAgent, so 200 keywords never means 200 concurrent
+    model calls. Extra keyword arguments (e.g. callbacks) go to the outer agent.
+    """
+    max_parallel = max(1, max_parallel)
+    if len(sub_agents) <= max_parallel:
+        return ParallelAgent(name=name, description=description, sub_agents=sub_agents, **kwargs)
+
+    waves = [
+        ParallelAgent(
+            name=f"{name}_wave_{number}",
+            description=f"{description} (wave {number})",
+            sub_agents=sub_agents[start:start + max_parallel]
+        )
+        for number, start in enumerate(range(0, len(sub_agents), max_parallel), start=1)
+    ]
+    return SequentialAgent(name=name, description=description, sub_agents=waves, **kwargs)
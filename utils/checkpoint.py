@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+CHECKPOINT_DIR = Path(os.getenv("CHECKPOINT_DIR", Path(__file__).parent.parent / "output" / "checkpoints"))
+# Set in the session state of a resumed run; stages whose output is already there are skipped
+RESUMED_KEY = "resumed_from_checkpoint"
+# Phase-1 stage outputs; the checkpoint is written when an event changes one of them
+STAGE_KEYS = re.compile(r"competitor_\d+_result|client_website_result|keyword_\d+_ranking_data|ranking_visibility"
+                        r"|ranking_changes|competitor_\d+_sitemap_data|performace_reporter_output|performance_benchmark")
+
+_lock = threading.Lock()
+
+
+def checkpoint_path(session_id: str, directory: Path = CHECKPOINT_DIR) -> Path:
+    return Path(directory) / f"{session_id}.json"
+
+
+def load_checkpoint(path: Optional[Path] = None, directory: Path = CHECKPOINT_DIR) -> Optional[Dict[str, Any]]:
+    """Loads a checkpoint file, by default the most recently updated one in 'directory'."""
+    if path is None:
+        candidates = sorted(Path(directory).glob("*.json"), key=lambda candidate: candidate.stat().st_mtime)
+        if not candidates:
+            return None
+        path = candidates[-1]
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def failed_output(value: Any) -> bool:
+    """True for a stage output that reports an error instead of data (tool error dicts, "Error: ..." texts)."""
+    if isinstance(value, dict):
+        return bool(value.get("error")) or value.get("status") == "error"
+    if isinstance(value, str):
+        return value.lstrip().lower().startswith("error")
+    return False
+
+
+def restorable_state(checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+    """The checkpointed state without the stages that failed, so a resumed run runs them again."""
+    stages = checkpoint.get("stages", {})
+    return {
+        key: value for key, value in checkpoint["state"].items()
+        if stages.get(key, "error" if failed_output(value) else "success") == "success"
+    }
+
+
+def save_checkpoint(session_id: str, state_delta: Dict[str, Any], completed_agent: Optional[str] = None,
+                    directory: Path = CHECKPOINT_DIR, stages: Optional[Dict[str, str]] = None) -> Path:
+    """
+    Merges 'state_delta', the status ("success" / "error") of the stages in it and the
+    name of an agent that just produced its final response into the session's
+    checkpoint file. Writes are atomic.
+    """
+    path = checkpoint_path(session_id, directory)
+    with _lock:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            checkpoint = {"session_id": session_id, "state": {}, "stages": {}, "completed_agents": []}
+
+        checkpoint["state"].update(state_delta)
+        checkpoint.setdefault("stages", {}).update(stages or {})
+        if completed_agent and completed_agent not in checkpoint["completed_agents"]:
+            checkpoint["completed_agents"].append(completed_agent)
+        checkpoint["updated_at"] = time.time()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, default=str)
+        os.replace(tmp_path, path)
+    return path
+
+
+def restored_output(callback_context: CallbackContext, output_key: str) -> Optional[types.Content]:
+    """
+    In a resumed run, returns the stage output already restored under 'output_key'
+    as the agent's response (so a before_agent_callback can skip the agent), else None.
+    """
+    state = callback_context.state
+    if not state.get(RESUMED_KEY) or state.get(output_key) is None:
+        return None
+    value = state[output_key]
+    return types.Content(role="model", parts=[types.Part(text=value if isinstance(value, str) else json.dumps(value))])
+
+
+class CheckpointPlugin(BasePlugin):
+    """
+    Writes the phase-1 stage outputs (STAGE_KEYS) of a run to CHECKPOINT_DIR/<session
+    id>.json as they land, so a run that fails part-way (e.g. in the analyst, or in one
+    sub-agent of phase 1) keeps everything finished so far. Each stage is stored with
+    its status: "error" when the output reports an error or the agent's tool call
+    returned one, so a resumed run re-runs it. Events that change no stage output are
+    not written, except the final responses of 'final_agents'. See agents/root_agent/resume.py.
+    """
+
+    def __init__(self, directory: Path = CHECKPOINT_DIR, final_agents: Iterable[str] = ()):
+        super().__init__(name="checkpoint")
+        self.directory = directory
+        self.final_agents = frozenset(final_agents)
+        self._failed_tools: Set[Tuple[str, str]] = set()  # (session id, agent) with a failed tool call
+
+    async def on_event_callback(self, *, invocation_context: InvocationContext, event: Event) -> Optional[Event]:
+        agent = (invocation_context.session.id, event.author)
+        if any(failed_output(response.response) or failed_output((response.response or {}).get("result"))
+               for response in event.get_function_responses()):
+            self._failed_tools.add(agent)
+
+        delta = {key: value for key, value in (event.actions.state_delta or {}).items() if STAGE_KEYS.fullmatch(key)}
+        final = event.author != "user" and event.is_final_response()
+        if delta:
+            tool_failed = agent in self._failed_tools
+            stages = {key: "error" if tool_failed or failed_output(value) else "success" for key, value in delta.items()}
+            await asyncio.to_thread(save_checkpoint, invocation_context.session.id, delta,
+                                    event.author if final else None, self.directory, stages)
+        elif final and event.author in self.final_agents:
+            await asyncio.to_thread(save_checkpoint, invocation_context.session.id, {}, event.author, self.directory)
+        if final:
+            self._failed_tools.discard(agent)
+        return None
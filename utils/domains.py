@@ -0,0 +1,19 @@
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+def domain_of(url: Optional[str]) -> str:
+    """
+    Host of a URL (or of a bare host name such as 'www.example.com') without 'www.',
+    lowercased ('' if there is none).
+    """
+    value = (url or "").strip()
+    if value and "//" not in value:
+        value = "//" + value
+    host = urlsplit(value).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def is_domain(host: str, domain: str) -> bool:
+    """True if 'host' is 'domain' or one of its subdomains (both as returned by domain_of)."""
+    return bool(domain) and (host == domain or host.endswith("." + domain))
@@ -1,3 +1,6 @@
+from typing import List
+
+
 def load_file_content(file_path: str) -> str:
     """
     Load file content from an absolute path and return as a string.
@@ -24,6 +27,33 @@ def load_file_content(file_path: str) -> str:
         raise Exception(f"Unexpected error reading file {file_path} - {str(e)}")
 
 
+def _strip_numbering(line: str) -> str:
+    # Remove numbering: "1. biodata" -> "biodata" or "1: biodata" -> "biodata"
+    if ': ' in line:
+        return line.split(': ', 1)[1].strip()
+    elif '. ' in line:
+        return line.split('. ', 1)[1].strip()
+    return line.strip()
+
+
+def parse_numbered_list(text_list: str) -> List[str]:
+    """
+    Parse a numbered list into its items (numbering removed), in order.
+    Parse the config text once with this instead of calling get_item_by_position per item.
+    
+    Args:
+        text_list: Text containing numbered items (e.g., "1. biodata\n2. marriage biodata")
+        
+    Returns:
+        List of the cleaned items (empty lines skipped)
+        
+    Example:
+        >>> parse_numbered_list("1. biodata\n2: marriage biodata")
+        ['biodata', 'marriage biodata']
+    """
+    return [_strip_numbering(line.strip()) for line in text_list.strip().split('\n') if line.strip()]
+
+
 def get_item_by_position(text_list: str, position: int) -> str:
     """
     Extract the Nth item from a numbered list (1-indexed).
@@ -47,15 +77,9 @@ def get_item_by_position(text_list: str, position: int) -> str:
         >>> get_item_by_position(urls, 1)
         'https://example.com'
     """
-    lines = [line.strip() for line in text_list.strip().split('\n') if line.strip()]
-    if position <= len(lines):
-        line = lines[position - 1]
-        # Remove numbering: "1. biodata" -> "biodata" or "1: biodata" -> "biodata"
-        if ': ' in line:
-            return line.split(': ', 1)[1].strip()
-        elif '. ' in line:
-            return line.split('. ', 1)[1].strip()
-        return line.strip()
+    items = parse_numbered_list(text_list)
+    if position <= len(items):
+        return items[position - 1]
     return None
 
 
@@ -0,0 +1,362 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import httpx
+import requests
+
+from utils.http_client import get_http_session, get_async_http_client, async_timeout
+from utils.json_cache import DEFAULT_CACHE_ROOT, PRUNE_TO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = DEFAULT_CACHE_ROOT / "http"
+DEFAULT_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", "500")) * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+def _declared_charset(content_type: Optional[str]) -> Optional[str]:
+    """
+    Returns the charset explicitly declared in a Content-Type header, or None.
+    (requests would otherwise assume ISO-8859-1 for any text/* response.)
+    """
+    for param in (content_type or "").split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"\'')
+    return None
+
+
+def _cacheable(headers) -> bool:
+    """
+    True if a response may be stored: it carries a validator (ETag or Last-Modified)
+    to revalidate it with, and Cache-Control does not forbid storing it (no-store).
+    """
+    directives = {directive.strip().split("=")[0].lower() for directive in headers.get("Cache-Control", "").split(",")}
+    return "no-store" not in directives and bool(headers.get("ETag") or headers.get("Last-Modified"))
+
+
+def _decode(body: bytes, encoding: Optional[str]) -> str:
+    """Decodes a body with the declared encoding, else the HTML <meta charset>, else UTF-8."""
+    if not encoding:
+        match = _META_CHARSET.search(body[:4096])
+        encoding = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return body.decode(encoding, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+class CachedResponse:
+    """
+    Response returned by HttpCache.open(). The body is either freshly downloaded
+    (streamed to disk while it is read, unless the response is not cacheable) or
+    served from the cache after a 304 Not Modified revalidation.
+    """
+
+    def __init__(self, cache: "HttpCache", key: str, url: str, meta: Dict[str, Any],
+                 response: Optional[requests.Response] = None, async_response: Optional[httpx.Response] = None,
+                 cacheable: bool = True):
+        self._cache = cache
+        self._key = key
+        self._response = response
+        self._async_response = async_response
+        self.url = url
+        self.meta = meta
+        self.from_cache = response is None and async_response is None
+        self.cacheable = cacheable
+
+    @property
+    def encoding(self) -> Optional[str]:
+        return self.meta.get("encoding")
+
+    def iter_content(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Yields the body in chunks. On a cache miss the chunks are written to disk as
+        they arrive; the entry is only committed once the body has been read fully.
+        """
+        if self.from_cache:
+            with open(self._cache._body_path(self._key), "rb") as f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+            return
+        if not self.cacheable:
+            with self._response:
+                yield from self._response.iter_content(chunk_size=chunk_size)
+            return
+
+        tmp_path = self._cache._body_path(self._key).with_suffix(f".{threading.get_ident()}.tmp")
+        complete = False
+        try:
+            with self._response, open(tmp_path, "wb") as f:
+                for chunk in self._response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            if complete:
+                self._cache._commit(self._key, tmp_path, self.meta)
+            else:
+                tmp_path.unlink(missing_ok=True)
+
+    async def aiter_content(self, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Async counterpart of iter_content() for responses opened with open_async()."""
+        if self.from_cache:
+            for chunk in self.iter_content(chunk_size):
+                yield chunk
+            return
+        if not self.cacheable:
+            try:
+                async for chunk in self._async_response.aiter_bytes(chunk_size):
+                    yield chunk
+            finally:
+                await self._async_response.aclose()
+            return
+
+        tmp_path = self._cache._body_path(self._key).with_suffix(f".{id(self)}.tmp")
+        complete = False
+        try:
+            with open(tmp_path, "wb") as f:
+                async for chunk in self._async_response.aiter_bytes(chunk_size):
+                    f.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            await self._async_response.aclose()
+            if complete:
+                self._cache._commit(self._key, tmp_path, self.meta)
+            else:
+                tmp_path.unlink(missing_ok=True)
+
+    async def aread(self) -> bytes:
+        """Returns the full body (async)."""
+        return b"".join([chunk async for chunk in self.aiter_content()])
+
+    async def atext(self) -> str:
+        """Returns the full body decoded with the response encoding (async)."""
+        return _decode(await self.aread(), self.encoding)
+
+    def read(self) -> bytes:
+        """Returns the full body."""
+        return b"".join(self.iter_content())
+
+    def text(self) -> str:
+        """Returns the full body decoded with the response encoding."""
+        return _decode(self.read(), self.encoding)
+
+    def load_derived(self, name: str) -> Any:
+        """
+        Returns a value previously stored with store_derived() for this exact body,
+        e.g. a parse result, so unchanged responses skip parsing too. None if absent.
+        """
+        if not self.from_cache:
+            return None
+        return self.meta.get("derived", {}).get(name)
+
+    def store_derived(self, name: str, value: Any) -> None:
+        """Stores a JSON-serializable value derived from this body (dropped when the body changes)."""
+        if not self.cacheable:
+            return
+        self.meta.setdefault("derived", {})[name] = value
+        self._cache._write_meta(self._key, self.meta)
+
+
+class HttpCache:
+    """
+    Disk-backed HTTP cache using conditional GETs.
+
+    Each entry stores the body plus its ETag / Last-Modified validators. Later
+    requests send If-None-Match / If-Modified-Since; a 304 Not Modified is served
+    from disk without transferring the body. Responses without a validator or marked
+    Cache-Control: no-store are passed through without being stored. Total size is
+    bounded with LRU eviction (least recently used by file access time), tracked as
+    a running total so the directory is only scanned when it is full.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None  # Running size of the bodies, scanned on the first commit
+        self.stats = {"hits": 0, "misses": 0, "bytes_saved": 0, "evictions": 0, "not_stored": 0}
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.body"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _read_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not self._body_path(key).exists():
+            return None
+        return meta
+
+    def _write_meta(self, key: str, meta: Dict[str, Any]) -> None:
+        tmp_path = self._meta_path(key).with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(key))
+
+    def _body_size(self, key: str) -> int:
+        try:
+            return self._body_path(key).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _commit(self, key: str, tmp_path: Path, meta: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(path.stat().st_size for path in self.cache_dir.glob("*.body"))
+            meta["size"] = tmp_path.stat().st_size
+            self._total_bytes += meta["size"] - self._body_size(key)
+            os.replace(tmp_path, self._body_path(key))
+            self._write_meta(key, meta)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _not_stored(self, key: str) -> None:
+        """Drops the entry of a response that may not be stored (its old validators are obsolete)."""
+        with self._lock:
+            self.stats["not_stored"] += 1
+            if self._total_bytes is not None:
+                self._total_bytes -= self._body_size(key)
+            self._body_path(key).unlink(missing_ok=True)
+            self._meta_path(key).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """Removes least recently used entries until the cache is below PRUNE_TO of max_bytes."""
+        bodies = [(path.stat(), path) for path in self.cache_dir.glob("*.body")]
+        self._total_bytes = sum(stat.st_size for stat, _ in bodies)
+        for stat, path in sorted(bodies, key=lambda item: item[0].st_atime):
+            if self._total_bytes <= self.max_bytes * PRUNE_TO:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            self._total_bytes -= stat.st_size
+            self.stats["evictions"] += 1
+
+    def _conditional_headers(self, key: str, headers: Optional[Dict[str, str]]):
+        cached = self._read_meta(key)
+        request_headers = dict(headers or {})
+        if cached:
+            if cached.get("etag"):
+                request_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached["last_modified"]
+        return cached, request_headers
+
+    def _record_hit(self, key: str, cached: Dict[str, Any]) -> None:
+        # Touch the body so LRU eviction sees it as recently used
+        now = time.time()
+        os.utime(self._body_path(key), (now, now))
+        with self._lock:
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += cached.get("size", 0)
+
+    def _new_meta(self, url: str, headers, encoding: Optional[str]) -> Dict[str, Any]:
+        with self._lock:
+            self.stats["misses"] += 1
+        return {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "encoding": encoding,
+            "stored_at": time.time()
+        }
+
+    def open(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 15,
+             session: Optional[requests.Session] = None) -> CachedResponse:
+        """
+        Performs a conditional GET for 'url' (through the shared pooled session by default).
+
+        Raises:
+            requests.exceptions.RequestException: On network errors or non-2xx/304 statuses.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        key = self._key(url)
+        cached, request_headers = self._conditional_headers(key, headers)
+
+        response = (session or get_http_session()).get(url, headers=request_headers, timeout=timeout, stream=True)
+
+        if cached and response.status_code == 304:
+            response.close()
+            self._record_hit(key, cached)
+            return CachedResponse(self, key, url, cached)
+
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+
+        meta = self._new_meta(url, response.headers, _declared_charset(response.headers.get("Content-Type")))
+        cacheable = _cacheable(response.headers)
+        if not cacheable:
+            self._not_stored(key)
+        return CachedResponse(self, key, url, meta, response=response, cacheable=cacheable)
+
+    async def open_async(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 15) -> CachedResponse:
+        """
+        Async conditional GET for 'url' through the shared async HTTP client.
+
+        Raises:
+            httpx.HTTPError: On network errors or non-2xx/304 statuses.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        key = self._key(url)
+        cached, request_headers = self._conditional_headers(key, headers)
+
+        client = get_async_http_client()
+        request = client.build_request("GET", url, headers=request_headers, timeout=async_timeout(timeout))
+        response = await client.send(request, stream=True)
+
+        if cached and response.status_code == 304:
+            await response.aclose()
+            self._record_hit(key, cached)
+            return CachedResponse(self, key, url, cached)
+
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError:
+            await response.aclose()
+            raise
+
+        meta = self._new_meta(url, response.headers, response.charset_encoding)
+        cacheable = _cacheable(response.headers)
+        if not cacheable:
+            self._not_stored(key)
+        return CachedResponse(self, key, url, meta, async_response=response, cacheable=cacheable)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters plus the current number of entries and on-disk size."""
+        sizes = [path.stat().st_size for path in self.cache_dir.glob("*.body")]
+        with self._lock:
+            return {**self.stats, "entries": len(sizes), "size_bytes": sum(sizes)}
+
+
+_http_cache: Optional[HttpCache] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """Returns the process-wide HttpCache (stored under .cache/http in the project root)."""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache()
+        return _http_cache
@@ -0,0 +1,386 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+
+import httpcore
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError, NameResolutionError, NewConnectionError
+from urllib3.util.request import ACCEPT_ENCODING
+
+from utils.tracing import TRACING, start_http_span, end_http_span
+
+# --- Configuration (overridable through environment variables) ---
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "32"))          # Distinct hosts kept in the pool
+POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "8"))     # Max open connections per host
+POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "30"))    # Max wait for a free connection to a host
+DNS_TTL_SECONDS = float(os.getenv("HTTP_DNS_TTL", "300"))
+DNS_FAILURE_TTL_SECONDS = float(os.getenv("HTTP_DNS_FAILURE_TTL", "5"))  # Failed lookups are retried after this
+DNS_MAX_HOSTS = 1024
+
+
+# --- DNS cache (used by the pooled transports only; socket.getaddrinfo is left alone) ---
+class DnsCache:
+    """
+    Resolved addresses per (host, port), each entry with its own expiry: successful
+    lookups are kept for 'ttl' seconds, failures for 'failure_ttl' (the error is
+    raised again meanwhile, so a dead host is not looked up once per request).
+    Expired entries are pruned when the cache outgrows 'max_hosts'.
+    """
+
+    def __init__(self, ttl: float, failure_ttl: float, max_hosts: int = DNS_MAX_HOSTS):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.max_hosts = max_hosts
+        self._entries: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "failures": 0, "evictions": 0}
+
+    def _lookup(self, key: tuple) -> Optional[List[str]]:
+        """Cached addresses for 'key', or None when nothing fresh is cached (raises a cached failure)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        if isinstance(entry[1], socket.gaierror):
+            raise entry[1]
+        return entry[1]
+
+    def _store(self, key: tuple, result) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if isinstance(result, socket.gaierror):
+                self.stats["failures"] += 1
+                self._entries[key] = (now + self.failure_ttl, result)
+            else:
+                self._entries[key] = (now + self.ttl, result)
+            if len(self._entries) > self.max_hosts:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        expired = [key for key, (expires, _) in self._entries.items() if expires <= now]
+        for key in expired:
+            del self._entries[key]
+        # Still full: drop the oldest entries (dicts keep insertion order)
+        while len(self._entries) > self.max_hosts:
+            del self._entries[next(iter(self._entries))]
+            self.stats["evictions"] += 1
+        self.stats["evictions"] += len(expired)
+
+    @staticmethod
+    def _addresses(infos) -> List[str]:
+        return list(dict.fromkeys(info[4][0] for info in infos))
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """
+        Returns the IP addresses of 'host', in resolver order.
+
+        Raises:
+            socket.gaierror: If the lookup failed (now or within failure_ttl).
+        """
+        key = (host, port)
+        addresses = self._lookup(key)
+        if addresses is None:
+            try:
+                addresses = self._addresses(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+            except socket.gaierror as e:
+                self._store(key, e)
+                raise
+            self._store(key, addresses)
+        return addresses
+
+    async def resolve_async(self, host: str, port: int) -> List[str]:
+        """Async variant of resolve(); the lookup runs in the event loop's executor."""
+        key = (host, port)
+        addresses = self._lookup(key)
+        if addresses is None:
+            try:
+                infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            except socket.gaierror as e:
+                self._store(key, e)
+                raise
+            addresses = self._addresses(infos)
+            self._store(key, addresses)
+        return addresses
+
+
+_dns_cache = DnsCache(DNS_TTL_SECONDS, DNS_FAILURE_TTL_SECONDS)
+
+
+class _CachedDnsConnectionMixin:
+    """urllib3 connection that resolves its host through the DNS cache and tries each address."""
+
+    def _new_conn(self):
+        dns_host = self._dns_host
+        try:
+            addresses = _dns_cache.resolve(dns_host, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        error = None
+        for address in addresses:
+            # TLS still verifies (and sends SNI for) self.host; only the socket uses the address
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except NewConnectionError as e:
+                error = e
+            finally:
+                self._dns_host = dns_host
+        raise error
+
+
+class _CachedDnsHTTPConnection(_CachedDnsConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CachedDnsHTTPSConnection(_CachedDnsConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _PoolTimeoutMixin:
+    """Blocking pool that waits at most POOL_TIMEOUT for a free connection instead of forever."""
+
+    def _get_conn(self, timeout=None):
+        timeout = POOL_TIMEOUT if timeout is None else timeout
+        try:
+            return super()._get_conn(timeout=timeout)
+        except EmptyPoolError:
+            raise EmptyPoolError(
+                self, f"No free connection to {self.host} within {timeout:g}s "
+                      f"({POOL_PER_HOST} per host, see HTTP_POOL_PER_HOST / HTTP_POOL_TIMEOUT)"
+            ) from None
+
+
+class _HTTPConnectionPool(_PoolTimeoutMixin, HTTPConnectionPool):
+    ConnectionCls = _CachedDnsHTTPConnection
+
+
+class _HTTPSConnectionPool(_PoolTimeoutMixin, HTTPSConnectionPool):
+    ConnectionCls = _CachedDnsHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools use the DNS cache and the pool timeout."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _HTTPConnectionPool, "https": _HTTPSConnectionPool}
+
+
+class _CachedDnsBackend(httpcore.AsyncNetworkBackend):
+    """httpcore network backend that resolves hosts through the DNS cache and tries each address."""
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend):
+        self._backend = backend
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = await _dns_cache.resolve_async(host, port)
+        except socket.gaierror as e:
+            raise httpcore.ConnectError(str(e)) from e
+
+        error = None
+        for address in addresses:
+            # httpcore starts TLS with the origin's host name, not the address connected to
+            try:
+                return await self._backend.connect_tcp(address, port, timeout=timeout, local_address=local_address,
+                                                       socket_options=socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session with keep-alive connection pooling, a per-host connection
+    limit, compression negotiation and default (connect, read) timeouts.
+    """
+
+    def __init__(self):
+        super().__init__()
+        adapter = _PooledAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST, pool_block=True)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        # gzip/deflate, plus br/zstd when the optional decoders are installed
+        self.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        timeout = kwargs.get("timeout")
+        if timeout is None:
+            kwargs["timeout"] = (CONNECT_TIMEOUT, READ_TIMEOUT)
+        elif not isinstance(timeout, tuple):
+            # A bare number is treated as the read timeout
+            kwargs["timeout"] = (min(CONNECT_TIMEOUT, timeout), timeout)
+
+        with self._count_lock:
+            self.request_count += 1
+        span = start_http_span(method, url)
+        try:
+            response = super().request(method, url, **kwargs)
+        except Exception as e:
+            end_http_span(span, error=type(e).__name__)
+            raise
+        if span is not None:
+            # Streamed bodies are read later by the caller: their span ends at the headers
+            size = response.headers.get("Content-Length") if kwargs.get("stream") else len(response.content)
+            end_http_span(span, response.status_code, int(size) if size is not None else None)
+        return response
+
+
+_session: Optional[PooledSession] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> PooledSession:
+    """
+    Returns the process-wide pooled HTTP session shared by all tools.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession()
+        return _session
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_async_stats = {"requests": 0}
+
+
+async def _count_async_request(request: httpx.Request) -> None:
+    _async_stats["requests"] += 1
+
+
+class _TracedStream(httpx.AsyncByteStream):
+    """Response body stream that counts the bytes read and ends the request's span on close."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, span, status: int):
+        self._stream = stream
+        self._span = span
+        self._status = status
+        self._bytes = 0
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._bytes += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+        end_http_span(self._span, self._status, self._bytes)
+
+
+class _TracingTransport(httpx.AsyncBaseTransport):
+    """Wraps the pooled transport with one tracing span per request (TRACE_DIR set)."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        span = start_http_span(request.method, str(request.url))
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception as e:
+            end_http_span(span, error=type(e).__name__)
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TracedStream(response.stream, span, response.status_code),
+            extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Returns the pooled async HTTP client for the running event loop, configured
+    like the sync session (per-host limits, keep-alive, compression, timeouts,
+    DNS cache). httpx clients are bound to a loop, so one client is kept per loop;
+    close it with close_async_http_client() before the loop ends.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=POOL_HOSTS * POOL_PER_HOST, max_keepalive_connections=POOL_HOSTS)
+        )
+        # httpx has no public hook for the network backend of its httpcore connection pool
+        transport._pool._network_backend = _CachedDnsBackend(transport._pool._network_backend)
+        client = httpx.AsyncClient(
+            transport=_TracingTransport(transport) if TRACING else transport,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT, pool=POOL_TIMEOUT),
+            headers={"Accept-Encoding": ACCEPT_ENCODING},
+            follow_redirects=True,
+            event_hooks={"request": [_count_async_request]}
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_http_client() -> None:
+    """Closes the running event loop's async client (and its keep-alive connections), if any."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def async_timeout(timeout: float) -> httpx.Timeout:
+    """Builds an httpx timeout from a read timeout, mirroring PooledSession.request()."""
+    return httpx.Timeout(timeout, connect=min(CONNECT_TIMEOUT, timeout), pool=POOL_TIMEOUT)
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Returns connection pool statistics: requests sent, connections opened per host,
+    and how many requests reused an existing keep-alive connection.
+    """
+    if _session is None:
+        return {"requests": 0, "connections_opened": 0, "connections_reused": 0, "per_host": {},
+                "async_requests": _async_stats["requests"], "dns": dict(_dns_cache.stats)}
+
+    per_host = {}
+    for adapter in set(_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            per_host[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "requests": pool.num_requests,
+                "connections_opened": pool.num_connections
+            }
+
+    opened = sum(host["connections_opened"] for host in per_host.values())
+    sent = sum(host["requests"] for host in per_host.values())
+    with _dns_cache._lock:
+        dns = dict(_dns_cache.stats)
+    return {
+        "requests": _session.request_count,
+        "connections_opened": opened,
+        "connections_reused": max(sent - opened, 0),
+        "per_host": per_host,
+        "async_requests": _async_stats["requests"],
+        "dns": dns
+    }
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# CACHE_DIR moves every on-disk cache (e.g. to a scratch directory for benchmarks)
+DEFAULT_CACHE_ROOT = Path(os.getenv("CACHE_DIR", Path(__file__).parent.parent / ".cache"))
+# Size of each namespace before least recently used entries are pruned (down to PRUNE_TO of it,
+# so the directory is not rescanned on every write once it is full)
+DEFAULT_MAX_BYTES = int(os.getenv("JSON_CACHE_MAX_MB", "100")) * 1024 * 1024
+PRUNE_TO = 0.9
+
+
+class JsonCache:
+    """
+    Persistent key -> JSON entry store, one file per key under .cache/<namespace>.
+    Keys are any JSON-serializable value (typically a tuple); writes are atomic.
+    Freshness is left to the caller, which stores its own timestamps in the entry;
+    the store only drops entries written more than 'max_age' seconds ago (None: no
+    limit) and, once the namespace outgrows 'max_bytes', the least recently used ones.
+    """
+
+    def __init__(self, namespace: str, cache_root: Path = DEFAULT_CACHE_ROOT,
+                 max_age: Optional[float] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_root) / namespace
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None  # Running size of the namespace, scanned on the first write
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _path(self, key: Any) -> Path:
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        """Returns the stored entry for 'key', or None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stat = os.fstat(f.fileno())
+                entry = None if self._expired(stat, time.time()) else json.load(f)
+            if entry is not None:
+                # Touch only the access time, so pruning sees it as recently used; the
+                # modification time stays the write time that max_age is measured from
+                os.utime(path, (time.time(), stat.st_mtime))
+        except (FileNotFoundError, json.JSONDecodeError):
+            entry = None
+        with self._lock:
+            self.stats["hits" if entry is not None else "misses"] += 1
+        return entry
+
+    def set(self, key: Any, entry: Dict[str, Any]) -> None:
+        """Stores 'entry' (JSON-serializable) under 'key'."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        size = tmp_path.stat().st_size
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(stat.st_size for stat, _ in self._entries())
+            try:
+                self._total_bytes -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+            self._total_bytes += size
+            self.stats["writes"] += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: Any) -> None:
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                return
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _expired(self, stat: os.stat_result, now: float) -> bool:
+        return self.max_age is not None and now - stat.st_mtime > self.max_age
+
+    def _entries(self):
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                entries.append((path.stat(), path))
+            except FileNotFoundError:
+                pass
+        return entries
+
+    def _evict(self) -> None:
+        """Removes expired entries, then least recently used ones until the namespace is below PRUNE_TO of max_bytes."""
+        now = time.time()
+        entries = self._entries()
+        self._total_bytes = sum(stat.st_size for stat, _ in entries)
+        for stat, path in sorted(entries, key=lambda item: (not self._expired(item[0], now), item[0].st_atime)):
+            if self._total_bytes <= self.max_bytes * PRUNE_TO and not self._expired(stat, now):
+                break
+            path.unlink(missing_ok=True)
+            self._total_bytes -= stat.st_size
+            self.stats["evictions"] += 1
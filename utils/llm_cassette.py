@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.models import BaseLlm, Gemini, LlmRequest, LlmResponse
+
+from utils.stage_memo import fingerprint
+
+# "record": real Gemini calls are also written to LLM_CASSETTE; "replay": the model is a local
+# stand-in that serves them from LLM_CASSETTE, without a network; unset: plain Gemini
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "")
+LLM_CASSETTE = Path(os.getenv("LLM_CASSETTE", Path(__file__).parent.parent / "output" / "cassettes" / "llm.jsonl"))
+# Replay delay per model call: "recorded" (the original latency) or a number of seconds
+LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "recorded")
+
+# ADK starts every system instruction with the agent's identity (see google.adk.flows.llm_flows.identity)
+_AGENT_NAME = re.compile(r'Your internal name is "([^"]+)"')
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when the cassette has no response for a model request."""
+
+
+def _jsonable(value: Any) -> Any:
+    return value.model_dump(mode="json", exclude_none=True) if hasattr(value, "model_dump") else value
+
+
+def _strip_ids(value: Any) -> Any:
+    """Drops function call / response ids, which differ on every run."""
+    if isinstance(value, dict):
+        return {key: _strip_ids(item) for key, item in value.items() if key not in ("id", "thought_signature")}
+    if isinstance(value, list):
+        return [_strip_ids(item) for item in value]
+    return value
+
+
+def _agent_name(llm_request: LlmRequest) -> str:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    match = _AGENT_NAME.search(instruction if isinstance(instruction, str) else json.dumps(_jsonable(instruction)))
+    return match.group(1) if match else ""
+
+
+def request_keys(llm_request: LlmRequest) -> Dict[str, Any]:
+    """
+    Lookup keys of a model request: 'exact' fingerprints the model, system instruction,
+    tools and conversation (ids and VOLATILE_KEYS left out); 'agent' and 'turn' (the
+    number of contents so far) locate the same step of an agent's tool loop when the
+    conversation differs, e.g. because a tool returned other data than when recorded.
+    """
+    config = llm_request.config
+    return {
+        "exact": fingerprint({
+            "model": llm_request.model,
+            "system_instruction": _jsonable(config.system_instruction) if config else None,
+            "tools": sorted(llm_request.tools_dict),
+            "contents": _strip_ids([_jsonable(content) for content in llm_request.contents])
+        }),
+        "agent": _agent_name(llm_request),
+        "turn": len(llm_request.contents)
+    }
+
+
+class Cassette:
+    """
+    Model responses keyed by request, stored one JSON line per model call. A request
+    is matched by its exact key, else by (agent, turn); when several entries match
+    they are served in recorded order, cycling, so one recording can drive any
+    number of pipeline runs.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._exact: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._turns: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+        self._served: Dict[Any, int] = defaultdict(int)
+        self.stats = {"recorded": 0, "exact_hits": 0, "turn_hits": 0, "misses": 0, "in_flight": 0, "peak_in_flight": 0}
+
+    def load(self) -> "Cassette":
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._exact[entry["exact"]].append(entry)
+                    self._turns[(entry["agent"], entry["turn"])].append(entry)
+        return self
+
+    def record(self, keys: Dict[str, Any], model: str, responses: List[LlmResponse], elapsed: float) -> None:
+        entry = {**keys, "model": model, "elapsed_s": round(elapsed, 3),
+                 "responses": [_strip_ids(response.model_dump(mode="json", exclude_none=True)) for response in responses]}
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self.stats["recorded"] += 1
+
+    def lookup(self, keys: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Raises:
+            CassetteMissError: If no entry matches.
+        """
+        turn = (keys["agent"], keys["turn"])
+        with self._lock:
+            for index, key, hit in ((self._exact, keys["exact"], "exact_hits"), (self._turns, turn, "turn_hits")):
+                entries = index.get(key)
+                if entries:
+                    entry = entries[self._served[key] % len(entries)]
+                    self._served[key] += 1
+                    self.stats[hit] += 1
+                    return entry
+            self.stats["misses"] += 1
+        raise CassetteMissError(f"No recorded response for agent '{keys['agent']}' at turn {keys['turn']} in {self.path}")
+
+    def started(self) -> None:
+        with self._lock:
+            self.stats["in_flight"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+
+    def finished(self) -> None:
+        with self._lock:
+            self.stats["in_flight"] -= 1
+
+
+_cassettes: Dict[Path, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: Path = LLM_CASSETTE, load: bool = False) -> Cassette:
+    """Returns the process-wide Cassette for 'path' (loading the file first when 'load')."""
+    path = Path(path)
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path).load() if load else Cassette(path)
+        return _cassettes[path]
+
+
+class RecordingGemini(Gemini):
+    """Gemini that also writes every request's responses to a cassette (LLM_CASSETTE_MODE=record)."""
+
+    cassette_path: Path = LLM_CASSETTE
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        keys = request_keys(llm_request)
+        start = time.perf_counter()
+        responses = []
+        async for response in super().generate_content_async(llm_request, stream):
+            responses.append(response)
+            yield response
+        await asyncio.to_thread(get_cassette(self.cassette_path).record, keys, self.model, responses,
+                                time.perf_counter() - start)
+
+
+class ReplayLlm(BaseLlm):
+    """
+    Local model stand-in (LLM_CASSETTE_MODE=replay): serves recorded responses after
+    'latency' seconds (None: the recorded latency), so the agent graph runs with
+    realistic timing and no network. Tools still run for real.
+    """
+
+    cassette_path: Path = LLM_CASSETTE
+    latency: Optional[float] = None
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        cassette = get_cassette(self.cassette_path, load=True)
+        entry = cassette.lookup(request_keys(llm_request))
+        cassette.started()
+        try:
+            await asyncio.sleep(entry["elapsed_s"] if self.latency is None else self.latency)
+        finally:
+            cassette.finished()
+        for response in entry["responses"]:
+            yield LlmResponse.model_validate(response)
+
+
+def replay_latency() -> Optional[float]:
+    return None if LLM_REPLAY_LATENCY == "recorded" else float(LLM_REPLAY_LATENCY)
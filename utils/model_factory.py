@@ -0,0 +1,20 @@
+from google.adk.models import BaseLlm, Gemini
+
+from utils.llm_cassette import LLM_CASSETTE_MODE, RecordingGemini, ReplayLlm, replay_latency
+from utils.retry_config import get_http_retry_config
+
+
+def gemini_model(model: str) -> BaseLlm:
+    """
+    The model every agent uses: Gemini with the shared retry configuration, or, with
+    LLM_CASSETTE_MODE set, the recording ("record") or replaying ("replay") variant
+    from utils/llm_cassette.py.
+
+    Args:
+        model (str): Gemini model name, e.g. "gemini-2.5-flash".
+    """
+    if LLM_CASSETTE_MODE == "replay":
+        return ReplayLlm(model=model, latency=replay_latency())
+    if LLM_CASSETTE_MODE == "record":
+        return RecordingGemini(model=model, retry_options=get_http_retry_config())
+    return Gemini(model=model, retry_options=get_http_retry_config())
@@ -0,0 +1,118 @@
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration (overridable through environment variables) ---
+# 0 disables the pool: CPU-bound work then runs inline / in a worker thread
+CPU_WORKERS = int(os.getenv("CPU_POOL_WORKERS", "0"))
+# Modules imported once by every worker process when it starts (sklearn, numpy, lxml, ...)
+WARM_MODULES = ("tools.nlp_analyzer",)
+
+
+def _warm_worker(modules: tuple) -> None:
+    """Process initializer: pays the heavy import cost once per worker, not per task."""
+    for module in modules:
+        importlib.import_module(module)
+
+
+def _noop(_: Any) -> None:
+    return None
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the process-wide pool for CPU-bound stages (HTML cleaning, vectorizing),
+    or None when CPU_POOL_WORKERS is 0.
+
+    Workers are started with 'spawn' so they never inherit the parent's event loops,
+    HTTP connections or locks, and are kept alive between tasks.
+    """
+    global _pool
+    if CPU_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=CPU_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+                initargs=(WARM_MODULES,)
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drops a broken pool (e.g. a worker was killed) so the next call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def warm_up() -> None:
+    """Starts every worker and runs its initializer ahead of the first real task."""
+    pool = get_process_pool()
+    if pool is not None:
+        list(pool.map(_noop, range(CPU_WORKERS)))
+
+
+def run_cpu_bound_sync(func: Callable, *args: Any) -> Any:
+    """
+    Runs func(*args) in the process pool and waits for the result, or inline when
+    the pool is disabled. 'func' must be a module-level (picklable) function.
+    """
+    pool = get_process_pool()
+    if pool is None:
+        return func(*args)
+    try:
+        return pool.submit(func, *args).result()
+    except BrokenProcessPool:
+        logger.warning("Process pool is broken; running %s inline", func.__name__)
+        _discard_pool(pool)
+        return func(*args)
+
+
+async def run_cpu_bound(func: Callable, *args: Any) -> Any:
+    """
+    Async counterpart of run_cpu_bound_sync(): awaits func(*args) in the process pool,
+    or in a worker thread when the pool is disabled.
+    """
+    pool = get_process_pool()
+    if pool is None:
+        return await asyncio.to_thread(func, *args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        logger.warning("Process pool is broken; running %s in a thread", func.__name__)
+        _discard_pool(pool)
+        return await asyncio.to_thread(func, *args)
+
+
+def map_cpu_bound(func: Callable, items: Iterable[Any]) -> List[Any]:
+    """
+    Applies func to every item across the process pool (one task per item, results
+    in input order), or sequentially when the pool is disabled.
+    """
+    items = list(items)
+    pool = get_process_pool()
+    if pool is None or len(items) < 2:
+        return [func(item) for item in items]
+    try:
+        return list(pool.map(func, items))
+    except BrokenProcessPool:
+        logger.warning("Process pool is broken; running %s inline", func.__name__)
+        _discard_pool(pool)
+        return [func(item) for item in items]
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.domains import domain_of
+
+RANK_STORE_PATH = Path(os.getenv("RANK_STORE_PATH", Path(__file__).parent.parent / "output" / "rank_history.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rankings (
+    keyword  TEXT    NOT NULL,
+    domain   TEXT    NOT NULL,
+    date     TEXT    NOT NULL,  -- ISO yyyy-mm-dd
+    position INTEGER NOT NULL,  -- Best position of the domain for the keyword that day
+    url      TEXT,
+    title    TEXT,
+    PRIMARY KEY (keyword, domain, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rankings_by_date ON rankings (date, keyword, position);
+CREATE INDEX IF NOT EXISTS rankings_by_domain ON rankings (domain, date);
+
+-- Which keywords were searched on which day (and how many positions deep), so "not ranking" can be
+-- told apart from "not searched"
+CREATE TABLE IF NOT EXISTS searches (
+    keyword       TEXT    NOT NULL,
+    date          TEXT    NOT NULL,
+    depth         INTEGER NOT NULL,
+    total_results INTEGER,
+    PRIMARY KEY (keyword, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS searches_by_date ON searches (date);
+"""
+
+
+# A domain filter matches the domain and its subdomains, like serp_mapper's client matching
+_DOMAIN_MATCH = "({column} = ? OR {column} GLOB '*.' || ?)"
+
+
+class RankStore:
+    """
+    Embedded SQLite rank history: one row per (keyword, domain, date) with the
+    domain's best position that day, indexed for time-series queries
+    (history, position deltas, new entrants, drop-offs).
+    """
+
+    def __init__(self, path: Path = RANK_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def record_responses(self, responses: Dict[str, Dict[str, Any]], depth: int, day: Optional[str] = None) -> int:
+        """
+        Stores a batch of SerpApi responses ({keyword: response}, e.g. from
+        ranking_monitor.get_serp_responses_many) searched 'depth' positions deep
+        (SERPAPI_DEPTH) for 'day' (default: today).
+        Re-recording a day replaces it. Errors are skipped. Returns the rows written.
+        """
+        day = day or date.today().isoformat()
+        searches, rows = [], {}
+        for keyword, response in responses.items():
+            if "error" in response:
+                continue
+            organic = response.get("organic_results", [])
+            searches.append((keyword, day, depth, (response.get("search_information") or {}).get("total_results")))
+            for item in organic:
+                domain, position = domain_of(item.get("link")), item.get("position")
+                if domain and position and (keyword, domain) not in rows:  # Results are in position order
+                    rows[(keyword, domain)] = (keyword, domain, day, position, item.get("link"), item.get("title"))
+
+        with self._lock, self._conn:
+            for keyword, *_ in searches:
+                self._conn.execute("DELETE FROM rankings WHERE keyword = ? AND date = ?", (keyword, day))
+            self._conn.executemany("INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)", searches)
+            self._conn.executemany("INSERT INTO rankings VALUES (?, ?, ?, ?, ?, ?)", rows.values())
+        return len(rows)
+
+    def dates(self, keyword: Optional[str] = None) -> List[str]:
+        """Days with recorded searches (oldest first), optionally for one keyword."""
+        if keyword is None:
+            rows = self._query("SELECT DISTINCT date FROM searches ORDER BY date")
+        else:
+            rows = self._query("SELECT date FROM searches WHERE keyword = ? ORDER BY date", (keyword,))
+        return [row["date"] for row in rows]
+
+    def resolve_dates(self, since: Optional[str] = None,
+                      until: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Defaults: 'until' = the latest recorded day, 'since' = the recorded day before it."""
+        days = self.dates()
+        until = until or (days[-1] if days else None)
+        earlier = [day for day in days if until and day < until]
+        return since or (earlier[-1] if earlier else None), until
+
+    def history(self, keyword: str, domain: str, days: int = 90) -> List[Dict[str, Any]]:
+        """
+        Daily best positions of 'domain' (or a subdomain) for 'keyword' over the last 'days'
+        recorded days (position None on days the keyword was searched but the domain did not rank).
+        """
+        domain = domain_of(domain)
+        # Resolve the subdomains first, so the join below stays on the primary key
+        domains = [domain] + [row["domain"] for row in self._query(
+            "SELECT DISTINCT domain FROM rankings WHERE keyword = ? AND domain GLOB ?", (keyword, "*." + domain)
+        )]
+        return self._query(
+            f"""
+            SELECT s.date, MIN(r.position) AS position, r.url
+            FROM (SELECT date FROM searches WHERE keyword = ? ORDER BY date DESC LIMIT ?) AS s
+            LEFT JOIN rankings AS r
+                ON r.keyword = ? AND r.domain IN ({", ".join("?" * len(domains))}) AND r.date = s.date
+            GROUP BY s.date
+            ORDER BY s.date
+            """,
+            (keyword, days, keyword, *domains)
+        )
+
+    def position_deltas(self, since: Optional[str] = None, until: Optional[str] = None,
+                        domain: Optional[str] = None, keyword: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Position changes between two days for (keyword, domain) pairs ranking on both
+        ('domain' also selects its subdomains); 'change' > 0 means the domain moved up.
+        Sorted by the largest moves.
+        """
+        since, until = self.resolve_dates(since, until)
+        filters, params = "", [since, until]
+        if domain:
+            filters += " AND " + _DOMAIN_MATCH.format(column="new.domain")
+            params += [domain_of(domain)] * 2
+        if keyword:
+            filters += " AND new.keyword = ?"
+            params.append(keyword)
+        return self._query(
+            f"""
+            SELECT new.keyword, new.domain, old.position AS previous_position, new.position,
+                   old.position - new.position AS change
+            FROM rankings AS old
+            JOIN rankings AS new ON new.keyword = old.keyword AND new.domain = old.domain
+            WHERE old.date = ? AND new.date = ?{filters}
+            ORDER BY ABS(old.position - new.position) DESC, new.keyword, new.position
+            """,
+            tuple(params)
+        )
+
+    def new_entrants(self, since: Optional[str] = None, until: Optional[str] = None,
+                     max_position: int = 10) -> List[Dict[str, Any]]:
+        """
+        Domains within the top 'max_position' on 'until' that were not there on
+        'since' (for keywords searched on both days).
+        """
+        return self._crossings(*self.resolve_dates(since, until), max_position)
+
+    def drop_offs(self, since: Optional[str] = None, until: Optional[str] = None,
+                  max_position: int = 10) -> List[Dict[str, Any]]:
+        """
+        Domains within the top 'max_position' on 'since' that fell out of it by
+        'until' (position None when they no longer rank at all).
+        """
+        since, until = self.resolve_dates(since, until)
+        return self._crossings(until, since, max_position, new_key="previous_position", old_key="position")
+
+    def _crossings(self, before: Optional[str], after: Optional[str], max_position: int,
+                   new_key: str = "position", old_key: str = "previous_position") -> List[Dict[str, Any]]:
+        """Rows in the top 'max_position' on 'after' that were not in it on 'before'."""
+        return self._query(
+            f"""
+            SELECT a.keyword, a.domain, a.url, a.position AS {new_key}, b.position AS {old_key}
+            FROM rankings AS a
+            JOIN searches AS s ON s.keyword = a.keyword AND s.date = ?
+            LEFT JOIN rankings AS b ON b.keyword = a.keyword AND b.domain = a.domain AND b.date = ?
+            WHERE a.date = ? AND a.position <= ? AND (b.position IS NULL OR b.position > ?)
+            ORDER BY a.keyword, a.position
+            """,
+            (before, before, after, max_position, max_position)
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[RankStore] = None
+_store_lock = threading.Lock()
+
+
+def get_rank_store() -> RankStore:
+    """Returns the process-wide RankStore (RANK_STORE_PATH), opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RankStore()
+        return _store
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# Longest a caller may be told to wait for a slot before the call fails instead
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "300"))
+
+
+class RateLimitTimeout(TimeoutError):
+    """Raised when the next free slot is further away than the limiter's max_wait."""
+
+
+class RateLimiter:
+    """
+    Thread-safe and asyncio-friendly rate limiter: at most 'max_calls' calls per
+    'period' seconds, with bursts of up to 'max_calls' (generic cell rate algorithm).
+
+    acquire() / acquire_async() reserve the next free slot and wait until it is due,
+    so waiting callers are served in order without busy-polling. pause() blocks all
+    callers for a while, e.g. after the API answered 429 Too Many Requests.
+    A caller whose slot is more than 'max_wait' seconds away gets RateLimitTimeout
+    right away (and books nothing), instead of sleeping until the quota frees up.
+    """
+
+    def __init__(self, max_calls: int, period: float, name: str = "", max_wait: float = RATE_LIMIT_MAX_WAIT):
+        self.name = name
+        self.max_calls = max_calls
+        self.period = period
+        self.max_wait = max_wait
+        self._interval = period / max_calls
+        self._tolerance = period - self._interval  # How far ahead a burst may run
+        self._tat = 0.0                            # Theoretical arrival time of the next call
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "waited_seconds": 0.0, "pauses": 0, "timeouts": 0}
+
+    def _reserve(self) -> float:
+        """
+        Books the next slot and returns how long the caller must wait for it.
+
+        Raises:
+            RateLimitTimeout: If that wait would exceed max_wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._tat - self._tolerance, self._paused_until)
+            if start - now > self.max_wait:
+                self.stats["timeouts"] += 1
+                raise RateLimitTimeout(
+                    f"Rate limit '{self.name}' ({self.max_calls} calls per {self.period:g}s) has no free slot "
+                    f"for {start - now:.0f}s, more than the {self.max_wait:g}s allowed (RATE_LIMIT_MAX_WAIT)"
+                )
+            self._tat = max(self._tat, start) + self._interval
+            delay = start - now
+            self.stats["calls"] += 1
+            self.stats["waited_seconds"] += delay
+            return delay
+
+    def acquire(self) -> None:
+        """
+        Blocks until the caller may send its request.
+
+        Raises:
+            RateLimitTimeout: If the wait would exceed max_wait.
+        """
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Async counterpart of acquire(); waits without blocking the event loop."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Holds back every caller for 'seconds' (quota exhausted / Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.stats["pauses"] += 1
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, max_calls: int, period: float) -> RateLimiter:
+    """
+    Returns the process-wide limiter registered under 'name' (one per API quota),
+    creating it with the given limits on first use.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = RateLimiter(max_calls, period, name=name)
+        return limiter
+
+
+def retry_after_seconds(value: Optional[str], default: float) -> float:
+    """Parses a Retry-After header given in seconds; falls back to 'default'."""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,101 @@
+import hashlib
+import inspect
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from utils.checkpoint import failed_output, restored_output
+from utils.json_cache import JsonCache
+
+# Reuse an agent's output when none of its inputs changed since a previous run
+STAGE_MEMO = os.getenv("STAGE_MEMO", "1") == "1"
+# Fields that change on every call without the data changing; left out of fingerprints
+VOLATILE_KEYS = frozenset({"analysis_date", "analyzed_at", "searched_at"})
+
+_stage_cache = JsonCache("stages")
+
+
+def _stable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _stable(item) for key, item in value.items() if key not in VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_stable(item) for item in value]
+    return value
+
+
+def fingerprint(value: Any) -> str:
+    """SHA-256 of the canonical JSON of 'value' (keys sorted, VOLATILE_KEYS dropped)."""
+    return hashlib.sha256(json.dumps(_stable(value), sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class StageMemo:
+    """
+    Content-addressed memo for one agent stage of the pipeline.
+
+    The stage key hashes the agent name, its output_key, its instruction text and the
+    inputs returned by 'inputs(callback_context)': URL / keyword and a fingerprint of
+    the data the agent works from (the analysis, SERP, sitemap summary or PSI result,
+    served from the tools' caches or from a prefetch). 'inputs' may leave what it read
+    in the session state, so the agent's tool returns it instead of fetching again.
+    'before' is a before_agent_callback: on a hit it restores the stored output under
+    'output_key', writes the stage's output files through 'save(callback_context, value)'
+    and emits the output as the agent's response, so the model is not called and the
+    analyst still finds it in its context. 'remember' wraps the callback that
+    finalizes the output (or serves as the after_agent_callback) and stores the result.
+    """
+
+    def __init__(self, output_key: str, instruction: str,
+                 inputs: Callable[[CallbackContext], Awaitable[Optional[Dict[str, Any]]]],
+                 save: Optional[Callable[[CallbackContext, Any], Any]] = None):
+        self.output_key = output_key
+        self.instruction = instruction
+        self.inputs = inputs
+        self.save = save
+
+    async def before(self, callback_context: CallbackContext) -> Optional[types.Content]:
+        restored = restored_output(callback_context, self.output_key)
+        if restored is not None or not STAGE_MEMO:
+            return restored
+        inputs = await self.inputs(callback_context)
+        if inputs is None:  # Inputs could not be fetched: always run the agent
+            return None
+
+        key = fingerprint({
+            "agent": callback_context.agent_name,
+            "output_key": self.output_key,
+            "instruction": self.instruction,
+            "inputs": inputs
+        })
+        entry = _stage_cache.get(key)
+        if entry is None:
+            callback_context.state[f"{callback_context.agent_name}_stage_key"] = key
+            return None
+
+        value = entry["value"]
+        callback_context.state[self.output_key] = value
+        if self.save is not None:
+            # Output files are written on hits too, so every run leaves a complete output folder
+            result = self.save(callback_context, value)
+            if inspect.isawaitable(result):
+                await result
+        text = value if isinstance(value, str) else json.dumps(value)
+        return types.Content(role="model", parts=[types.Part(text=text)])
+
+    def remember(self, callback: Optional[Callable] = None) -> Callable:
+        """Runs 'callback' (if any), then stores the stage output under the key computed by 'before'."""
+        async def _remember(callback_context: CallbackContext):
+            result = callback(callback_context) if callback else None
+            if inspect.isawaitable(result):
+                result = await result
+
+            key = callback_context.state.get(f"{callback_context.agent_name}_stage_key")
+            value = callback_context.state.get(self.output_key)
+            if key and value and not failed_output(value):
+                _stage_cache.set(key, {"stored_at": time.time(), "output_key": self.output_key, "value": value})
+            return result
+
+        return _remember
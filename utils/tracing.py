@@ -0,0 +1,223 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import secrets
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Tracing is on when TRACE_DIR is set: each run writes <run>.trace.json (Chrome trace /
+# Perfetto) and <run>.otlp.json (OpenTelemetry OTLP/JSON) there
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+TRACING = bool(TRACE_DIR)
+SERVICE_NAME = "strategyradar"
+SECRET_PARAMS = frozenset({"key", "api_key", "apikey", "token", "access_token"})
+
+
+class Span:
+    """One timed operation: an agent, a tool call, an LLM request or an HTTP request."""
+
+    __slots__ = ("name", "category", "span_id", "parent", "start_ns", "end_ns", "lane", "attributes")
+
+    def __init__(self, name: str, category: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.span_id = secrets.token_hex(8)
+        self.parent = parent
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.lane = _lane()
+        self.attributes = attributes
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+# Retry number of the HTTP requests sent in the current context (0: first attempt), see retry_attempt()
+_retry: contextvars.ContextVar[int] = contextvars.ContextVar("http_retry", default=0)
+# Lanes die with their task / thread, so ids reused by later tasks or threads get lanes of their own
+_task_lanes: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
+_thread_lanes = threading.local()
+_lane_counter = itertools.count(1)
+_lanes_lock = threading.Lock()
+
+
+def _lane() -> int:
+    """Chrome-trace 'thread' of the caller: one lane per asyncio task (or thread), so parallel branches get their own rows."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is None:
+        if not hasattr(_thread_lanes, "lane"):
+            with _lanes_lock:
+                _thread_lanes.lane = next(_lane_counter)
+        return _thread_lanes.lane
+    with _lanes_lock:
+        if task not in _task_lanes:
+            _task_lanes[task] = next(_lane_counter)
+        return _task_lanes[task]
+
+
+class Tracer:
+    """Collects finished spans and exports them as Chrome trace and OTLP/JSON files."""
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def start(self, name: str, category: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+        return Span(name, category, parent if parent is not None else _current.get(), attributes)
+
+    def end(self, span: Span, end_ns: Optional[int] = None, **attributes: Any) -> None:
+        if span.end_ns is not None:
+            return
+        span.end_ns = end_ns or time.time_ns()
+        span.attributes.update(attributes)
+        with self._lock:
+            self.spans.append(span)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        origin = min((span.start_ns for span in spans), default=0)
+        events = [
+            {"ph": "M", "name": "thread_name", "pid": 1, "tid": lane, "args": {"name": f"lane {lane}"}}
+            for lane in sorted({span.lane for span in spans})
+        ]
+        events += [
+            {
+                "ph": "X",
+                "name": span.name,
+                "cat": span.category,
+                "pid": 1,
+                "tid": span.lane,
+                "ts": (span.start_ns - origin) / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "args": {**span.attributes, "span_id": span.span_id,
+                         "parent_span_id": span.parent.span_id if span.parent else None}
+            }
+            for span in sorted(spans, key=lambda span: span.start_ns)
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def otlp(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{
+                "scope": {"name": "utils.tracing"},
+                "spans": [
+                    {
+                        "traceId": self.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent.span_id if span.parent else "",
+                        "name": span.name,
+                        "kind": 3 if span.category in ("http", "llm") else 1,  # CLIENT / INTERNAL
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns),
+                        "attributes": [_attribute(key, value) for key, value in span.attributes.items()
+                                       if value is not None] + [_attribute("category", span.category)]
+                    }
+                    for span in spans
+                ]
+            }]
+        }]}
+
+    def export(self, directory: Path, name: str) -> Dict[str, Path]:
+        """Writes <name>.trace.json and <name>.otlp.json to 'directory'."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = {"chrome": directory / f"{name}.trace.json", "otlp": directory / f"{name}.otlp.json"}
+        for kind, document in (("chrome", self.chrome_trace()), ("otlp", self.otlp())):
+            with open(paths[kind], "w", encoding="utf-8") as f:
+                json.dump(document, f, default=str)
+        return paths
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def set_current_span(current: Optional[Span]) -> None:
+    """Makes 'current' the parent of spans started later in this task (used by the tracing plugin)."""
+    _current.set(current)
+
+
+def reset_tracer() -> Tracer:
+    """Starts a new trace (e.g. per pipeline run) and returns it."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+@contextmanager
+def span(name: str, category: str = "function", **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Times the enclosed block as a child of the current span. A no-op (yields None)
+    unless tracing is enabled.
+    """
+    if not TRACING:
+        yield None
+        return
+    current = _tracer.start(name, category, **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        _tracer.end(current)
+
+
+def _redact(url: str) -> str:
+    """Drops credentials (key / api_key / token query parameters) from a URL."""
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if name.lower() not in SECRET_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+@contextmanager
+def retry_attempt(attempt: int) -> Iterator[None]:
+    """Marks the HTTP requests sent in the block as retry number 'attempt' (0: the first try) in their spans."""
+    token = _retry.set(attempt)
+    try:
+        yield
+    finally:
+        _retry.reset(token)
+
+
+def start_http_span(method: str, url: str) -> Optional[Span]:
+    """Opens the span of an outbound HTTP request (see utils.http_client); None when tracing is off."""
+    if not TRACING:
+        return None
+    url = _redact(url)
+    return _tracer.start(f"{method} {url.split('?', 1)[0]}", "http", method=method, url=url, retry=_retry.get())
+
+
+def end_http_span(span: Optional[Span], status: Optional[int] = None, bytes_received: Optional[int] = None,
+                  error: Optional[str] = None) -> None:
+    if span is not None:
+        _tracer.end(span, status=status, bytes=bytes_received, error=error)
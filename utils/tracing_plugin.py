@@ -0,0 +1,117 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import BaseTool, ToolContext
+
+from utils.tracing import TRACE_DIR, Span, get_tracer, reset_tracer, set_current_span
+
+
+class TracingPlugin(BasePlugin):
+    """
+    Records a span for every agent, tool call and LLM request of a run; HTTP requests
+    made through utils.http_client nest under them. The trace is written to TRACE_DIR
+    when the run ends.
+    """
+
+    def __init__(self, directory: str = TRACE_DIR):
+        super().__init__(name="tracing")
+        self.directory = directory
+        self._open: Dict[tuple, Span] = {}
+        self._last_event_ns: Dict[tuple, int] = {}
+
+    def _agent_span(self, invocation_id: str, agent_name: Optional[str]) -> Optional[Span]:
+        return self._open.get((invocation_id, "agent", agent_name))
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext):
+        reset_tracer()
+        return None
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        invocation_id = callback_context.invocation_id
+        parent = self._agent_span(invocation_id, agent.parent_agent.name if agent.parent_agent else None)
+        current = get_tracer().start(agent.name, "agent", parent, agent_type=type(agent).__name__)
+        self._open[(invocation_id, "agent", agent.name)] = current
+        set_current_span(current)
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        current = self._open.pop((callback_context.invocation_id, "agent", agent.name), None)
+        if current is not None:
+            get_tracer().end(current)
+            set_current_span(current.parent)
+        return None
+
+    async def before_tool_callback(self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext):
+        parent = self._agent_span(tool_context.invocation_id, tool_context.agent_name)
+        current = get_tracer().start(tool.name, "tool", parent, args=json.dumps(tool_args, default=str)[:200])
+        self._open[(tool_context.invocation_id, "tool", tool_context.function_call_id)] = current
+        set_current_span(current)
+        return None
+
+    def _end_tool(self, tool_context: ToolContext, **attributes: Any) -> None:
+        current = self._open.pop((tool_context.invocation_id, "tool", tool_context.function_call_id), None)
+        if current is not None:
+            get_tracer().end(current, **attributes)
+            set_current_span(current.parent)
+
+    async def after_tool_callback(self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext,
+                                  result: Dict[str, Any]):
+        self._end_tool(tool_context, bytes=len(json.dumps(result, default=str)))
+        return None
+
+    async def on_tool_error_callback(self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext,
+                                     error: Exception):
+        self._end_tool(tool_context, error=type(error).__name__)
+        return None
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest):
+        parent = self._agent_span(callback_context.invocation_id, callback_context.agent_name)
+        current = get_tracer().start(f"llm {llm_request.model}", "llm", parent, model=llm_request.model,
+                                request_contents=len(llm_request.contents))
+        self._open[(callback_context.invocation_id, "llm", callback_context.agent_name)] = current
+        return None
+
+    def _end_model(self, callback_context: CallbackContext, **attributes: Any) -> None:
+        current = self._open.pop((callback_context.invocation_id, "llm", callback_context.agent_name), None)
+        if current is not None:
+            get_tracer().end(current, **attributes)
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse):
+        usage = llm_response.usage_metadata
+        self._end_model(
+            callback_context,
+            prompt_tokens=usage.prompt_token_count if usage else None,
+            output_tokens=usage.candidates_token_count if usage else None,
+            bytes=len(llm_response.model_dump_json(exclude_none=True))
+        )
+        return None
+
+    async def on_model_error_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest,
+                                      error: Exception):
+        self._end_model(callback_context, error=type(error).__name__)
+        return None
+
+    async def on_event_callback(self, *, invocation_context: InvocationContext, event: Event):
+        self._last_event_ns[(invocation_context.invocation_id, "agent", event.author)] = time.time_ns()
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext):
+        # Agents skipped by a before_agent_callback (memo hits, restored checkpoints) never
+        # reach after_agent_callback: they end with their last event
+        for key, current in list(self._open.items()):
+            if key[0] == invocation_context.invocation_id:
+                get_tracer().end(current, end_ns=self._last_event_ns.get(key))
+                del self._open[key]
+        self._last_event_ns.clear()
+        await asyncio.to_thread(get_tracer().export, Path(self.directory),
+                                f"{invocation_context.session.id}_{invocation_context.invocation_id}")
+        return None